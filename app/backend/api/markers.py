@@ -1,15 +1,16 @@
 """
 Router de Marcadores (Mapa).
 """
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header, Request, Response
 from typing import List
 from services.images import upload_image
 from services.geocoding import get_coordinates
 from services.auth import verify_google_token
 from services.visit_service import log_visit
 from core.database import get_database
+from core.versions import get_etag, is_not_modified, not_modified, cache_headers, user_markers_key
+from repositories.factory import marker_repository
 from models.marker import Marker
-from datetime import datetime
 
 router = APIRouter()
 
@@ -24,27 +25,32 @@ async def get_current_user_email(authorization: str = Header(...)) -> dict:
 
 @router.get("/markers", response_model=List[Marker], summary="Obtener mis marcadores")
 async def get_my_markers(
+    request: Request,
+    response: Response,
     user_data: dict = Depends(get_current_user_email),
     db = Depends(get_database)
 ):
-    """Obtiene los marcadores del usuario autenticado."""
+    """Obtiene los marcadores del usuario autenticado. Admite If-None-Match (304)."""
     email = user_data["email"]
-    cursor = db["markers"].find({"user_email": email})
-    markers = await cursor.to_list(length=1000)
-    # Convert ObjectId to string
-    for m in markers:
-        m["_id"] = str(m["_id"])
-    return [Marker(**m) for m in markers]
+    etag = await get_etag(db, user_markers_key(email))
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    response.headers.update(cache_headers(etag))
+    return await marker_repository(db).find_by_user(email)
 
 @router.get("/markers/{target_email}", response_model=List[Marker], summary="Obtener marcadores de otro usuario (Visita)")
 async def get_user_markers(
     target_email: str,
+    request: Request,
+    response: Response,
     user_data: dict = Depends(get_current_user_email),
     db = Depends(get_database)
 ):
     """
     Obtiene los marcadores de un usuario específico.
-    Registra automáticamente la visita.
+    Registra automáticamente la visita (en diferido, sin esperar a la escritura).
+    Admite If-None-Match: la visita se registra también cuando responde 304.
     """
     visitor_email = user_data["email"]
     visitor_token = user_data["raw_token"]
@@ -52,13 +58,13 @@ async def get_user_markers(
     # 1. Registrar visita (Requisito)
     await log_visit(visitor_email, target_email, visitor_token)
     
-    # 2. Obtener marcadores
-    cursor = db["markers"].find({"user_email": target_email})
-    markers = await cursor.to_list(length=1000)
-    # Convert ObjectId to string
-    for m in markers:
-        m["_id"] = str(m["_id"])
-    return [Marker(**m) for m in markers]
+    # 2. Obtener marcadores (o 304 si el cliente ya tiene la versión actual)
+    etag = await get_etag(db, user_markers_key(target_email))
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    response.headers.update(cache_headers(etag))
+    return await marker_repository(db).find_by_user(target_email)
 
 @router.post("/markers", response_model=Marker, summary="Crear nuevo marcador")
 async def create_marker(
@@ -89,7 +95,4 @@ async def create_marker(
     )
     
     # 4. Guardar DB
-    result = await db["markers"].insert_one(marker.model_dump(by_alias=True, exclude={"id"}))
-    marker.id = str(result.inserted_id)
-    
-    return marker
+    return await marker_repository(db).create(marker)
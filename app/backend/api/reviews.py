@@ -2,16 +2,30 @@
 Router de Reseñas.
 Endpoints CRUD para gestión de reseñas de establecimientos.
 """
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header
+from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header, Query, BackgroundTasks, Request, Response
 from typing import List
+from bson import ObjectId
+from pydantic import TypeAdapter
 from datetime import datetime, timedelta
 from services.images import upload_image
 from services.geocoding import get_coordinates
 from services.auth import verify_google_token
+from services import review_import
 from core.database import get_database
+from core.config import settings
+from core.cursor import encode_cursor, decode_cursor
+from core.request_stats import operation_budget
+from core.versions import get_etag, is_not_modified, not_modified, cache_headers, reviews_key, user_reviews_key
+from services.review_cache import review_cache, ALL_REVIEWS
+from services.review_stream import review_hub
 from models.review import Review
-from repositories.review_repository import ReviewRepository
-from schemas.review import ReviewCreate, ReviewUpdate
+from repositories.factory import review_repository, uses_memory_backend
+from repositories.protocols import ReviewRepositoryProtocol
+from schemas.review import ReviewCreate, ReviewUpdate, ReviewSearchResponse, ReviewImportJob, ReviewChange, ReviewChangesResponse, ReviewBatchRequest, ReviewBatchResponse
+
+# Serializador del listado de reseñas (la respuesta se cachea ya en JSON)
+_review_list = TypeAdapter(List[Review])
 
 router = APIRouter()
 
@@ -37,69 +51,330 @@ async def get_current_user(authorization: str = Header(...)) -> dict:
     return user_data
 
 
+async def require_mongo() -> None:
+    """
+    Dependencia de las rutas que solo funcionan con MongoDB (importaciones).
+    
+    Raises:
+        HTTPException: 503 con REPOSITORY_BACKEND=memory
+    """
+    if uses_memory_backend():
+        raise HTTPException(status_code=503, detail="Las importaciones requieren MongoDB (REPOSITORY_BACKEND=mongo)")
+
+
 @router.get(
     "/",
     response_model=List[Review],
     summary="Obtener todas las reseñas",
-    description="Obtiene el listado completo de reseñas de todos los usuarios.",
+    description="Obtiene el listado completo de reseñas de todos los usuarios. "
+                "Admite If-None-Match: responde 304 si no ha cambiado nada.",
     responses={
         200: {"description": "Lista de reseñas obtenida correctamente"},
+        304: {"description": "Sin cambios desde el ETag indicado"},
         500: {"description": "Error interno del servidor"}
     }
 )
-async def get_all_reviews(db=Depends(get_database)):
+async def get_all_reviews(request: Request, db=Depends(get_database)):
     """
     Obtiene todas las reseñas existentes en la base de datos.
     Este endpoint es público para visualización.
+    
+    La respuesta serializada se sirve desde la caché de reseñas. Si no está
+    en la caché, se compara antes el ETag: un 304 no consulta las reseñas.
+    """
+    cached = review_cache.peek(ALL_REVIEWS)
+    if cached is None:
+        etag = await get_etag(db, reviews_key())
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        
+        async def load():
+            reviews = await review_repository(db).get_all()
+            return etag, _review_list.dump_json(reviews, by_alias=True)
+        
+        cached = await review_cache.get_or_load(ALL_REVIEWS, load)
+    etag, body = cached
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag))
+
+
+async def _get_reviews_by_ids(db, ids: list[str]) -> ReviewBatchResponse:
+    """
+    Obtiene varias reseñas con una única consulta, manteniendo el orden pedido.
+    
+    Los IDs repetidos se devuelven una sola vez. Los IDs con formato inválido
+    y los que no existen se informan aparte sin hacer fallar la petición.
+    """
+    requested = list(dict.fromkeys(review_id.strip() for review_id in ids if review_id.strip()))
+    valid = [review_id for review_id in requested if ObjectId.is_valid(review_id)]
+    invalid = [review_id for review_id in requested if not ObjectId.is_valid(review_id)]
+    
+    found = await review_repository(db).get_many([ObjectId(review_id) for review_id in valid]) if valid else {}
+    return ReviewBatchResponse(
+        items=[found[review_id] for review_id in valid if review_id in found],
+        missing=[review_id for review_id in valid if review_id not in found],
+        invalid=invalid
+    )
+
+
+@router.get(
+    "/by-ids",
+    response_model=ReviewBatchResponse,
+    summary="Obtener varias reseñas por ID",
+    description="Devuelve las reseñas de `ids` (separados por comas, máximo 100) en el orden pedido, "
+                "con una sola consulta. Para listas más largas usar POST /batch.",
+    responses={
+        200: {"description": "Reseñas encontradas e IDs no encontrados o inválidos"},
+        400: {"description": "Demasiados IDs"}
+    },
+    dependencies=[operation_budget(mongo=1, upstream=0)]
+)
+async def get_reviews_by_ids(
+    ids: str = Query(..., min_length=1, description="IDs separados por comas"),
+    db=Depends(get_database)
+):
+    """
+    Obtiene varias reseñas por ID (p. ej. las tarjetas de una pantalla)
+    en una sola petición en lugar de una por reseña.
     """
-    repo = ReviewRepository(db)
-    return await repo.get_all()
+    review_ids = ids.split(",")
+    if len(review_ids) > 100:
+        raise HTTPException(status_code=400, detail="Máximo 100 IDs por petición (usa POST /batch)")
+    return await _get_reviews_by_ids(db, review_ids)
+
+
+@router.post(
+    "/batch",
+    response_model=ReviewBatchResponse,
+    summary="Obtener varias reseñas por ID (lista larga)",
+    description="Igual que GET /v1/reviews/by-ids?ids=..., con los IDs en el cuerpo (máximo 500).",
+    responses={
+        200: {"description": "Reseñas encontradas e IDs no encontrados o inválidos"},
+        422: {"description": "Lista de IDs vacía o demasiado larga"}
+    },
+    dependencies=[operation_budget(mongo=2, upstream=0)]
+)
+async def get_reviews_batch(request: ReviewBatchRequest, db=Depends(get_database)):
+    """
+    Obtiene varias reseñas por ID recibiendo la lista en el cuerpo.
+    """
+    return await _get_reviews_by_ids(db, request.ids)
 
 
 @router.get(
     "/mine",
     response_model=List[Review],
     summary="Obtener mis reseñas",
-    description="Obtiene las reseñas creadas por el usuario autenticado.",
+    description="Obtiene las reseñas creadas por el usuario autenticado. Admite If-None-Match.",
     responses={
         200: {"description": "Lista de reseñas del usuario"},
+        304: {"description": "Sin cambios desde el ETag indicado"},
         401: {"description": "No autenticado"}
-    }
+    },
+    dependencies=[operation_budget(mongo=3, upstream=1)]
 )
 async def get_my_reviews(
+    request: Request,
+    response: Response,
     user_data: dict = Depends(get_current_user),
     db=Depends(get_database)
 ):
     """
     Obtiene las reseñas del usuario autenticado.
     """
-    repo = ReviewRepository(db)
+    etag = await get_etag(db, user_reviews_key(user_data["email"]))
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    repo = review_repository(db)
+    response.headers.update(cache_headers(etag))
     return await repo.get_by_user(user_data["email"])
 
 
+@router.get(
+    "/stream",
+    summary="Feed en vivo de reseñas (SSE)",
+    description="Server-Sent Events con las reseñas creadas, modificadas o eliminadas. "
+                "Admite Last-Event-ID para recuperar los eventos perdidos al reconectar.",
+    responses={
+        200: {"description": "Stream text/event-stream", "content": {"text/event-stream": {}}},
+        503: {"description": "Demasiados clientes conectados"}
+    }
+)
+async def stream_reviews(last_event_id: str | None = Header(None, alias="Last-Event-ID")):
+    """
+    Abre el feed SSE de reseñas.
+    
+    Sustituye al polling de GET /v1/reviews/: el cliente carga el listado una
+    vez y aplica los eventos "review"; ante un evento "reset" lo recarga.
+    Todos los clientes comparten el change stream del worker.
+    """
+    if review_hub.is_full():
+        raise HTTPException(status_code=503, detail="Demasiados clientes conectados al feed")
+    
+    subscriber = review_hub.subscribe(last_event_id)
+    return StreamingResponse(
+        review_hub.events(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get(
+    "/changes",
+    response_model=ReviewChangesResponse,
+    summary="Cambios de reseñas desde un token",
+    description="Sincronización incremental: altas, modificaciones y borrados posteriores a `since`, "
+                "en orden. Sin `since` devuelve todas las reseñas activas.",
+    responses={
+        200: {"description": "Página de cambios"},
+        400: {"description": "Token inválido"},
+        410: {"description": "Token demasiado antiguo: hay que sincronizar desde cero"}
+    }
+)
+async def get_review_changes(
+    since: str | None = Query(None, description="next_token de la respuesta anterior"),
+    limit: int = Query(100, ge=1, le=500, description="Número máximo de cambios"),
+    db=Depends(get_database)
+):
+    """
+    Devuelve los cambios de reseñas posteriores a `since`.
+    
+    El cliente guarda next_token y lo reenvía en la siguiente llamada. El
+    token lleva la posición del último cambio entregado (t, id) y la fecha
+    hasta la que el cliente está sincronizado (s), que se renueva en cada
+    respuesta aunque no haya cambios. Los borrados llegan como op="delete"
+    mientras se conservan las marcas (REVIEW_TOMBSTONE_RETENTION_DAYS): si
+    el cliente lleva más tiempo sin sincronizar, responde 410.
+    Los cambios de los últimos REVIEW_CHANGES_SETTLE_SECONDS se dejan para
+    la siguiente llamada, para no saltarse escrituras aún en curso con un
+    updated_at anterior.
+    """
+    now = datetime.utcnow()
+    position = None
+    synced_at = None
+    if since:
+        token = decode_cursor(since)
+        try:
+            if "t" in token:
+                position = (datetime.fromisoformat(token["t"]), ObjectId(token["id"]))
+            # Los tokens sin "s" (anteriores) solo tienen la posición
+            synced_at = datetime.fromisoformat(token.get("s") or token["t"])
+        except Exception:
+            raise HTTPException(status_code=400, detail="Token de sincronización inválido")
+        if synced_at < now - timedelta(days=settings.review_tombstone_retention_days):
+            raise HTTPException(status_code=410, detail="Token demasiado antiguo: sincroniza de nuevo desde cero")
+    
+    until = now - timedelta(seconds=settings.review_changes_settle_seconds)
+    repo = review_repository(db)
+    documents = await repo.changes(
+        since=position,
+        until=until,
+        limit=limit + 1,
+        include_deleted=position is not None
+    )
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    
+    items = []
+    for document in documents:
+        review_id = str(document["_id"])
+        if document.get("deleted_at") is not None:
+            items.append(ReviewChange(op="delete", id=review_id, updated_at=document["updated_at"]))
+        else:
+            document["_id"] = review_id
+            items.append(ReviewChange(op="upsert", id=review_id, updated_at=document["updated_at"], review=Review(**document)))
+    
+    next_token = {}
+    if items:
+        next_token = {"t": items[-1].updated_at.isoformat(), "id": items[-1].id}
+    elif position is not None:
+        next_token = {"t": position[0].isoformat(), "id": str(position[1])}
+    # Página completa: el cliente tiene todos los cambios anteriores a `until`;
+    # si hay más, solo hasta el último entregado
+    synced = items[-1].updated_at if has_more else until
+    if synced_at is not None:
+        synced = max(synced, synced_at)
+    next_token["s"] = synced.isoformat()
+    return ReviewChangesResponse(items=items, next_token=encode_cursor(next_token), has_more=has_more)
+
+
+@router.get(
+    "/search",
+    response_model=ReviewSearchResponse,
+    summary="Buscar reseñas",
+    description="Búsqueda de texto completo por nombre del establecimiento y dirección. "
+                "No distingue mayúsculas ni acentos y ordena por relevancia.",
+    responses={
+        200: {"description": "Resultados de la búsqueda"},
+        422: {"description": "Parámetros de búsqueda inválidos"}
+    }
+)
+async def search_reviews(
+    q: str = Query(..., min_length=2, max_length=200, description="Texto de búsqueda"),
+    page: int = Query(1, ge=1, le=100, description="Página (empieza en 1)"),
+    page_size: int = Query(20, ge=1, le=50, description="Resultados por página"),
+    db=Depends(get_database)
+):
+    """
+    Busca reseñas usando el índice de texto de MongoDB.
+    Se pide un resultado extra para saber si hay más páginas sin hacer un count.
+    """
+    repo = review_repository(db)
+    reviews = await repo.search(q, skip=(page - 1) * page_size, limit=page_size + 1)
+    return ReviewSearchResponse(
+        items=reviews[:page_size],
+        page=page,
+        page_size=page_size,
+        has_more=len(reviews) > page_size
+    )
+
+
 @router.get(
     "/{review_id}",
     response_model=Review,
     summary="Obtener detalle de reseña",
-    description="Obtiene la información completa de una reseña específica.",
+    description="Obtiene la información completa de una reseña específica. Admite If-None-Match.",
     responses={
         200: {"description": "Detalle de la reseña"},
+        304: {"description": "Sin cambios desde el ETag indicado"},
         404: {"description": "Reseña no encontrada"}
-    }
+    },
+    dependencies=[operation_budget(mongo=2, upstream=0)]
 )
 async def get_review_detail(
     review_id: str,
+    request: Request,
     db=Depends(get_database)
 ):
     """
     Obtiene el detalle completo de una reseña por su ID.
     Incluye email del autor, nombre, token y timestamps.
+    
+    El ETag es la versión global de reseñas: cualquier escritura lo cambia.
+    La respuesta serializada se sirve desde la caché de reseñas. Si no está
+    en la caché, se compara antes el ETag: un 304 no consulta la reseña.
     """
-    repo = ReviewRepository(db)
-    review = await repo.get_by_id(review_id)
-    if not review:
+    cached = review_cache.peek(review_id)
+    if cached is None:
+        etag = await get_etag(db, reviews_key())
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        
+        async def load():
+            review = await review_repository(db).get_by_id(review_id)
+            if not review:
+                return None
+            return etag, review.model_dump_json(by_alias=True).encode()
+        
+        cached = await review_cache.get_or_load(review_id, load)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Reseña no encontrada")
-    return review
+    etag, body = cached
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag))
 
 
 @router.post(
@@ -111,7 +386,8 @@ async def get_review_detail(
         201: {"description": "Reseña creada correctamente"},
         401: {"description": "No autenticado"},
         404: {"description": "Dirección no encontrada"}
-    }
+    },
+    dependencies=[operation_budget(mongo=2)]
 )
 async def create_review(
     establishment_name: str = Form(..., description="Nombre del establecimiento"),
@@ -153,12 +429,107 @@ async def create_review(
     )
     
     # 4. Guardar en base de datos
-    repo = ReviewRepository(db)
+    repo = review_repository(db)
     created_review = await repo.create(review)
     
     return created_review
 
 
+@router.post(
+    "/import",
+    response_model=ReviewImportJob,
+    status_code=202,
+    summary="Importar reseñas en bloque",
+    description="Importa reseñas desde un fichero CSV (con cabecera) o NDJSON con los campos "
+                "establishment_name, address y rating. Se procesa en segundo plano.",
+    responses={
+        202: {"description": "Trabajo de importación creado"},
+        400: {"description": "Fichero inválido"},
+        401: {"description": "No autenticado"},
+        413: {"description": "Fichero demasiado grande (REVIEW_IMPORT_MAX_BYTES)"}
+    },
+    dependencies=[Depends(require_mongo)]
+)
+async def import_reviews(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="Fichero .csv o .ndjson"),
+    file_format: str | None = Form(default=None, pattern="^(csv|ndjson)$", description="Formato (por defecto según la extensión)"),
+    user_data: dict = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """
+    Crea un trabajo de importación y lo procesa en segundo plano.
+    El progreso y los errores por fila se consultan con el job_id devuelto.
+    """
+    file_format = file_format or review_import.detect_format(file.filename, file.content_type)
+    rows = review_import.parse_rows(await review_import.read_upload(file), file_format)
+    author = {
+        "email": user_data["email"],
+        "name": user_data.get("name", "Usuario"),
+        "token": user_data["raw_token"]
+    }
+    job = await review_import.create_job(db, rows, author)
+    background_tasks.add_task(review_import.run_job, db, job)
+    return ReviewImportJob.from_document(job)
+
+
+@router.get(
+    "/import/{job_id}",
+    response_model=ReviewImportJob,
+    summary="Estado de una importación",
+    responses={
+        200: {"description": "Progreso y errores por fila"},
+        404: {"description": "Trabajo no encontrado"}
+    },
+    dependencies=[Depends(require_mongo)]
+)
+async def get_import_job(
+    job_id: str,
+    user_data: dict = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """
+    Devuelve el progreso de un trabajo de importación del usuario.
+    """
+    job = await review_import.get_job(db, job_id)
+    if not job or job["author"]["email"] != user_data["email"]:
+        raise HTTPException(status_code=404, detail="Importación no encontrada")
+    return ReviewImportJob.from_document(job)
+
+
+@router.post(
+    "/import/{job_id}/resume",
+    response_model=ReviewImportJob,
+    status_code=202,
+    summary="Reanudar una importación",
+    responses={
+        202: {"description": "Importación reanudada"},
+        404: {"description": "Trabajo no encontrado"},
+        409: {"description": "El trabajo ya terminó o está en curso"}
+    },
+    dependencies=[Depends(require_mongo)]
+)
+async def resume_import_job(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    user_data: dict = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """
+    Reanuda un trabajo fallido o abandonado desde el último bloque guardado.
+    """
+    job = await review_import.get_job(db, job_id)
+    if not job or job["author"]["email"] != user_data["email"]:
+        raise HTTPException(status_code=404, detail="Importación no encontrada")
+    
+    claimed = await review_import.claim_job(db, job_id)
+    if not claimed:
+        raise HTTPException(status_code=409, detail="La importación ya terminó o está en curso")
+    
+    background_tasks.add_task(review_import.run_job, db, claimed)
+    return ReviewImportJob.from_document({**claimed, "errors": job["errors"]})
+
+
 @router.put(
     "/{review_id}",
     response_model=Review,
@@ -169,7 +540,8 @@ async def create_review(
         401: {"description": "No autenticado"},
         403: {"description": "No autorizado - Solo el autor puede modificar"},
         404: {"description": "Reseña no encontrada"}
-    }
+    },
+    dependencies=[operation_budget(mongo=4, upstream=2)]
 )
 async def update_review(
     review_id: str,
@@ -183,17 +555,14 @@ async def update_review(
     Actualiza una reseña existente.
     Solo el autor original puede modificar su reseña.
     Si se cambia la dirección, se re-geocodifica.
-    """
-    repo = ReviewRepository(db)
-    
-    # Verificar que existe
-    existing = await repo.get_by_id(review_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Reseña no encontrada")
     
-    # Verificar que es el autor
-    if existing.user_email != user_data["email"]:
-        raise HTTPException(status_code=403, detail="Solo el autor puede modificar esta reseña")
+    La autoría se comprueba en el filtro de la propia escritura, así que en
+    el caso habitual es una sola operación. Solo se lee la reseña cuando esa
+    escritura no encuentra nada (para distinguir 404 de 403) o cuando la
+    dirección cambia y hay que geocodificarla antes de guardar.
+    """
+    repo = review_repository(db)
+    email = user_data["email"]
     
     # Preparar datos de actualización
     update_data = {}
@@ -201,21 +570,41 @@ async def update_review(
     if establishment_name is not None:
         update_data["establishment_name"] = establishment_name
     
-    if address is not None and address != existing.address:
-        # Re-geocodificar si cambió la dirección
-        lat, lon = await get_coordinates(address)
-        update_data["address"] = address
-        update_data["latitude"] = lat
-        update_data["longitude"] = lon
-    
     if rating is not None:
         update_data["rating"] = rating
     
-    if not update_data:
-        return existing  # Sin cambios
+    # Si se envía la dirección, se exige que no haya cambiado para no geocodificar
+    expected = {"address": address} if address is not None else None
+    
+    if update_data:
+        review = await repo.update_by_author(review_id, email, update_data, expected=expected)
+    else:
+        review = await repo.get_by_author(review_id, email, expected=expected)  # Sin cambios
+    
+    if review:
+        return review
+    
+    if address is None:
+        await _raise_not_found_or_forbidden(repo, review_id, "Solo el autor puede modificar esta reseña")
+    
+    # La escritura no se aplicó: o no existe, o es de otro autor, o cambió la dirección
+    existing = await repo.get_by_id(review_id)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Reseña no encontrada")
+    
+    if existing.user_email != email:
+        raise HTTPException(status_code=403, detail="Solo el autor puede modificar esta reseña")
     
-    updated = await repo.update(review_id, update_data)
-    return updated
+    # Re-geocodificar antes de escribir: si falla, no se guarda nada
+    lat, lon = await get_coordinates(address)
+    update_data["address"] = address
+    update_data["latitude"] = lat
+    update_data["longitude"] = lon
+    
+    review = await repo.update_by_author(review_id, email, update_data)
+    if not review:
+        raise HTTPException(status_code=404, detail="Reseña no encontrada")
+    return review
 
 
 @router.delete(
@@ -227,7 +616,8 @@ async def update_review(
         401: {"description": "No autenticado"},
         403: {"description": "No autorizado - Solo el autor puede eliminar"},
         404: {"description": "Reseña no encontrada"}
-    }
+    },
+    dependencies=[operation_budget(mongo=2, upstream=1)]
 )
 async def delete_review(
     review_id: str,
@@ -238,20 +628,22 @@ async def delete_review(
     Elimina una reseña de la base de datos.
     Solo el autor original puede eliminar su reseña.
     """
-    repo = ReviewRepository(db)
-    
-    # Verificar que existe
-    existing = await repo.get_by_id(review_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Reseña no encontrada")
-    
-    # Verificar que es el autor
-    if existing.user_email != user_data["email"]:
-        raise HTTPException(status_code=403, detail="Solo el autor puede eliminar esta reseña")
+    repo = review_repository(db)
     
-    # Eliminar
-    deleted = await repo.delete(review_id)
-    if deleted:
+    if await repo.delete_by_author(review_id, user_data["email"]):
         return {"message": "Reseña eliminada correctamente"}
     
-    raise HTTPException(status_code=500, detail="Error al eliminar la reseña")
+    await _raise_not_found_or_forbidden(repo, review_id, "Solo el autor puede eliminar esta reseña")
+
+
+async def _raise_not_found_or_forbidden(repo: ReviewRepositoryProtocol, review_id: str, forbidden_detail: str):
+    """
+    Lanza el error adecuado cuando una operación filtrada por autor no
+    encuentra la reseña: 404 si no existe, 403 si es de otro autor.
+    
+    Raises:
+        HTTPException: Siempre (404 o 403)
+    """
+    if not await repo.exists(review_id):
+        raise HTTPException(status_code=404, detail="Reseña no encontrada")
+    raise HTTPException(status_code=403, detail=forbidden_detail)
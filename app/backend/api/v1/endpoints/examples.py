@@ -3,9 +3,10 @@ Endpoints para gestión de examples.
 
 Proporciona operaciones CRUD completas y búsquedas parametrizadas.
 Plantilla genérica para adaptar según las entidades del examen.
+Todas las rutas requieren un token de Google (api/v1/router.py).
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from schemas.example import ExampleCreate, ExampleUpdate, ExampleResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from schemas.example import ExampleCreate, ExampleUpdate, ExampleResponse, ExampleBulkRequest, ExampleBulkResponse
 from services.example_service import ExampleService
 from core.database import get_database
 
@@ -52,6 +53,37 @@ async def create_example(
     """
     return await service.create_example(example)
 
+@router.post(
+    "/bulk",
+    response_model=ExampleBulkResponse,
+    summary="Crear, actualizar y eliminar examples en bloque",
+    description="Aplica varias creaciones, actualizaciones y eliminaciones en un único bulk_write "
+                "sin orden y devuelve el resultado de cada una.",
+    responses={
+        200: {"description": "Bloque procesado (ver el estado de cada operación)."},
+        400: {"description": "Error de validación."},
+        500: {"description": "Error interno del servidor."}
+    },
+    tags=["examples"]
+)
+async def bulk_examples(
+    request: ExampleBulkRequest = Body(..., description="Operaciones a aplicar"),
+    service: ExampleService = Depends(get_example_service)
+):
+    """
+    Aplica un bloque de operaciones sobre examples.
+    
+    Un fallo en una operación no impide aplicar las demás.
+    
+    Args:
+        request: Listas de creates, updates y deletes
+        service: Servicio (inyectado)
+        
+    Returns:
+        ExampleBulkResponse: Resultado por operación
+    """
+    return await service.bulk(request)
+
 @router.get(
     "",
     response_model=list[ExampleResponse],
@@ -189,7 +221,8 @@ async def delete_example(
     "/search/by-name",
     response_model=list[ExampleResponse],
     summary="Buscar examples por nombre",
-    description="Busca examples por nombre (parcial).",
+    description="Busca examples por prefijo del nombre, o en cualquier posición con substring=true. "
+                "No distingue mayúsculas ni acentos.",
     responses={
         200: {"description": "Búsqueda completada."},
         500: {"description": "Error interno del servidor."}
@@ -197,7 +230,9 @@ async def delete_example(
     tags=["examples", "búsquedas"]
 )
 async def search_examples_by_name(
-    name: str,
+    name: str = Query(..., min_length=1, max_length=100, description="Nombre a buscar"),
+    substring: bool = Query(False, description="Buscar en cualquier posición del nombre"),
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de resultados"),
     service: ExampleService = Depends(get_example_service)
 ):
     """
@@ -205,10 +240,12 @@ async def search_examples_by_name(
     
     Args:
         name: Nombre a buscar
+        substring: Si True, busca en cualquier posición (trigramas)
+        limit: Número máximo de resultados
         service: Servicio (inyectado)
         
     Returns:
         list[ExampleResponse]: Examples que coinciden
     """
-    return await service.search_by_name(name)
+    return await service.search_by_name(name, substring=substring, limit=limit)
 
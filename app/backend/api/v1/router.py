@@ -1,5 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from api import auth, markers, visits, geocoding, reviews
+from api.reviews import get_current_user
+from api.v1.endpoints import examples
 
 api_router = APIRouter()
 
@@ -8,3 +10,5 @@ api_router.include_router(reviews.router, prefix="/reviews", tags=["Reseñas"])
 api_router.include_router(markers.router, prefix="/maps", tags=["Mapas y Marcadores"])
 api_router.include_router(visits.router, prefix="/social", tags=["Visitas Sociales"])
 api_router.include_router(geocoding.router, prefix="/geocoding", tags=["Geocodificación"])
+# Plantilla genérica: escribe en la base de datos real, así que exige sesión en todas sus rutas
+api_router.include_router(examples.router, prefix="/examples", dependencies=[Depends(get_current_user)])
@@ -1,12 +1,12 @@
 """
 Router de Visitas.
 """
-from fastapi import APIRouter, Depends, Header, HTTPException
-from typing import List
-from services.visit_service import get_user_visits
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from typing import Literal
+from services.visit_service import get_user_visits, get_visit_stats
 from services.auth import verify_google_token
 from core.database import get_database
-from models.visit import Visit
+from schemas.visit import VisitPage, VisitStats
 
 router = APIRouter()
 
@@ -18,11 +18,26 @@ async def get_current_user_email(authorization: str = Header(...)) -> str:
     user_data = await verify_google_token(token)
     return user_data["email"]
 
-@router.get("/visits", response_model=List[Visit], summary="Obtener visitas recibidas")
+@router.get("/visits", response_model=VisitPage, summary="Obtener visitas recibidas")
 async def get_my_visits(
+    cursor: str | None = Query(None, description="Cursor devuelto en next_cursor de la página anterior"),
+    limit: int = Query(20, ge=1, le=100, description="Elementos por página"),
     email: str = Depends(get_current_user_email)
 ):
     """
-    Devuelve la lista de usuarios que han visitado tu mapa.
+    Devuelve los usuarios que han visitado tu mapa, con el número de
+    visitas de cada uno por día. Paginado por cursor.
     """
-    return await get_user_visits(email)
+    return await get_user_visits(email, cursor=cursor, limit=limit)
+
+@router.get("/visits/stats", response_model=VisitStats, summary="Estadísticas de visitas recibidas")
+async def get_my_visit_stats(
+    granularity: Literal["day", "week"] = Query("day", description="Agrupar por día o por semana"),
+    days: int = Query(30, ge=1, le=365, description="Días hacia atrás a analizar"),
+    email: str = Depends(get_current_user_email)
+):
+    """
+    Devuelve visitas totales y visitantes únicos por periodo.
+    Se calcula en el servidor para que el dashboard no cuente visitas en el cliente.
+    """
+    return await get_visit_stats(email, granularity=granularity, days=days)
@@ -0,0 +1,6 @@
+"""
+Benchmarks de rendimiento del backend.
+
+Se ejecutan desde app/backend como módulos, por ejemplo:
+    python -m benchmarks.example_search
+"""
@@ -0,0 +1,489 @@
+"""
+Benchmark de los endpoints de la API (las rutas de api/).
+
+Ejecuta la aplicación en el mismo proceso (httpx.ASGITransport, sin red)
+contra un mongod local, mongomock-motor o los repositorios en memoria
+(REPOSITORY_BACKEND=memory, sin base de datos). LocationIQ, Cloudinary y los
+certificados de Google se sustituyen por servidores locales deterministas
+con latencia configurable (benchmarks/stubs.py). Para cada ruta mide
+peticiones por segundo y latencias p50/p95/p99, guarda el resultado en JSON
+y, con --baseline, lo compara con una ejecución anterior: cualquier
+regresión por encima de --tolerance hace que el proceso termine con código 1.
+
+Nunca usa la base de datos ni las credenciales de la aplicación: MONGO_URI,
+DATABASE_NAME y las claves de los servicios externos se sustituyen antes de
+cargar la configuración. Con mongomock-motor no hay command listeners (ni
+métricas de MongoDB) ni change streams, pero sus operaciones sí cuentan
+para los presupuestos por ruta; con --memory no hay comandos de MongoDB
+(solo se comprueban las llamadas externas), pero sí eventos de reseñas. Los
+números solo son comparables con ejecuciones del mismo modo.
+
+Uso (desde app/backend):
+    python -m benchmarks.endpoints                                   # mongomock-motor
+    python -m benchmarks.endpoints --mongo-uri mongodb://localhost:27017
+    python -m benchmarks.endpoints --memory                          # repositorios en memoria
+    python -m benchmarks.endpoints --requests 500 --concurrency 20 --latency locationiq=80
+    python -m benchmarks.endpoints --output actual.json --baseline referencia.json
+    python -m benchmarks.endpoints --only "GET /v1/reviews/{review_id}"
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import httpx
+
+from benchmarks.stubs import StubUpstreams, count_mongomock_commands, fake_coordinates
+
+DATABASE_NAME = "bench_endpoints"
+GOOGLE_CLIENT_ID = "bench-client.apps.googleusercontent.com"
+STREETS = ["Calle Larios", "Avenida de Andalucía", "Calle Granada", "Paseo del Parque", "Calle Carretería",
+           "Gran Vía", "Calle Alcalá", "Paseo de Gracia", "Calle Sierpes", "Avenida de la Constitución"]
+CITIES = ["Málaga", "Madrid", "Barcelona", "Sevilla", "Valencia", "Granada", "Bilbao", "Cádiz"]
+WORDS = ["Casa", "Bodega", "Taberna", "Mesón", "Bar", "Hotel", "Hostal", "Café", "Marisquería", "Asador",
+         "Lola", "Pepa", "Mar", "Sol", "Puerto", "Jardín", "Plaza", "Real", "Antigua", "Nueva"]
+# PNG de 1x1 píxel para las subidas de imágenes
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082"
+)
+
+# Rutas que no se miden, con el motivo
+SKIPPED = {
+    "GET /v1/reviews/stream": "conexión SSE de larga duración",
+    "POST /v1/reviews/import": "trabajo en segundo plano",
+    "GET /v1/reviews/import/{job_id}": "trabajo en segundo plano",
+    "POST /v1/reviews/import/{job_id}/resume": "trabajo en segundo plano",
+    **{
+        f"{method} /v1/examples{path}": "plantilla genérica (benchmarks/example_search.py mide la búsqueda)"
+        for method, path in [
+            ("GET", ""), ("POST", ""), ("POST", "/bulk"), ("GET", "/search/by-name"),
+            ("GET", "/{example_id}"), ("PUT", "/{example_id}"), ("DELETE", "/{example_id}"),
+        ]
+    },
+}
+# Rutas que además se omiten con mongomock-motor
+SKIPPED_WITH_MONGOMOCK = {
+    "GET /v1/reviews/search": "mongomock no implementa $text",
+}
+
+
+class Scenario:
+    """Ruta a medir y generador de sus peticiones."""
+
+    def __init__(self, method: str, route: str, build):
+        """
+        Args:
+            method: Método HTTP
+            route: Plantilla de la ruta tal y como la declara la app
+            build: Función (número de petición) -> (url, kwargs de httpx)
+        """
+        self.method = method
+        self.route = route
+        self.build = build
+
+    @property
+    def name(self) -> str:
+        """Nombre de la ruta en los resultados ("GET /v1/reviews/{review_id}")."""
+        return f"{self.method} {self.route}"
+
+
+class Fixtures:
+    """Datos generados para el benchmark (usuarios, reseñas y direcciones)."""
+
+    def __init__(self):
+        self.users: list[dict] = []
+        self.review_ids: list[str] = []
+        self.reviews_by_user: dict[str, list[str]] = {}
+        self.deletable_ids: list[str] = []
+        self.addresses: list[str] = []
+
+
+def _configure_environment(args) -> None:
+    """
+    Sustituye la configuración sensible antes de importar la aplicación.
+
+    Las variables de entorno tienen prioridad sobre .env, así que el
+    benchmark nunca toca la base de datos ni las cuentas reales.
+    """
+    os.environ.update({
+        "MONGO_URI": args.mongo_uri or "mongodb://localhost:27017",
+        "DATABASE_NAME": DATABASE_NAME,
+        "ENVIRONMENT": args.environment,
+        "CLOUD_NAME": "bench",
+        "CLOUDINARY_API": "bench",
+        "CLOUDINARY_API_SECRET": "bench",
+        "GOOGLE_CLIENT_ID": GOOGLE_CLIENT_ID,
+        "LOCATIONIQ_TOKEN": "bench",
+        "CACHE_BACKEND": "memory",
+        "REPOSITORY_BACKEND": "memory" if args.memory else "mongo",
+        # El limitador protege la cuota real de LocationIQ, no el servidor simulado
+        "GEOCODING_RATE_LIMIT_PER_SECOND": "100000",
+        "REQUEST_BUDGET_ENFORCE": "true" if args.enforce_budgets else "false",
+    })
+    for name in ("PROFILING_TOKEN", "MONGO_SLOW_QUERY_MS", "WEB_CONCURRENCY"):
+        os.environ.pop(name, None)
+
+
+@asynccontextmanager
+async def _running_app(app, mongo_uri: str | None, memory: bool):
+    """
+    Arranca la aplicación y devuelve su base de datos (vacía).
+
+    Con mongod y con los repositorios en memoria (base de datos None) se usa
+    el lifespan real. Con mongomock-motor se conecta el
+    cliente simulado y se hace el resto del arranque a mano: no admite
+    change streams (la caché usa el TTL corto de respaldo) y sus operaciones
+    se cuentan con count_mongomock_commands para los presupuestos por ruta.
+    """
+    from core.cache_backend import close_cache_backend
+    from core.database import db, get_database
+    from core.http import close_http_client
+    from core.indexes import ensure_indexes
+    from services.visit_service import visit_buffer
+
+    if memory:
+        async with app.router.lifespan_context(app):
+            yield get_database()
+        return
+
+    if mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_uri)
+        await client.drop_database(DATABASE_NAME)
+        client.close()
+        async with app.router.lifespan_context(app):
+            yield get_database()
+        return
+
+    from mongomock_motor import AsyncMongoMockClient
+    db.client = AsyncMongoMockClient()
+    db.db = db.client[DATABASE_NAME]
+    try:
+        await ensure_indexes(db.db)
+    except Exception as e:
+        print(f"⚠️ mongomock no admite todos los índices: {str(e)}")
+    await visit_buffer.start()
+    try:
+        with count_mongomock_commands():
+            yield db.db
+    finally:
+        await visit_buffer.stop()
+        await close_http_client()
+        await close_cache_backend()
+
+
+async def _seed(database, stubs: StubUpstreams, args) -> Fixtures:
+    """Crea usuarios (con token), reseñas, reseñas para borrar y marcadores."""
+    from models.marker import Marker
+    from models.review import Review
+    from repositories.factory import marker_repository, review_repository
+
+    rng = random.Random(args.seed)
+    fixtures = Fixtures()
+    fixtures.addresses = [f"{street} {number}, {city}" for street in STREETS for city in CITIES for number in (1, 7)]
+
+    for position in range(args.users):
+        email = f"user{position}@bench.example.com"  # .local no es un dominio válido para EmailStr
+        name = f"Usuario {position}"
+        token = stubs.issue_token(email, name, audience=GOOGLE_CLIENT_ID)
+        fixtures.users.append({"email": email, "name": name, "token": token})
+        fixtures.reviews_by_user[email] = []
+
+    def review(user: dict) -> Review:
+        address = rng.choice(fixtures.addresses)
+        latitude, longitude = fake_coordinates(address)
+        return Review(
+            establishment_name=f"{rng.choice(WORDS)} {rng.choice(WORDS)}",
+            address=address,
+            latitude=latitude,
+            longitude=longitude,
+            rating=rng.randint(0, 5),
+            user_email=user["email"],
+            user_name=user["name"],
+            token_used="bench"
+        )
+
+    repository = review_repository(database)
+    for _ in range(args.reviews):
+        user = rng.choice(fixtures.users)
+        created = await repository.create(review(user))
+        fixtures.review_ids.append(created.id)
+        fixtures.reviews_by_user[user["email"]].append(created.id)
+
+    # Una reseña por cada DELETE que se va a hacer, todas del primer usuario
+    owner = fixtures.users[0]
+    for _ in range(args.warmup + args.requests):
+        fixtures.deletable_ids.append((await repository.create(review(owner))).id)
+
+    markers = marker_repository(database)
+    for user in fixtures.users:
+        for _ in range(args.markers_per_user):
+            location = rng.choice(fixtures.addresses)
+            latitude, longitude = fake_coordinates(location)
+            await markers.create(Marker(
+                user_email=user["email"], location_name=location, latitude=latitude, longitude=longitude,
+                image_url="https://res.cloudinary.com/bench/image/upload/seed.png"
+            ))
+    return fixtures
+
+
+def _scenarios(fixtures: Fixtures, seed: int) -> list[Scenario]:
+    """Un escenario por ruta; las peticiones dependen solo de `seed` y del número de petición."""
+    users = fixtures.users
+    rng = random.Random(seed)
+    search_terms = [word.lower() for word in WORDS]
+
+    def auth(i: int) -> dict:
+        return {"Authorization": f"Bearer {users[i % len(users)]['token']}"}
+
+    authors = [user for user in users if fixtures.reviews_by_user[user["email"]]]
+
+    def own_review(i: int) -> tuple[dict, str]:
+        user = authors[i % len(authors)]
+        owned = fixtures.reviews_by_user[user["email"]]
+        return {"Authorization": f"Bearer {user['token']}"}, owned[i % len(owned)]
+
+    def image() -> list:
+        return [("images", ("bench.png", PNG, "image/png"))]
+
+    def update(i: int):
+        headers, review_id = own_review(i)
+        return f"/v1/reviews/{review_id}", {"headers": headers, "data": {"rating": str(i % 6)}}
+
+    def create_review(i: int):
+        form = {"establishment_name": f"Bench {i}", "address": fixtures.addresses[i % len(fixtures.addresses)],
+                "rating": str(i % 6)}
+        return "/v1/reviews/", {"headers": auth(i), "data": form, "files": image()}
+
+    def create_marker(i: int):
+        form = {"location_name": fixtures.addresses[i % len(fixtures.addresses)]}
+        return "/v1/maps/markers", {"headers": auth(i), "data": form,
+                                    "files": [("image", ("bench.png", PNG, "image/png"))]}
+
+    owner = {"Authorization": f"Bearer {users[0]['token']}"}
+    return [
+        Scenario("POST", "/v1/auth/login", lambda i: ("/v1/auth/login", {"json": {"token": users[i % len(users)]["token"]}})),
+        Scenario("GET", "/v1/reviews/", lambda i: ("/v1/reviews/", {})),
+        Scenario("GET", "/v1/reviews/by-ids", lambda i: (
+            "/v1/reviews/by-ids", {"params": {"ids": ",".join(rng.sample(fixtures.review_ids, min(20, len(fixtures.review_ids))))}}
+        )),
+        Scenario("POST", "/v1/reviews/batch", lambda i: (
+            "/v1/reviews/batch", {"json": {"ids": rng.sample(fixtures.review_ids, min(200, len(fixtures.review_ids)))}}
+        )),
+        Scenario("GET", "/v1/reviews/mine", lambda i: ("/v1/reviews/mine", {"headers": auth(i)})),
+        Scenario("GET", "/v1/reviews/changes", lambda i: ("/v1/reviews/changes", {"params": {"limit": 100}})),
+        Scenario("GET", "/v1/reviews/search", lambda i: ("/v1/reviews/search", {"params": {"q": rng.choice(search_terms)}})),
+        Scenario("GET", "/v1/reviews/{review_id}", lambda i: (f"/v1/reviews/{rng.choice(fixtures.review_ids)}", {})),
+        Scenario("POST", "/v1/reviews/", create_review),
+        Scenario("PUT", "/v1/reviews/{review_id}", update),
+        Scenario("DELETE", "/v1/reviews/{review_id}", lambda i: (f"/v1/reviews/{fixtures.deletable_ids[i]}", {"headers": owner})),
+        Scenario("GET", "/v1/maps/markers", lambda i: ("/v1/maps/markers", {"headers": auth(i)})),
+        Scenario("GET", "/v1/maps/markers/{target_email}", lambda i: (
+            f"/v1/maps/markers/{users[(i + 1) % len(users)]['email']}", {"headers": auth(i)}
+        )),
+        Scenario("POST", "/v1/maps/markers", create_marker),
+        Scenario("GET", "/v1/social/visits", lambda i: ("/v1/social/visits", {"headers": auth(i)})),
+        Scenario("GET", "/v1/social/visits/stats", lambda i: ("/v1/social/visits/stats", {"headers": auth(i)})),
+        Scenario("GET", "/v1/geocoding/autocomplete", lambda i: (
+            "/v1/geocoding/autocomplete", {"params": {"q": rng.choice(CITIES)}}
+        )),
+    ]
+
+
+def _uncovered_routes(app, scenarios: list[Scenario]) -> list[str]:
+    """Rutas de la API sin escenario ni motivo para omitirlas (p. ej. rutas nuevas)."""
+    covered = {scenario.name for scenario in scenarios} | set(SKIPPED)
+    routes = {
+        f"{method} {route.path}"
+        for route in app.routes if route.path.startswith("/v1/")
+        for method in getattr(route, "methods", None) or []
+    }
+    return sorted(routes - covered)
+
+
+async def _run(client: httpx.AsyncClient, scenario: Scenario, args) -> dict:
+    """
+    Lanza las peticiones de un escenario con `concurrency` clientes a la vez.
+
+    Las primeras `warmup` peticiones (secuenciales) no se miden.
+    """
+    async def send(i: int) -> httpx.Response:
+        url, kwargs = scenario.build(i)
+        return await client.request(scenario.method, url, **kwargs)
+
+    for i in range(args.warmup):
+        await send(i)
+
+    latencies = []
+    statuses = Counter()
+    numbers = itertools.count(args.warmup)
+    total = args.warmup + args.requests
+
+    async def worker():
+        while (i := next(numbers)) < total:
+            start = time.perf_counter()
+            try:
+                status = str((await send(i)).status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 500),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentiles[49], 3),
+        "p95_ms": round(percentiles[94], 3),
+        "p99_ms": round(percentiles[98], 3),
+        "max_ms": round(max(latencies), 3),
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def _compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Regresiones respecto a la referencia: p95 o p99 más altos, menos
+    peticiones por segundo (más allá de la tolerancia) o más errores.
+    """
+    regressions = []
+    for name, current in results["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]}")
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {previous['rps']} -> {current['rps']}")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errores {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def _parse_latencies(values: list[str]) -> dict[str, float]:
+    """Convierte ["locationiq=50", ...] en {"locationiq": 50.0, ...}."""
+    latencies = {}
+    for value in values:
+        service, _, milliseconds = value.partition("=")
+        if service not in ("locationiq", "cloudinary", "google_certs") or not milliseconds:
+            raise SystemExit(f"--latency no válido: {value} (servicio=ms; locationiq, cloudinary, google_certs)")
+        latencies[service] = float(milliseconds)
+    return latencies
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGO_URI"),
+                        help="mongod local (por defecto mongomock-motor). La base de datos se borra al empezar")
+    parser.add_argument("--memory", action="store_true",
+                        help="Repositorios en memoria (REPOSITORY_BACKEND=memory) en lugar de MongoDB")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones medidas por ruta")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20, help="Peticiones previas no medidas por ruta")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--reviews", type=int, default=2000)
+    parser.add_argument("--markers-per-user", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", action="append", default=[], metavar="SERVICIO=MS",
+                        help="Latencia de un servicio simulado (repetible): locationiq, cloudinary, google_certs")
+    parser.add_argument("--environment", choices=["development", "staging", "production"],
+                        help="ENVIRONMENT de la aplicación (por defecto production; staging con --memory)")
+    parser.add_argument("--enforce-budgets", action="store_true",
+                        help="Cuenta como error superar el presupuesto de una ruta")
+    parser.add_argument("--only", action="append", default=[], metavar="RUTA", help='Solo esta ruta, p. ej. "GET /v1/reviews/"')
+    parser.add_argument("--output", default=f"benchmarks/results/endpoints-{datetime.now():%Y%m%d-%H%M%S}.json")
+    parser.add_argument("--baseline", help="Resultados anteriores con los que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Empeoramiento admitido frente a la referencia (0.2 = 20%%)")
+    args = parser.parse_args()
+    if args.concurrency <= 0 or args.requests < 2 or args.users <= 0 or args.reviews <= 0:
+        parser.error("--concurrency, --users y --reviews deben ser positivos y --requests al menos 2")
+    if args.memory and args.mongo_uri:
+        parser.error("--memory y --mongo-uri son incompatibles")
+    if args.memory and args.environment == "production":
+        parser.error("--memory no se puede usar con --environment production")
+    args.environment = args.environment or ("staging" if args.memory else "production")
+
+    stubs = StubUpstreams(latency_ms=_parse_latencies(args.latency))
+    stubs.start()
+    _configure_environment(args)
+    # Importación diferida: Settings lee el entorno al importarse
+    from main import app
+    stubs.redirect_app()
+
+    routes = {}
+    skipped = dict(SKIPPED)
+    try:
+        async with _running_app(app, args.mongo_uri, args.memory) as database:
+            print(f"Generando datos ({args.users} usuarios, {args.reviews} reseñas)...")
+            fixtures = await _seed(database, stubs, args)
+            scenarios = _scenarios(fixtures, args.seed)
+            skipped = dict(SKIPPED) if args.mongo_uri or args.memory else {**SKIPPED, **SKIPPED_WITH_MONGOMOCK}
+            for name in _uncovered_routes(app, scenarios):
+                print(f"⚠️ Ruta sin escenario de benchmark: {name}")
+
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for scenario in scenarios:
+                    if (args.only and scenario.name not in args.only) or scenario.name in skipped:
+                        continue
+                    result = await _run(client, scenario, args)
+                    routes[scenario.name] = result
+                    print(f"{scenario.name:<40} {result['rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  "
+                          f"p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  errores {result['errors']}")
+    finally:
+        stubs.stop()
+
+    results = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "database": "memory" if args.memory else "mongod" if args.mongo_uri else "mongomock",
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "reviews": args.reviews,
+            "seed": args.seed,
+            "latency_ms": stubs.latency_ms,
+            "upstream_requests": stubs.requests,
+            "skipped": skipped,
+        },
+        "routes": routes,
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2, ensure_ascii=False)
+    print(f"✅ Resultados guardados en {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    for field in ("database", "concurrency", "latency_ms"):
+        if baseline.get("meta", {}).get(field) != results["meta"][field]:
+            print(f"⚠️ La referencia usa otro valor de {field}: la comparación puede no ser válida")
+    regressions = _compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"❌ Regresión: {regression}")
+    if not regressions:
+        print(f"✅ Sin regresiones respecto a {args.baseline} (tolerancia {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
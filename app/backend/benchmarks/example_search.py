@@ -0,0 +1,117 @@
+"""
+Benchmark de ExampleRepository.find_by_name con 1M de documentos.
+
+Compara el $regex sin anclar anterior con la búsqueda por prefijo
+(rango sobre name_search) y por subcadena (trigramas en name_ngrams).
+Necesita un mongod accesible; no usa la base de datos de la aplicación.
+
+Uso (desde app/backend):
+    BENCH_MONGO_URI=mongodb://localhost:27017 python -m benchmarks.example_search
+    python -m benchmarks.example_search --docs 1000000 --queries 200 --reuse
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from core.indexes import ensure_indexes
+from core.search import normalize_text, prefix_range, search_fields
+from repositories.example_repository import ExampleRepository
+
+SYLLABLES = ["ma", "la", "ga", "se", "vi", "lla", "gra", "na", "da", "cor", "do", "ba",
+             "al", "me", "ría", "cá", "diz", "huel", "ja", "én", "to", "rre", "mo", "li", "nos"]
+BATCH_SIZE = 10_000
+
+
+def _random_name(rng: random.Random) -> str:
+    words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+    return " ".join(word.capitalize() for word in words)
+
+
+async def _seed(collection, total: int, rng: random.Random) -> None:
+    """Inserta `total` examples en lotes con los campos de búsqueda ya calculados."""
+    now = datetime.utcnow()
+    inserted = 0
+    while inserted < total:
+        batch = []
+        for _ in range(min(BATCH_SIZE, total - inserted)):
+            name = _random_name(rng)
+            batch.append({"name": name, "description": None, "created_at": now, "updated_at": now,
+                          **search_fields(name)})
+        await collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+        print(f"  {inserted}/{total} documentos", end="\r")
+    print()
+
+
+async def _time_queries(run, terms: list[str]) -> dict:
+    """Ejecuta `run(term)` para cada término y devuelve percentiles en milisegundos."""
+    durations = []
+    for term in terms:
+        start = time.perf_counter()
+        await run(term)
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {
+        "p50_ms": round(statistics.median(durations), 3),
+        "p95_ms": round(durations[int(len(durations) * 0.95) - 1], 3),
+        "max_ms": round(durations[-1], 3),
+    }
+
+
+async def _docs_examined(collection, query: dict) -> int:
+    explain = await collection.find(query).limit(100).explain()
+    return explain.get("executionStats", {}).get("totalDocsExamined", -1)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="bench_example_search")
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse", action="store_true", help="No regenerar los datos si ya existen")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    client = AsyncIOMotorClient(args.uri)
+    database = client[args.database]
+    collection = database.examples
+
+    if not args.reuse or await collection.estimated_document_count() < args.docs:
+        await collection.drop()
+        print(f"Generando {args.docs} documentos...")
+        await _seed(collection, args.docs, rng)
+    await ensure_indexes(database)
+
+    repository = ExampleRepository(database)
+    terms = [_random_name(rng).split()[0][:rng.randint(3, 6)] for _ in range(args.queries)]
+
+    async def regex_scan(term: str):
+        # Comportamiento anterior de find_by_name
+        return await collection.find({"name": {"$regex": term, "$options": "i"}}).to_list(length=100)
+
+    results = {
+        "docs": await collection.estimated_document_count(),
+        "queries": len(terms),
+        "regex_scan": await _time_queries(regex_scan, terms),
+        "prefix": await _time_queries(lambda t: repository.find_by_name(t), terms),
+        "substring": await _time_queries(lambda t: repository.find_by_name(t, substring=True), terms),
+        "docs_examined": {
+            "regex_scan": await _docs_examined(collection, {"name": {"$regex": terms[0], "$options": "i"}}),
+            "prefix": await _docs_examined(collection, {"name_search": prefix_range(normalize_text(terms[0]))}),
+        },
+    }
+    print(json.dumps(results, indent=2))
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,236 @@
+"""
+Informe del tiempo de importación de la aplicación (arranque en frío).
+
+Lanza varias veces un intérprete nuevo con `python -X importtime -c "import main"`
+y agrupa el tiempo propio (self) de cada módulo por paquete raíz, de modo
+que cada paquete cuenta lo mismo lo importe quien lo importe. Informa de
+la mediana del total, de los paquetes más caros y de la duración del
+proceso completo (intérprete + importación).
+
+El proceso termina con código 1 si al importar se carga algún módulo de
+lazy_modules (benchmarks/import_budget.json): SDKs que no se deben importar
+al arrancar. Esta comprobación no depende de la máquina.
+
+Los tiempos sí dependen de la máquina, así que no hay un máximo absoluto:
+con --output se guarda la medición en JSON y, con --baseline, se compara
+con una medición anterior de la misma máquina (mismo host, Python y
+arquitectura). Una mediana peor que la referencia más allá de --tolerance
+también termina con código 1; si la referencia es de otra máquina, solo se
+avisa y no se compara.
+
+Antes de medir se hace una importación sin contar, para que los .pyc ya
+existan como en una imagen de contenedor.
+
+Uso (desde app/backend):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 10 --top 25
+    python -m benchmarks.import_time --report benchmarks/import_time.md
+    python -m benchmarks.import_time --output actual.json --baseline referencia.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(BACKEND_DIR, "benchmarks", "import_budget.json")
+
+
+def _import_once(module: str) -> tuple[Counter, set[str], float]:
+    """
+    Importa `module` en un intérprete nuevo con -X importtime.
+
+    Args:
+        module: Módulo a importar (p. ej. "main")
+
+    Returns:
+        tuple: (microsegundos propios por paquete raíz, módulos importados, duración del proceso en ms)
+
+    Raises:
+        SystemExit: Si la importación falla
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise SystemExit(f"❌ Falla `import {module}`:\n{result.stderr[-2000:]}")
+
+    packages = Counter()
+    modules = set()
+    for line in result.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        name = name.strip()
+        modules.add(name)
+        packages[name.split(".")[0]] += int(self_us)
+    return packages, modules, wall_ms
+
+
+def measure(module: str, runs: int) -> dict:
+    """
+    Mide la importación `runs` veces y calcula las medianas.
+
+    Args:
+        module: Módulo a importar
+        runs: Número de intérpretes medidos
+
+    Returns:
+        dict: total_ms, process_ms, packages (paquete -> ms) y modules (importados en todas las ejecuciones)
+    """
+    _import_once(module)  # Genera los .pyc; no cuenta
+    samples = [_import_once(module) for _ in range(runs)]
+
+    names = set().union(*(packages for packages, _, _ in samples))
+    packages = {
+        name: statistics.median(packages[name] for packages, _, _ in samples) / 1000
+        for name in names
+    }
+    return {
+        "total_ms": statistics.median(sum(packages.values()) for packages, _, _ in samples) / 1000,
+        "process_ms": statistics.median(wall_ms for _, _, wall_ms in samples),
+        "packages": dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)),
+        "modules": set.intersection(*(modules for _, modules, _ in samples)),
+    }
+
+
+def machine() -> dict:
+    """Identifica la máquina de una medición (los tiempos solo se comparan entre mediciones iguales)."""
+    return {
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "system": f"{platform.system()} {platform.machine()}",
+    }
+
+
+def check_budget(result: dict, budget: dict) -> list[str]:
+    """
+    Comprueba que no se importa al arrancar ningún módulo de lazy_modules.
+
+    Args:
+        result: Resultado de measure()
+        budget: Contenido de import_budget.json
+
+    Returns:
+        list[str]: Incumplimientos (vacía si se cumple)
+    """
+    return [
+        f"{lazy} se importa al arrancar (debe importarse en el startup o en su primer uso)"
+        for lazy in budget.get("lazy_modules", [])
+        if lazy in result["modules"]
+    ]
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Regresiones de tiempo respecto a una medición anterior de la misma máquina.
+
+    Args:
+        result: Resultado de measure()
+        baseline: JSON guardado con --output
+        tolerance: Empeoramiento admitido (0.2 = 20%)
+
+    Returns:
+        list[str]: Regresiones (vacía si no las hay)
+    """
+    regressions = []
+    for metric in ("total_ms", "process_ms"):
+        if result[metric] > baseline[metric] * (1 + tolerance):
+            regressions.append(f"{metric} {baseline[metric]:.0f} -> {result[metric]:.0f} ms")
+    return regressions
+
+
+def render_report(module: str, runs: int, result: dict, budget: dict, top: int) -> str:
+    """Informe en Markdown con la mediana total y los paquetes más caros."""
+    lines = [
+        f"# Tiempo de importación de `{module}`",
+        "",
+        "Generado con `python -m benchmarks.import_time --report benchmarks/import_time.md`.",
+        "Los tiempos son de la máquina indicada y solo sirven para ver el reparto",
+        "entre paquetes; para detectar regresiones usa `--output` y `--baseline`",
+        "en una misma máquina. La lista de módulos diferidos sí es reproducible.",
+        "",
+        f"- Fecha: {datetime.now():%Y-%m-%d}",
+        f"- Python {platform.python_version()} en {platform.system()} {platform.machine()}",
+        f"- Mediana de {runs} intérpretes nuevos, con los .pyc ya generados",
+        f"- Importación (suma de -X importtime): **{result['total_ms']:.0f} ms**",
+        f"- Proceso completo (intérprete + importación): {result['process_ms']:.0f} ms",
+        "",
+        "| Paquete | ms (tiempo propio) | % |",
+        "|---|---:|---:|",
+    ]
+    for name, milliseconds in list(result["packages"].items())[:top]:
+        lines.append(f"| {name} | {milliseconds:.1f} | {100 * milliseconds / result['total_ms']:.1f} |")
+    lines += ["", "Módulos que no deben importarse al arrancar:", ""]
+    for lazy in budget.get("lazy_modules", []):
+        state = "importado al arrancar ❌" if lazy in result["modules"] else "no importado ✅"
+        lines.append(f"- `{lazy}`: {state}")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Módulo a importar")
+    parser.add_argument("--runs", type=int, default=7, help="Intérpretes medidos (se usa la mediana)")
+    parser.add_argument("--top", type=int, default=20, help="Paquetes mostrados")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="Fichero de presupuesto")
+    parser.add_argument("--report", help="Guarda el informe en Markdown en esta ruta")
+    parser.add_argument("--output", help="Guarda la medición en JSON (referencia para --baseline)")
+    parser.add_argument("--baseline", help="Medición anterior de la misma máquina con la que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Empeoramiento admitido frente a la referencia (0.2 = 20%%)")
+    args = parser.parse_args()
+    if args.runs <= 0:
+        parser.error("--runs debe ser mayor que 0")
+
+    with open(args.budget, encoding="utf-8") as budget_file:
+        budget = json.load(budget_file)
+
+    result = measure(args.module, args.runs)
+    report = render_report(args.module, args.runs, result, budget, args.top)
+    print(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            report_file.write(report)
+        print(f"✅ Informe guardado en {args.report}")
+    if args.output:
+        measurement = {
+            "module": args.module, "runs": args.runs, "machine": machine(),
+            "total_ms": result["total_ms"], "process_ms": result["process_ms"], "packages": result["packages"],
+        }
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(measurement, output, indent=2, ensure_ascii=False)
+        print(f"✅ Medición guardada en {args.output}")
+
+    problems = check_budget(result, budget)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Ningún módulo diferido se importa al arrancar")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("machine") != machine() or baseline.get("module") != args.module:
+            print(f"⚠️ {args.baseline} es de otra máquina o de otro módulo: no se comparan los tiempos")
+        else:
+            regressions = compare(result, baseline, args.tolerance)
+            for regression in regressions:
+                print(f"❌ Regresión: {regression}")
+            if not regressions:
+                print(f"✅ Sin regresiones respecto a {args.baseline} (tolerancia {args.tolerance:.0%})")
+            problems += regressions
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+Servidores simulados de los servicios externos para los benchmarks.
+
+Un único servidor HTTP local responde como LocationIQ, Cloudinary y el
+endpoint de certificados de Google, con una latencia fija configurable por
+servicio. Las respuestas son deterministas (dependen solo de la petición),
+así que dos ejecuciones del benchmark hacen exactamente el mismo trabajo.
+
+También firma ID tokens de Google con una clave propia cuyo certificado
+sirve el endpoint simulado, de modo que la verificación real del backend
+(google-auth) funciona sin salir a Internet.
+
+mongomock-motor no emite eventos del driver: count_mongomock_commands()
+anota cada operación como un comando de MongoDB para que los presupuestos
+por ruta (core/request_stats.py) también se comprueben sin mongod.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import rsa
+from google.auth import crypt, jwt
+
+# Rutas que imitan a cada servicio
+LOCATIONIQ_PATH = "/v1/search.php"
+CLOUDINARY_PREFIX = "/v1_1/"
+GOOGLE_CERTS_PATH = "/oauth2/v1/certs"
+# Identificador de la clave con la que se firman los tokens
+KEY_ID = "bench-key"
+# Operaciones de mongomock-motor y el comando de MongoDB al que equivalen
+MONGOMOCK_COMMANDS = {
+    "find": "find",
+    "find_one": "find",
+    "aggregate": "aggregate",
+    "count_documents": "aggregate",
+    "distinct": "distinct",
+    "insert_one": "insert",
+    "insert_many": "insert",
+    "update_one": "update",
+    "update_many": "update",
+    "replace_one": "update",
+    "bulk_write": "bulkWrite",
+    "delete_one": "delete",
+    "delete_many": "delete",
+    "find_one_and_update": "findAndModify",
+    "find_one_and_replace": "findAndModify",
+    "find_one_and_delete": "findAndModify",
+}
+# Zona en la que caen las coordenadas simuladas (península ibérica)
+LATITUDE_RANGE = (36.0, 43.5)
+LONGITUDE_RANGE = (-9.0, 3.0)
+
+
+def _fraction(text: str, salt: str) -> float:
+    """Número en [0, 1) derivado de forma determinista de un texto."""
+    digest = hashlib.sha256(f"{salt}:{text}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def fake_coordinates(query: str) -> tuple[float, float]:
+    """
+    Coordenadas simuladas de una dirección (siempre las mismas para la misma dirección).
+
+    Args:
+        query: Dirección buscada
+
+    Returns:
+        tuple: (latitud, longitud)
+    """
+    latitude = LATITUDE_RANGE[0] + _fraction(query, "lat") * (LATITUDE_RANGE[1] - LATITUDE_RANGE[0])
+    longitude = LONGITUDE_RANGE[0] + _fraction(query, "lon") * (LONGITUDE_RANGE[1] - LONGITUDE_RANGE[0])
+    return round(latitude, 6), round(longitude, 6)
+
+
+@contextmanager
+def count_mongomock_commands():
+    """
+    Anota cada operación de mongomock-motor en la petición actual como un
+    comando de MongoDB (record_mongo_command), como haría el listener del driver.
+
+    Se cuenta en la capa async de mongomock-motor, así que las llamadas
+    internas de mongomock no se cuentan dos veces. Un find cuenta al crear
+    el cursor (un comando, sin getMore).
+
+    Uso:
+        with count_mongomock_commands():
+            ...
+    """
+    from mongomock_motor import AsyncMongoMockCollection
+    from core.request_stats import record_mongo_command
+
+    def counted(method, command: str):
+        if not inspect.iscoroutinefunction(method):
+            # find y aggregate devuelven el cursor sin esperar
+            @functools.wraps(method)
+            def wrapper(self, *args, **kwargs):
+                record_mongo_command(self.name, command, 0.0)
+                return method(self, *args, **kwargs)
+            return wrapper
+
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                record_mongo_command(self.name, command, (time.perf_counter() - start) * 1000)
+        return async_wrapper
+
+    # Los métodos se sobrescriben en la clase y se retiran al salir (vuelven los heredados)
+    for name, command in MONGOMOCK_COMMANDS.items():
+        setattr(AsyncMongoMockCollection, name, counted(getattr(AsyncMongoMockCollection, name), command))
+    try:
+        yield
+    finally:
+        for name in MONGOMOCK_COMMANDS:
+            delattr(AsyncMongoMockCollection, name)
+
+
+class StubUpstreams:
+    """
+    Servidor local con LocationIQ, Cloudinary y los certificados de Google simulados.
+
+    Uso:
+        stubs = StubUpstreams(latency_ms={"locationiq": 50})
+        stubs.start()
+        stubs.redirect_app()
+        token = stubs.issue_token("ana@bench.example.com", "Ana", audience="client-id")
+        ...
+        stubs.stop()
+    """
+
+    def __init__(self, latency_ms: dict[str, float] | None = None, key_bits: int = 2048):
+        """
+        Args:
+            latency_ms: Latencia añadida por servicio (locationiq, cloudinary, google_certs)
+            key_bits: Tamaño de la clave RSA de los tokens
+        """
+        self.latency_ms = dict(latency_ms or {})
+        self.requests = {"locationiq": 0, "cloudinary": 0, "google_certs": 0}
+        public_key, private_key = rsa.newkeys(key_bits)
+        self._certificate = public_key.save_pkcs1().decode()
+        self._signer = crypt.RSASigner.from_string(private_key.save_pkcs1().decode(), key_id=KEY_ID)
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Origen del servidor (http://127.0.0.1:puerto)."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """Arranca el servidor en un hilo (un hilo más por petición en curso)."""
+        stubs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_HEAD(self):
+                self._reply(200, b"")
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == LOCATIONIQ_PATH:
+                    params = parse_qs(url.query)
+                    stubs._serve("locationiq", self, stubs._locationiq(params))
+                elif url.path == GOOGLE_CERTS_PATH:
+                    stubs._serve("google_certs", self, {KEY_ID: stubs._certificate},
+                                 headers={"Cache-Control": "public, max-age=3600"})
+                else:
+                    self._reply(404, b"{}")
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.startswith(CLOUDINARY_PREFIX):
+                    digest = hashlib.sha256(body).hexdigest()[:20]
+                    stubs._serve("cloudinary", self, {
+                        "public_id": f"parcial_iweb_maps/{digest}",
+                        "secure_url": f"https://res.cloudinary.com/bench/image/upload/{digest}.png",
+                    })
+                else:
+                    self._reply(404, b"{}")
+
+            def _reply(self, status: int, body: bytes, headers: dict | None = None):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Sin una línea por petición
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el servidor."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def redirect_app(self) -> None:
+        """
+        Apunta LocationIQ, Cloudinary y los certificados de Google de la
+        aplicación a este servidor. Se llama tras importar la aplicación.
+        """
+        import cloudinary
+        from services import auth, geocoding, images
+
+        geocoding.BASE_URL = self.url + LOCATIONIQ_PATH
+        images._uploader()  # Configuración normal de Cloudinary (la del startup)
+        cloudinary.config(upload_prefix=self.url)
+
+        request = auth._google_request.transport()
+
+        def stub_request(url, method="GET", **kwargs):
+            if url == auth.GOOGLE_CERTS_URL:
+                url = self.url + GOOGLE_CERTS_PATH
+            return request(url, method=method, **kwargs)
+
+        auth._google_request._request = stub_request
+
+    def issue_token(self, email: str, name: str, audience: str, lifetime_seconds: int = 3600) -> str:
+        """
+        Firma un ID token con el formato de Google que el backend acepta.
+
+        Args:
+            email: Email del usuario
+            name: Nombre del usuario
+            audience: GOOGLE_CLIENT_ID del backend
+            lifetime_seconds: Validez del token
+
+        Returns:
+            str: Token JWT
+        """
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": audience,
+            "sub": hashlib.sha256(email.encode()).hexdigest()[:21],
+            "email": email,
+            "name": name,
+            "picture": None,
+            "iat": now,
+            "exp": now + lifetime_seconds,
+        }
+        return jwt.encode(self._signer, payload).decode()
+
+    def _serve(self, service: str, handler, payload, headers: dict | None = None) -> None:
+        """Responde tras la latencia configurada del servicio."""
+        self.requests[service] += 1
+        delay = self.latency_ms.get(service, 0)
+        if delay:
+            time.sleep(delay / 1000)
+        handler._reply(200, json.dumps(payload).encode(), headers)
+
+    @staticmethod
+    def _locationiq(params: dict) -> list[dict]:
+        """Resultados simulados de LocationIQ: uno por cada posición pedida en `limit`."""
+        query = params.get("q", [""])[0]
+        limit = int(params.get("limit", ["1"])[0])
+        results = []
+        for position in range(limit):
+            latitude, longitude = fake_coordinates(f"{query}#{position}" if position else query)
+            results.append({
+                "display_name": f"{query} ({position + 1}), España",
+                "lat": str(latitude),
+                "lon": str(longitude),
+                "type": "house",
+                "class": "place",
+            })
+        return results
@@ -0,0 +1,75 @@
+"""
+Caché en memoria con caducidad (TTL) y tamaño máximo.
+
+Pensada para resultados pequeños y muy consultados dentro de un mismo
+proceso. Al superar el tamaño máximo se descarta la entrada usada
+hace más tiempo (LRU).
+"""
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class TTLCache:
+    """
+    Diccionario acotado en tamaño cuyas entradas caducan tras `ttl_seconds`.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Inicializa la caché.
+
+        Args:
+            max_size: Número máximo de entradas
+            ttl_seconds: Segundos de vida por defecto de cada entrada
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """
+        Devuelve el valor de `key` si existe y no ha caducado.
+
+        Args:
+            key: Clave a buscar
+            default: Valor devuelto si no existe o ha caducado
+
+        Returns:
+            Any: Valor guardado o `default`
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any, ttl_seconds: float | None = None) -> None:
+        """
+        Guarda un valor, descartando la entrada menos usada si la caché está llena.
+
+        Args:
+            key: Clave
+            value: Valor a guardar
+            ttl_seconds: Segundos de vida (por defecto, los de la caché)
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Any) -> None:
+        """Elimina una entrada si existe."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Elimina todas las entradas."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
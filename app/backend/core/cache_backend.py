@@ -0,0 +1,209 @@
+"""
+Backends de caché compartida.
+
+Las cachés en memoria (TTLCache) no se comparten entre workers de uvicorn:
+cada worker repite las mismas geocodificaciones y verificaciones de token.
+Este módulo define una interfaz asíncrona común con dos backends:
+
+- "memory": TTLCache del propio proceso (por defecto, sin dependencias).
+- "redis": cualquier servidor con protocolo Redis. Los valores se guardan
+  en msgpack y las operaciones por lotes van en una sola ida y vuelta
+  (MGET y pipeline). Requiere `redis` y `msgpack` (requirements-optional.txt).
+
+El backend se elige con CACHE_BACKEND. Los valores deben ser tipos básicos
+(dict, list, str, números, bool, None): las tuplas vuelven como listas.
+"""
+from abc import ABC, abstractmethod
+from typing import Any
+from core.cache import TTLCache
+from core.config import settings
+
+
+class CacheBackend(ABC):
+    """
+    Interfaz de los backends de caché.
+
+    Cada backend implementa get_many, set_many y delete; get y set se
+    apoyan en las operaciones por lotes. Todas las claves se guardan bajo
+    un espacio de nombres (`namespace`) para que varias cachés compartan
+    el mismo servidor sin colisiones.
+    """
+
+    async def get(self, namespace: str, key: str) -> Any:
+        """Devuelve el valor guardado o None si no existe o ha caducado."""
+        values = await self.get_many(namespace, [key])
+        return values.get(key)
+
+    async def set(self, namespace: str, key: str, value: Any, ttl_seconds: float) -> None:
+        """Guarda un valor durante `ttl_seconds` segundos."""
+        await self.set_many(namespace, {key: value}, ttl_seconds)
+
+    @abstractmethod
+    async def get_many(self, namespace: str, keys: list[str]) -> dict[str, Any]:
+        """
+        Devuelve los valores de varias claves en una sola operación.
+
+        Returns:
+            dict: Clave -> valor, solo para las claves encontradas
+        """
+
+    @abstractmethod
+    async def set_many(self, namespace: str, values: dict[str, Any], ttl_seconds: float) -> None:
+        """Guarda varios valores con el mismo TTL en una sola operación."""
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: str) -> None:
+        """Elimina una clave si existe."""
+
+    async def close(self) -> None:
+        """Libera las conexiones del backend."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend en memoria del proceso, sobre TTLCache."""
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Args:
+            max_size: Número máximo de entradas (entre todos los espacios de nombres)
+        """
+        self._entries = TTLCache(max_size=max_size, ttl_seconds=60.0)
+
+    async def get_many(self, namespace: str, keys: list[str]) -> dict[str, Any]:
+        values = {}
+        for key in keys:
+            value = self._entries.get((namespace, key))
+            if value is not None:
+                values[key] = value
+        return values
+
+    async def set_many(self, namespace: str, values: dict[str, Any], ttl_seconds: float) -> None:
+        for key, value in values.items():
+            self._entries.set((namespace, key), value, ttl_seconds=ttl_seconds)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        self._entries.delete((namespace, key))
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend sobre un servidor con protocolo Redis y valores en msgpack.
+
+    Admite un cliente ya creado (por ejemplo fakeredis.aioredis.FakeRedis()
+    en pruebas); si no, lo crea a partir de la URL.
+
+    Si el servidor no responde, las lecturas se tratan como fallos de caché
+    y las escrituras se ignoran: la caché nunca tumba una petición.
+    """
+
+    def __init__(self, url: str | None = None, client: Any = None, prefix: str = "reviews-api"):
+        """
+        Args:
+            url: URL del servidor (redis://host:6379/0)
+            client: Cliente redis.asyncio ya creado (tiene prioridad sobre `url`)
+            prefix: Prefijo común de todas las claves
+        """
+        # Dependencias opcionales: solo se importan si se usa este backend
+        import msgpack
+        from redis.exceptions import RedisError
+        self._msgpack = msgpack
+        self._errors = (RedisError, OSError)
+        if client is None:
+            from redis import asyncio as redis
+            client = redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    async def get_many(self, namespace: str, keys: list[str]) -> dict[str, Any]:
+        if not keys:
+            return {}
+        try:
+            raw_values = await self.client.mget([self._key(namespace, key) for key in keys])
+        except self._errors as e:
+            print(f"⚠️ Caché Redis no disponible: {str(e)}")
+            return {}
+        return {
+            key: self._msgpack.unpackb(raw, raw=False)
+            for key, raw in zip(keys, raw_values)
+            if raw is not None
+        }
+
+    async def set_many(self, namespace: str, values: dict[str, Any], ttl_seconds: float) -> None:
+        if not values:
+            return
+        milliseconds = max(1, int(ttl_seconds * 1000))
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.set(self._key(namespace, key), self._msgpack.packb(value, use_bin_type=True), px=milliseconds)
+                await pipe.execute()
+        except self._errors as e:
+            print(f"⚠️ Caché Redis no disponible: {str(e)}")
+
+    async def delete(self, namespace: str, key: str) -> None:
+        try:
+            await self.client.delete(self._key(namespace, key))
+        except self._errors as e:
+            print(f"⚠️ Caché Redis no disponible: {str(e)}")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class CacheHolder:
+    """
+    Contenedor del backend de caché de la aplicación.
+
+    Se crea de forma perezosa en el primer uso y se cierra en el shutdown.
+    """
+    backend: CacheBackend | None = None
+
+    def __init__(self):
+        """Inicializa el contenedor sin backend"""
+        self.backend = None
+
+
+# Instancia global del backend de caché
+cache = CacheHolder()
+
+
+def get_cache_backend() -> CacheBackend:
+    """
+    Retorna el backend de caché configurado (CACHE_BACKEND), creándolo si no existe.
+
+    Returns:
+        CacheBackend: Backend en memoria o Redis
+    """
+    if cache.backend is None:
+        if settings.cache_backend == "redis":
+            cache.backend = RedisCacheBackend(url=settings.redis_url)
+        else:
+            cache.backend = MemoryCacheBackend()
+    return cache.backend
+
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    """
+    Sustituye el backend de caché (por ejemplo por uno sobre fakeredis en pruebas).
+
+    Args:
+        backend: Backend a usar
+    """
+    cache.backend = backend
+
+
+async def close_cache_backend() -> None:
+    """
+    Cierra el backend de caché.
+
+    Se debe llamar en el evento shutdown de FastAPI.
+    """
+    if cache.backend is not None:
+        await cache.backend.close()
+        cache.backend = None
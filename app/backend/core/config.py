@@ -17,22 +17,96 @@ class Settings(BaseSettings):
     mongo_uri: str
     database_name: str
     
+    # Backend de los repositorios: "mongo" o "memory" (en el proceso, para tests y benchmarks)
+    repository_backend: str = "mongo"
+    
+    # Pool de conexiones y compresión de MongoDB
+    # (None = valor de la URI o, si no aparece, el del driver)
+    mongo_max_pool_size: int | None = None
+    mongo_min_pool_size: int | None = None
+    mongo_max_idle_time_ms: int | None = None
+    mongo_wait_queue_timeout_ms: int | None = None
+    mongo_server_selection_timeout_ms: int | None = None
+    mongo_connect_timeout_ms: int | None = None
+    mongo_compressors: str | None = None  # Lista separada por comas: zstd, snappy, zlib
+    
+    # Preferencia de lectura de los listados públicos (p. ej. secondaryPreferred)
+    mongo_public_read_preference: str = "primary"
+    mongo_public_read_max_staleness_seconds: int | None = None
+    
+    # Registro de consultas lentas (None = desactivado) y explains por forma de consulta
+    mongo_slow_query_ms: float | None = None
+    mongo_slow_query_explain_samples: int = 0
+    
     # Servicio (obligatorio)
     service_port: int
     service_name: str
     environment: str
+    
+    # Workers de uvicorn (WEB_CONCURRENCY, el valor por defecto de `uvicorn --workers`)
+    web_concurrency: int = 1
+    
+    # Presupuestos de operaciones por ruta: si se superan, la petición falla (modo test)
+    request_budget_enforce: bool = False
+    
+    # Perfilado bajo demanda (requiere pyinstrument; None = desactivado)
+    profiling_token: str | None = None
+    profiling_dir: str = "/tmp/reviews-profiles"
+    profiling_max_profiles: int = 50
+    
+    # Sondas de salud
+    health_check_timeout_seconds: float = 2.0
 
     # Cloudinary
     cloud_name: str
     cloudinary_api: str
     cloudinary_api_secret: str
 
+    # Caché compartida entre workers ("memory" o "redis")
+    cache_backend: str = "memory"
+    redis_url: str | None = None
+    
     # Google OAuth
     google_client_id: str | None = None
     google_client_secret: str | None = None
+    last_login_coalesce_seconds: int = 300
     
     # LocationIQ (Geocoding)
     locationiq_token: str | None = None
+    geocoding_rate_limit_per_second: float = 2.0
+    geocoding_concurrency: int = 4
+    geocoding_cache_ttl_seconds: int = 86400
+    
+    # Importación masiva de reseñas
+    review_import_chunk_size: int = 500
+    review_import_max_rows: int = 10000
+    review_import_max_bytes: int = 5 * 1024 * 1024
+    
+    # Registro de visitas en diferido (write-behind)
+    visit_buffer_max_size: int = 10000
+    visit_flush_batch_size: int = 500
+    visit_flush_interval_seconds: float = 1.0
+    visit_enqueue_timeout_seconds: float = 0.05
+    
+    # Eventos de visita completos (opcionales, caducan por TTL)
+    visits_store_raw_events: bool = True
+    visits_raw_ttl_days: int = 30
+    visit_stats_cache_ttl_seconds: float = 60.0
+    
+    # Caché de respuestas de reseñas (invalidada por change stream)
+    review_cache_max_entries: int = 1000
+    review_cache_ttl_seconds: float = 300.0
+    review_cache_fallback_ttl_seconds: float = 10.0
+    
+    # Sincronización incremental de reseñas (/changes)
+    review_tombstone_retention_days: int = 30
+    review_changes_settle_seconds: float = 2.0
+    
+    # Feed en vivo de reseñas (SSE)
+    review_stream_queue_size: int = 100
+    review_stream_history_size: int = 1000
+    review_stream_max_subscribers: int = 1000
+    review_stream_heartbeat_seconds: float = 15.0
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -73,6 +147,47 @@ class Settings(BaseSettings):
         if not self.database_name or not self.database_name.strip():
             raise ValueError("❌ DATABASE_NAME no está configurada en .env")
         
+        if self.repository_backend not in ["mongo", "memory"]:
+            raise ValueError("❌ REPOSITORY_BACKEND debe ser: mongo o memory")
+        
+        # Validar pool de conexiones de MongoDB
+        for name in ["mongo_max_pool_size", "mongo_max_idle_time_ms", "mongo_wait_queue_timeout_ms",
+                     "mongo_server_selection_timeout_ms", "mongo_connect_timeout_ms"]:
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f"❌ {name.upper()} debe ser mayor que 0")
+        
+        if self.mongo_min_pool_size is not None and self.mongo_min_pool_size < 0:
+            raise ValueError("❌ MONGO_MIN_POOL_SIZE no puede ser negativo")
+        
+        if (self.mongo_min_pool_size is not None and self.mongo_max_pool_size is not None
+                and self.mongo_min_pool_size > self.mongo_max_pool_size):
+            raise ValueError("❌ MONGO_MIN_POOL_SIZE no puede ser mayor que MONGO_MAX_POOL_SIZE")
+        
+        if self.mongo_compressors:
+            unknown = {c.strip() for c in self.mongo_compressors.split(",")} - {"zstd", "snappy", "zlib"}
+            if unknown:
+                raise ValueError("❌ MONGO_COMPRESSORS solo admite: zstd, snappy, zlib")
+        
+        if self.mongo_public_read_preference not in [
+            "primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"
+        ]:
+            raise ValueError(
+                "❌ MONGO_PUBLIC_READ_PREFERENCE debe ser: primary, primaryPreferred, secondary, secondaryPreferred o nearest"
+            )
+        
+        if self.mongo_public_read_max_staleness_seconds is not None:
+            if self.mongo_public_read_preference == "primary":
+                raise ValueError("❌ MONGO_PUBLIC_READ_MAX_STALENESS_SECONDS no se puede usar con primary")
+            if self.mongo_public_read_max_staleness_seconds < 90:
+                raise ValueError("❌ MONGO_PUBLIC_READ_MAX_STALENESS_SECONDS debe ser al menos 90")
+        
+        if self.mongo_slow_query_ms is not None and self.mongo_slow_query_ms < 0:
+            raise ValueError("❌ MONGO_SLOW_QUERY_MS no puede ser negativo")
+        
+        if self.mongo_slow_query_explain_samples < 0:
+            raise ValueError("❌ MONGO_SLOW_QUERY_EXPLAIN_SAMPLES no puede ser negativo")
+        
         # Validar Servicio
         if self.service_port <= 0 or self.service_port > 65535:
             raise ValueError("❌ SERVICE_PORT debe estar entre 1 y 65535")
@@ -82,6 +197,75 @@ class Settings(BaseSettings):
         
         if self.environment not in ["development", "staging", "production"]:
             raise ValueError("❌ ENVIRONMENT debe ser: development, staging o production")
+        
+        if self.web_concurrency <= 0:
+            raise ValueError("❌ WEB_CONCURRENCY debe ser mayor que 0")
+        
+        # Los repositorios en memoria viven en un solo proceso
+        if self.repository_backend == "memory":
+            if self.environment == "production":
+                raise ValueError("❌ REPOSITORY_BACKEND=memory no se puede usar en production")
+            if self.web_concurrency > 1:
+                raise ValueError("❌ REPOSITORY_BACKEND=memory requiere un solo worker (WEB_CONCURRENCY=1)")
+        
+        if self.profiling_token is not None and len(self.profiling_token) < 16:
+            raise ValueError("❌ PROFILING_TOKEN debe tener al menos 16 caracteres")
+        
+        if self.profiling_max_profiles <= 0:
+            raise ValueError("❌ PROFILING_MAX_PROFILES debe ser mayor que 0")
+        
+        if self.health_check_timeout_seconds <= 0:
+            raise ValueError("❌ HEALTH_CHECK_TIMEOUT_SECONDS debe ser mayor que 0")
+        
+        # Validar caché compartida
+        if self.cache_backend not in ["memory", "redis"]:
+            raise ValueError("❌ CACHE_BACKEND debe ser: memory o redis")
+        
+        if self.cache_backend == "redis" and not self.redis_url:
+            raise ValueError("❌ REDIS_URL es obligatoria con CACHE_BACKEND=redis")
+        
+        # Validar geocodificación
+        if self.geocoding_rate_limit_per_second <= 0 or self.geocoding_concurrency <= 0:
+            raise ValueError("❌ GEOCODING_RATE_LIMIT_PER_SECOND y GEOCODING_CONCURRENCY deben ser mayores que 0")
+        
+        # Validar importación masiva
+        if self.review_import_chunk_size <= 0 or self.review_import_max_rows <= 0:
+            raise ValueError("❌ REVIEW_IMPORT_CHUNK_SIZE y REVIEW_IMPORT_MAX_ROWS deben ser mayores que 0")
+        
+        # Cada bloque es un documento de MongoDB (máximo 16 MB; una fila válida ocupa menos de 1 KB)
+        if self.review_import_chunk_size > 5000:
+            raise ValueError("❌ REVIEW_IMPORT_CHUNK_SIZE no puede ser mayor que 5000")
+        
+        if self.review_import_max_bytes <= 0:
+            raise ValueError("❌ REVIEW_IMPORT_MAX_BYTES debe ser mayor que 0")
+        
+        # Validar buffer de visitas
+        if self.visit_flush_batch_size <= 0 or self.visit_buffer_max_size < self.visit_flush_batch_size:
+            raise ValueError("❌ VISIT_BUFFER_MAX_SIZE debe ser mayor o igual que VISIT_FLUSH_BATCH_SIZE (> 0)")
+        
+        if self.visit_flush_interval_seconds <= 0:
+            raise ValueError("❌ VISIT_FLUSH_INTERVAL_SECONDS debe ser mayor que 0")
+        
+        if self.visits_raw_ttl_days <= 0:
+            raise ValueError("❌ VISITS_RAW_TTL_DAYS debe ser mayor que 0")
+        
+        # Validar caché de reseñas
+        if self.review_cache_max_entries <= 0:
+            raise ValueError("❌ REVIEW_CACHE_MAX_ENTRIES debe ser mayor que 0")
+        
+        if self.review_cache_ttl_seconds <= 0 or self.review_cache_fallback_ttl_seconds <= 0:
+            raise ValueError("❌ REVIEW_CACHE_TTL_SECONDS y REVIEW_CACHE_FALLBACK_TTL_SECONDS deben ser mayores que 0")
+        
+        # Validar sincronización incremental
+        if self.review_tombstone_retention_days <= 0 or self.review_changes_settle_seconds < 0:
+            raise ValueError("❌ REVIEW_TOMBSTONE_RETENTION_DAYS debe ser mayor que 0 y REVIEW_CHANGES_SETTLE_SECONDS no negativo")
+        
+        # Validar feed SSE
+        if self.review_stream_queue_size < 2 or self.review_stream_max_subscribers <= 0:
+            raise ValueError("❌ REVIEW_STREAM_QUEUE_SIZE debe ser al menos 2 y REVIEW_STREAM_MAX_SUBSCRIBERS mayor que 0")
+        
+        if self.review_stream_heartbeat_seconds <= 0:
+            raise ValueError("❌ REVIEW_STREAM_HEARTBEAT_SECONDS debe ser mayor que 0")
 
 # Instancia global de configuración
 settings = Settings()
@@ -0,0 +1,40 @@
+"""
+Cursores opacos para paginación y sincronización.
+
+Un cursor es la posición del último elemento devuelto (por ejemplo su
+fecha y su _id) codificada en JSON + base64 URL-safe, de modo que el
+cliente lo reenvía tal cual sin depender de su formato interno.
+"""
+import base64
+import json
+from fastapi import HTTPException
+
+
+def encode_cursor(position: dict) -> str:
+    """
+    Codifica una posición como cursor opaco.
+
+    Args:
+        position: Valores serializables en JSON (fechas ya en ISO 8601)
+
+    Returns:
+        str: Cursor URL-safe
+    """
+    raw = json.dumps(position)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decodifica un cursor generado por encode_cursor.
+
+    Raises:
+        HTTPException: Si el cursor no es válido (400)
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    if not isinstance(position, dict):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    return position
@@ -2,11 +2,25 @@
 Gestión de conexión a MongoDB Atlas.
 
 Proporciona una conexión reutilizable a la base de datos MongoDB
-usando el driver asíncrono motor.
+usando el driver asíncrono motor. El pool de conexiones, la compresión y
+la preferencia de lectura de los listados públicos se configuran en Settings.
 """
+import asyncio
+import time
 from typing import Any
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 from core.config import settings
+from core.metrics import mongo_command_metrics
+from core.monitoring import SlowQueryMonitor, pool_stats
+
+# Modos de MONGO_PUBLIC_READ_PREFERENCE
+_READ_PREFERENCES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
 
 class Database:
     """
@@ -32,12 +46,112 @@ async def connect_to_mongo():
     Se debe llamar en el evento startup de FastAPI.
     Utiliza el driver motor para operaciones asincrónicas con MongoDB.
     
+    Hace un ping para comprobar la conexión (resolución SRV, TLS y
+    autenticación) y abre minPoolSize conexiones, de modo que la primera
+    petición real no paga ese coste. Con MONGO_SLOW_QUERY_MS registra
+    además los comandos lentos (ver core.monitoring.SlowQueryMonitor).
+    
     Raises:
-        ConnectionFailure: Si no se puede conectar a MongoDB
+        ServerSelectionTimeoutError: Si no se puede conectar a MongoDB
     """
-    db.client = AsyncIOMotorClient(settings.mongo_uri)
+    listeners = [pool_stats, mongo_command_metrics]
+    slow_queries = None
+    if settings.mongo_slow_query_ms is not None:
+        slow_queries = SlowQueryMonitor(settings.mongo_slow_query_ms, settings.mongo_slow_query_explain_samples)
+        listeners.append(slow_queries)
+    db.client = AsyncIOMotorClient(settings.mongo_uri, event_listeners=listeners, **_client_options())
+    if slow_queries is not None:
+        slow_queries.attach(db.client)
     db.db = db.client[settings.database_name]
-    print(f"✅ Conectado a MongoDB: {settings.database_name}")
+    latency = await ping_mongo()
+    print(f"✅ Conectado a MongoDB: {settings.database_name} (ping {latency:.0f} ms)")
+    await _warm_up_pool(db.client)
+    _print_pool_options(db.client)
+    if slow_queries is not None:
+        print(f"✅ Registro de consultas lentas: >= {settings.mongo_slow_query_ms:g} ms, "
+              f"{settings.mongo_slow_query_explain_samples} explain(s) por forma de consulta")
+
+async def ping_mongo(timeout: float | None = None) -> float:
+    """
+    Envía un ping a MongoDB y mide la latencia.
+    
+    Args:
+        timeout: Segundos máximos de espera (None = serverSelectionTimeout del driver)
+        
+    Returns:
+        float: Latencia en milisegundos
+        
+    Raises:
+        asyncio.TimeoutError: Si se supera `timeout`
+        PyMongoError: Si MongoDB no responde
+    """
+    start = time.perf_counter()
+    await asyncio.wait_for(db.client.admin.command("ping"), timeout=timeout)
+    return (time.perf_counter() - start) * 1000
+
+async def _warm_up_pool(client) -> None:
+    """Abre minPoolSize conexiones con pings simultáneos (cada uno ocupa una conexión)."""
+    connections = client.options.pool_options.min_pool_size
+    if connections <= 1:
+        return
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(connections)))
+    print(f"✅ Pool de MongoDB precalentado: {connections} conexiones")
+
+def _client_options() -> dict:
+    """
+    Opciones del cliente definidas en Settings.
+    
+    Solo se pasan las configuradas: el resto se toma de la URI o del driver.
+    """
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "compressors": settings.mongo_compressors,
+    }
+    options = {name: value for name, value in options.items() if value is not None}
+    options["appname"] = settings.service_name
+    return options
+
+def _seconds(value: float | None) -> str:
+    """Formatea un timeout del driver (None = sin límite)."""
+    return "sin límite" if value is None else f"{value}s"
+
+def _print_pool_options(client) -> None:
+    """
+    Muestra la configuración efectiva del pool (Settings + URI + valores del driver).
+    
+    El driver no expone la compresión negociada: se muestra la de MONGO_COMPRESSORS.
+    """
+    pool = client.options.pool_options
+    print(
+        "✅ Pool de MongoDB: "
+        f"maxPoolSize={pool.max_pool_size}, minPoolSize={pool.min_pool_size}, "
+        f"maxIdleTime={_seconds(pool.max_idle_time_seconds)}, waitQueueTimeout={_seconds(pool.wait_queue_timeout)}, "
+        f"connectTimeout={_seconds(pool.connect_timeout)}, "
+        f"serverSelectionTimeout={_seconds(client.options.server_selection_timeout)}, "
+        f"compresión={settings.mongo_compressors or 'ninguna'}, lecturas públicas={public_read_preference().mongos_mode}"
+    )
+
+def public_read_preference():
+    """
+    Preferencia de lectura para los listados públicos (MONGO_PUBLIC_READ_PREFERENCE).
+    
+    Los repositorios la aplican solo a las consultas que toleran leer de un
+    secundario con algo de retraso; el resto sigue leyendo del primario.
+    
+    Returns:
+        Preferencia de lectura de pymongo
+    """
+    mode = _READ_PREFERENCES.get(settings.mongo_public_read_preference)
+    if mode is None:
+        return Primary()
+    if settings.mongo_public_read_max_staleness_seconds is not None:
+        return mode(max_staleness=settings.mongo_public_read_max_staleness_seconds)
+    return mode()
 
 async def close_mongo_connection():
     """
@@ -0,0 +1,72 @@
+"""
+Cliente HTTP compartido para las llamadas a servicios externos.
+
+Reutilizar un único httpx.AsyncClient mantiene abiertas las conexiones
+(keep-alive) en lugar de pagar DNS + TCP + TLS en cada petición.
+"""
+import asyncio
+import httpx
+
+
+class HttpClient:
+    """
+    Contenedor del cliente HTTP de la aplicación.
+
+    Se crea de forma perezosa en el primer uso y se cierra en el shutdown.
+    """
+    client: httpx.AsyncClient | None = None
+
+    def __init__(self):
+        """Inicializa el contenedor sin cliente"""
+        self.client = None
+
+
+# Instancia global del cliente HTTP
+http = HttpClient()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Retorna el cliente HTTP compartido, creándolo si no existe.
+
+    Returns:
+        httpx.AsyncClient: Cliente con pool de conexiones
+    """
+    if http.client is None or http.client.is_closed:
+        http.client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    return http.client
+
+
+async def warm_up_http_client(urls: list[str]) -> None:
+    """
+    Abre por adelantado las conexiones (DNS + TCP + TLS) con los servicios externos.
+    
+    Se llama en el startup. Los errores se ignoran: el servicio externo
+    puede no estar disponible y eso no impide arrancar.
+    
+    Args:
+        urls: URLs de los servicios externos (basta con el origen)
+    """
+    client = get_http_client()
+    
+    async def open_connection(url: str) -> None:
+        try:
+            await client.head(url, timeout=5.0)
+        except httpx.HTTPError as e:
+            print(f"⚠️ No se pudo precalentar la conexión con {url}: {str(e)}")
+    
+    await asyncio.gather(*(open_connection(url) for url in urls))
+
+
+async def close_http_client() -> None:
+    """
+    Cierra el cliente HTTP compartido.
+
+    Se debe llamar en el evento shutdown de FastAPI.
+    """
+    if http.client is not None:
+        await http.client.aclose()
+        http.client = None
@@ -0,0 +1,255 @@
+"""
+Creación de índices de MongoDB.
+
+Centraliza los índices que necesitan las consultas de la aplicación
+para que se creen una sola vez al arrancar el servicio.
+"""
+from datetime import datetime, timezone
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
+from pymongo.errors import OperationFailure
+from core.config import settings
+from core.search import search_fields
+
+# Código de error de MongoDB cuando un índice existe con otras opciones
+INDEX_OPTIONS_CONFLICT = 85
+# Código de error de clave duplicada (índice único sobre datos ya duplicados)
+DUPLICATE_KEY = 11000
+# Colección con una marca por cada migración de datos ya completada
+MIGRATIONS_COLLECTION = "migrations"
+
+
+async def ensure_indexes(database) -> None:
+    """
+    Crea (si no existen) los índices usados por los repositorios.
+
+    create_index es idempotente: si el índice ya existe con la misma
+    definición, MongoDB no hace nada.
+
+    Args:
+        database: Instancia de la base de datos MongoDB
+    """
+    # Reseñas: búsqueda de texto completo.
+    # El índice de texto (v3) ignora mayúsculas y diacríticos, de modo que
+    # "malaga" encuentra "Málaga". El idioma español aplica stemming y stopwords.
+    await database["reviews"].create_index(
+        [("establishment_name", TEXT), ("address", TEXT)],
+        name="reviews_text_search",
+        weights={"establishment_name": 10, "address": 5},
+        default_language="spanish",
+        language_override="search_language",
+    )
+
+    # Reseñas: sincronización incremental por (updated_at, _id)
+    await _backfill_review_updated_at(database)
+    await database["reviews"].create_index(
+        [("updated_at", ASCENDING), ("_id", ASCENDING)],
+        name="reviews_changes",
+    )
+    # Las marcas de borrado caducan a los REVIEW_TOMBSTONE_RETENTION_DAYS días
+    # (el TTL ignora los documentos con deleted_at nulo)
+    await _ensure_ttl_index(
+        database["reviews"], "deleted_at", "reviews_tombstones_ttl",
+        settings.review_tombstone_retention_days * 24 * 3600
+    )
+
+    # Examples: búsqueda por prefijo (rango) y por subcadena (trigramas)
+    await database["examples"].create_index(
+        [("name_search", ASCENDING)],
+        name="examples_name_search",
+    )
+    await database["examples"].create_index(
+        [("name_ngrams", ASCENDING)],
+        name="examples_name_ngrams",
+    )
+    await _run_once(database, "example_search_fields", _backfill_example_search_fields)
+
+    # Visitas agregadas por (visitante, visitado, día)
+    await database["visit_rollups"].create_index(
+        [("visited_email", ASCENDING), ("visitor_email", ASCENDING), ("day", ASCENDING)],
+        name="visit_rollups_key",
+        unique=True,
+    )
+    # Estadísticas por rango de días (visited_email, day)
+    await database["visit_rollups"].create_index(
+        [("visited_email", ASCENDING), ("day", DESCENDING), ("_id", DESCENDING)],
+        name="visit_rollups_history",
+    )
+    # Historial paginado por cursor (visited_email, last_seen, _id)
+    await database["visit_rollups"].create_index(
+        [("visited_email", ASCENDING), ("last_seen", DESCENDING), ("_id", DESCENDING)],
+        name="visit_rollups_recent",
+    )
+    await _run_once(database, "visit_rollups", _backfill_visit_rollups)
+
+    # Eventos de visita completos: caducan a los VISITS_RAW_TTL_DAYS días
+    await _ensure_ttl_index(
+        database["visits"], "timestamp", "visits_ttl", settings.visits_raw_ttl_days * 24 * 3600
+    )
+
+    # Importaciones de reseñas: un documento por bloque de filas o de errores de cada trabajo
+    await database["review_import_chunks"].create_index(
+        [("job_id", ASCENDING), ("kind", ASCENDING), ("seq", ASCENDING)],
+        name="review_import_chunks_key",
+        unique=True,
+    )
+
+    # Usuarios: un único documento por email (upsert atómico en el login)
+    try:
+        await database["users"].create_index([("email", ASCENDING)], name="users_email_unique", unique=True)
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY:
+            raise
+        print("⚠️ Hay usuarios con el email duplicado: no se pudo crear el índice único users_email_unique")
+
+    print("✅ Índices de MongoDB verificados")
+
+
+async def _run_once(database, name: str, migration) -> None:
+    """
+    Ejecuta una migración de datos si no consta como completada.
+
+    La marca se guarda en "migrations" solo cuando la migración termina, así
+    que una migración interrumpida se repite en el siguiente arranque. Las
+    migraciones deben ser idempotentes: varios workers pueden arrancar a la vez.
+
+    Args:
+        database: Instancia de la base de datos MongoDB
+        name: Identificador de la migración (_id de la marca)
+        migration: Función async que recibe la base de datos
+    """
+    migrations = database[MIGRATIONS_COLLECTION]
+    if await migrations.find_one({"_id": name}, {"_id": 1}):
+        return
+    await migration(database)
+    await migrations.update_one(
+        {"_id": name},
+        {"$setOnInsert": {"completed_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
+async def _backfill_review_updated_at(database) -> None:
+    """
+    Rellena updated_at (con created_at) en las reseñas anteriores a este campo.
+
+    Args:
+        database: Instancia de la base de datos MongoDB
+    """
+    result = await database["reviews"].update_many(
+        {"updated_at": {"$exists": False}},
+        [{"$set": {"updated_at": {"$ifNull": ["$created_at", "$$NOW"]}}}]
+    )
+    if result.modified_count:
+        print(f"✅ updated_at rellenado en {result.modified_count} reseñas")
+
+
+async def _ensure_ttl_index(collection, field: str, name: str, expire_after_seconds: int) -> None:
+    """
+    Crea un índice TTL o actualiza su caducidad si ya existía con otro valor.
+
+    Args:
+        collection: Colección de MongoDB
+        field: Campo de fecha que determina la caducidad
+        name: Nombre del índice
+        expire_after_seconds: Segundos hasta que el documento caduca
+    """
+    try:
+        await collection.create_index([(field, ASCENDING)], name=name, expireAfterSeconds=expire_after_seconds)
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        await collection.database.command({
+            "collMod": collection.name,
+            "index": {"name": name, "expireAfterSeconds": expire_after_seconds},
+        })
+
+
+async def _backfill_visit_rollups(database) -> None:
+    """
+    Genera los contadores agregados a partir de las visitas guardadas antes
+    de existir "visit_rollups". Se ejecuta hasta completarse una vez
+    (_run_once) y antes de crear el índice TTL para no perder el histórico.
+    Si las visitas nuevas ya escribieron un agregado para la misma clave, se
+    suman solo las visitas anteriores a su first_seen, de modo que repetir
+    el backfill no cuenta dos veces.
+
+    Args:
+        database: Instancia de la base de datos MongoDB
+    """
+    if not await database["visits"].find_one({}, {"_id": 1}):
+        return
+
+    await database["visits"].aggregate([
+        {"$set": {"day": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}}}},
+        # Solo las visitas anteriores al agregado ya escrito para esa clave:
+        # las posteriores ya están contadas y una re-ejecución no duplica
+        {"$lookup": {
+            "from": "visit_rollups",
+            "let": {"visitor": "$visitor_email", "visited": "$visited_email", "day": "$day"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$visited_email", "$$visited"]},
+                    {"$eq": ["$visitor_email", "$$visitor"]},
+                    {"$eq": ["$day", "$$day"]},
+                ]}}},
+                {"$project": {"_id": 0, "first_seen": 1}},
+            ],
+            "as": "rollup",
+        }},
+        {"$match": {"$expr": {"$or": [
+            {"$eq": [{"$size": "$rollup"}, 0]},
+            {"$lt": ["$timestamp", {"$arrayElemAt": ["$rollup.first_seen", 0]}]},
+        ]}}},
+        {"$group": {
+            "_id": {
+                "visitor_email": "$visitor_email",
+                "visited_email": "$visited_email",
+                "day": "$day",
+            },
+            "count": {"$sum": 1},
+            "first_seen": {"$min": "$timestamp"},
+            "last_seen": {"$max": "$timestamp"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "visitor_email": "$_id.visitor_email",
+            "visited_email": "$_id.visited_email",
+            "day": "$_id.day",
+            "count": 1,
+            "first_seen": 1,
+            "last_seen": 1,
+        }},
+        {"$merge": {
+            "into": "visit_rollups",
+            "on": ["visited_email", "visitor_email", "day"],
+            # Suma el histórico al agregado escrito por las visitas nuevas
+            "whenMatched": [{"$set": {
+                "count": {"$add": ["$count", "$$new.count"]},
+                "first_seen": {"$min": ["$first_seen", "$$new.first_seen"]},
+                "last_seen": {"$max": ["$last_seen", "$$new.last_seen"]},
+            }}],
+            "whenNotMatched": "insert",
+        }},
+    ]).to_list(length=None)
+    print("✅ Visitas históricas agregadas en visit_rollups")
+
+
+async def _backfill_example_search_fields(database, batch_size: int = 1000) -> None:
+    """
+    Rellena name_search/name_ngrams en examples creados antes de existir
+    estos campos. Se ejecuta una sola vez (_run_once): los examples nuevos
+    ya se guardan con ambos campos.
+
+    Args:
+        database: Instancia de la base de datos MongoDB
+        batch_size: Número de actualizaciones por bulk_write
+    """
+    cursor = database["examples"].find({"name_search": None}, {"name": 1})
+    pending = []
+    async for example in cursor:
+        pending.append(UpdateOne({"_id": example["_id"]}, {"$set": search_fields(example.get("name", ""))}))
+        if len(pending) >= batch_size:
+            await database["examples"].bulk_write(pending, ordered=False)
+            pending = []
+    if pending:
+        await database["examples"].bulk_write(pending, ordered=False)
@@ -0,0 +1,180 @@
+"""
+Métricas Prometheus de la aplicación.
+
+- Peticiones HTTP: histograma de latencia y peticiones en curso por ruta.
+  La etiqueta "route" es la plantilla de la ruta ("/v1/reviews/{review_id}"),
+  nunca la URL real, para que el número de series no crezca con los IDs.
+- MongoDB: duración de cada comando por colección y operación
+  (CommandListener registrado en connect_to_mongo).
+- Servicios externos: duración de las llamadas a LocationIQ, Cloudinary y
+  los certificados de Google por código de estado.
+
+Con varios workers, definir PROMETHEUS_MULTIPROC_DIR (directorio vacío
+compartido) para que /metrics agregue los datos de todos los procesos.
+"""
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from pymongo import monitoring
+from starlette.routing import Match
+from core.request_stats import record_mongo_command, record_upstream_call
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duración de las peticiones HTTP",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Peticiones HTTP en curso",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds",
+    "Duración de los comandos de MongoDB",
+    ["collection", "command", "outcome"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Duración de las llamadas a servicios externos",
+    ["service", "status"],
+)
+UPSTREAM_CACHE_HITS = Counter(
+    "upstream_cache_hits_total",
+    "Llamadas a servicios externos evitadas por caché",
+    ["service"],
+)
+
+# Etiqueta de las peticiones que no corresponden a ninguna ruta (404)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Serializa las métricas en el formato de texto de Prometheus.
+
+    Returns:
+        tuple: (cuerpo, content-type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+@contextmanager
+def upstream_timer(service: str):
+    """
+    Mide una llamada a un servicio externo.
+
+    Uso:
+        with upstream_timer("locationiq") as upstream:
+            response = await client.get(...)
+            upstream["status"] = response.status_code
+
+    Si no se asigna "status" (excepción de red) se registra como "error".
+    La llamada se anota también en las operaciones de la petición actual.
+
+    Args:
+        service: Nombre del servicio (locationiq, cloudinary, google_certs)
+    """
+    upstream = {"status": "error"}
+    start = time.perf_counter()
+    try:
+        yield upstream
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_REQUEST_DURATION.labels(service, str(upstream["status"])).observe(elapsed)
+        record_upstream_call(service, elapsed * 1000)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI (sin BaseHTTPMiddleware, para no romper el streaming SSE)
+    que mide la latencia y las peticiones en curso por plantilla de ruta.
+    """
+
+    def __init__(self, app, routes):
+        """
+        Args:
+            app: Aplicación ASGI siguiente
+            routes: Rutas de la aplicación (app.router.routes) para resolver la plantilla
+        """
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            HTTP_REQUEST_DURATION.labels(method, route, str(status["code"])).observe(time.perf_counter() - start)
+
+    def _route_template(self, scope) -> str:
+        """Plantilla de la ruta que atenderá la petición (o UNMATCHED_ROUTE)."""
+        partial = None
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path  # Ruta correcta con otro método (405)
+        return partial or UNMATCHED_ROUTE
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Registra la duración de cada comando de MongoDB por colección y operación
+    (y lo anota en las operaciones de la petición actual).
+
+    La colección solo aparece en el evento "started", así que se guarda
+    hasta que llega el evento de fin del mismo comando.
+    """
+
+    def __init__(self):
+        """Inicializa el registro de comandos en curso."""
+        self._collections = {}
+
+    def started(self, event):
+        value = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            value = event.command.get("collection")
+        collection = value if isinstance(value, str) else event.database_name
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        self._observe(event, "succeeded")
+
+    def failed(self, event):
+        self._observe(event, "failed")
+
+    def _observe(self, event, outcome: str) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), event.database_name)
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name, outcome).observe(event.duration_micros / 1_000_000)
+        record_mongo_command(collection, event.command_name, event.duration_micros / 1000)
+
+
+# Instancia global del listener de comandos
+mongo_command_metrics = MongoCommandMetrics()
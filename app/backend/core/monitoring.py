@@ -0,0 +1,264 @@
+"""
+Monitorización del driver de MongoDB.
+
+Listeners de pymongo que se registran al crear el cliente en
+connect_to_mongo: estadísticas del pool (endpoints de salud) y registro
+de consultas lentas (opcional, MONGO_SLOW_QUERY_MS).
+"""
+import asyncio
+import json
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Estadísticas del pool de conexiones por servidor.
+
+    Los eventos llegan desde los hilos del driver; solo se hacen sumas
+    sobre enteros, así que no hace falta bloqueo.
+    """
+
+    def __init__(self):
+        """Inicializa sin servidores: cada pool se registra en pool_created."""
+        self._servers: dict[tuple[str, int], dict[str, int]] = {}
+
+    def snapshot(self) -> dict:
+        """
+        Copia de las estadísticas actuales.
+
+        Returns:
+            dict: "host:puerto" -> contadores del pool de ese servidor
+        """
+        return {f"{host}:{port}": dict(stats) for (host, port), stats in list(self._servers.items())}
+
+    def _add(self, address, counter: str, amount: int = 1) -> None:
+        """
+        Suma `amount` a un contador del pool de `address`.
+
+        Los eventos de un pool ya cerrado (p. ej. conexiones que se cierran
+        tras pool_closed) se ignoran en lugar de crear un pool con contadores negativos.
+        """
+        stats = self._servers.get(address)
+        if stats is not None:
+            stats[counter] += amount
+
+    def pool_created(self, event):
+        self._servers[event.address] = {
+            "open": 0,
+            "in_use": 0,
+            "created": 0,
+            "closed": 0,
+            "checkout_failures": 0,
+            "cleared": 0,
+        }
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(event.address, "cleared")
+
+    def pool_closed(self, event):
+        self._servers.pop(event.address, None)
+
+    def connection_created(self, event):
+        self._add(event.address, "created")
+        self._add(event.address, "open")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(event.address, "closed")
+        self._add(event.address, "open", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add(event.address, "checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._add(event.address, "in_use")
+
+    def connection_checked_in(self, event):
+        self._add(event.address, "in_use", -1)
+
+
+# Instancia global de las estadísticas del pool
+pool_stats = PoolStats()
+
+
+# Comandos que admiten explain
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Campos que añade el driver y no forman parte de la consulta
+_DRIVER_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction"}
+
+
+def redact(value):
+    """
+    Forma de un filtro o pipeline sin valores: conserva campos y operadores
+    y sustituye los valores por "?". Las listas de valores ($in) quedan en ["?"].
+
+    Args:
+        value: Filtro, pipeline o valor
+
+    Returns:
+        Estructura con la misma forma y sin datos
+    """
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            return [redact(item) for item in value]
+        return ["?"]
+    return "?"
+
+
+def _query_shape(command_name: str, command: dict) -> dict:
+    """Partes de un comando que determinan el plan de ejecución, sin valores."""
+    shape = {}
+    for field in ("filter", "query", "q", "pipeline"):
+        if field in command:
+            shape[field] = redact(command[field])
+    for field in ("updates", "deletes"):
+        if command.get(field):
+            shape["q"] = redact(command[field][0].get("q", {}))
+    if "sort" in command:
+        shape["sort"] = dict(command["sort"])  # Solo campos y dirección
+    return shape
+
+
+def _returned_docs(command_name: str, reply: dict) -> int | None:
+    """Número de documentos devueltos (o afectados) según la respuesta del comando."""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        return len(batch) if batch is not None else None
+    if "n" in reply:
+        return reply["n"]
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") is not None else 0
+    return None
+
+
+def _find_key(document, key: str):
+    """Busca recursivamente la primera aparición de `key` en un documento de explain."""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        values = document.values()
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+    for value in values:
+        found = _find_key(value, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _plan_stages(plan: dict | None) -> list[str]:
+    """Etapas del plan ganador de arriba abajo (p. ej. ["LIMIT", "FETCH", "IXSCAN"])."""
+    stages = []
+    while isinstance(plan, dict):
+        stages.append(plan.get("stage", "?"))
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+class SlowQueryMonitor(monitoring.CommandListener):
+    """
+    Registra los comandos que superan MONGO_SLOW_QUERY_MS.
+
+    Para cada uno muestra la colección, la operación, la duración, los
+    documentos devueltos y la forma de la consulta (sin valores). Con
+    MONGO_SLOW_QUERY_EXPLAIN_SAMPLES > 0, lanza además explain("executionStats")
+    las primeras N veces que aparece cada forma y resume el plan (etapas,
+    claves y documentos examinados), lo que delata los COLLSCAN.
+    """
+
+    def __init__(self, threshold_ms: float, explain_samples: int = 0):
+        """
+        Args:
+            threshold_ms: Duración a partir de la cual un comando es lento
+            explain_samples: Explains por forma de consulta (0 = desactivado)
+        """
+        self.threshold_ms = threshold_ms
+        self.explain_samples = explain_samples
+        self._client = None
+        self._loop = None
+        self._started = {}
+        self._explained = {}
+
+    def attach(self, client) -> None:
+        """
+        Asocia el cliente Motor con el que se lanzan los explain.
+        Se llama desde connect_to_mongo, dentro del event loop.
+        """
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        value = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            value = event.command.get("collection")
+        collection = value if isinstance(value, str) else None
+        self._started[(event.connection_id, event.request_id)] = (
+            collection, _query_shape(event.command_name, event.command), event.command
+        )
+
+    def succeeded(self, event):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is not None and event.duration_micros / 1000 >= self.threshold_ms:
+            self._report(event, started, _returned_docs(event.command_name, event.reply))
+
+    def failed(self, event):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is not None and event.duration_micros / 1000 >= self.threshold_ms:
+            self._report(event, started, None)
+
+    def _report(self, event, started: tuple, docs: int | None) -> None:
+        """Muestra el comando lento y, si procede, programa su explain."""
+        collection, shape, command = started
+        shape_json = json.dumps(shape, default=str, sort_keys=True)
+        print(
+            f"⚠️ Consulta lenta ({event.duration_micros / 1000:.0f} ms): "
+            f"{event.database_name}.{collection} {event.command_name} "
+            f"docs={'?' if docs is None else docs} forma={shape_json}"
+        )
+
+        if self.explain_samples <= 0 or event.command_name not in _EXPLAINABLE or self._client is None:
+            return
+        key = (collection, event.command_name, shape_json)
+        if self._explained.get(key, 0) >= self.explain_samples:
+            return
+        self._explained[key] = self._explained.get(key, 0) + 1
+        query = {name: value for name, value in command.items() if not name.startswith("$") and name not in _DRIVER_FIELDS}
+        # Los eventos llegan desde los hilos del driver: el explain se lanza en el event loop
+        asyncio.run_coroutine_threadsafe(
+            self._explain(event.database_name, collection, event.command_name, query), self._loop
+        )
+
+    async def _explain(self, database_name: str, collection: str, command_name: str, query: dict) -> None:
+        """Ejecuta explain("executionStats") y muestra el resumen del plan."""
+        try:
+            explain = await self._client[database_name].command(
+                {"explain": query, "verbosity": "executionStats"}
+            )
+        except PyMongoError as e:
+            print(f"⚠️ No se pudo obtener el explain de {collection}.{command_name}: {str(e)}")
+            return
+        stats = _find_key(explain, "executionStats") or {}
+        stages = _plan_stages(_find_key(explain, "winningPlan"))
+        print(
+            f"⚠️ Explain {collection}.{command_name}: plan={' <- '.join(stages) or '?'} "
+            f"claves_examinadas={stats.get('totalKeysExamined', '?')} "
+            f"docs_examinados={stats.get('totalDocsExamined', '?')} "
+            f"devueltos={stats.get('nReturned', '?')} "
+            f"tiempo={stats.get('executionTimeMillis', '?')} ms"
+        )
@@ -0,0 +1,153 @@
+"""
+Perfilado bajo demanda de peticiones concretas.
+
+Con PROFILING_TOKEN configurado, una petición que incluya la cabecera
+"X-Profile: <token>" (o el parámetro ?profile=<token>) se ejecuta bajo
+pyinstrument (dependencia opcional, requirements-optional.txt). El perfil
+se guarda en PROFILING_DIR y su ID se devuelve en la cabecera X-Profile-Id:
+
+    GET /debug/profiles/{id}                      -> HTML interactivo
+    GET /debug/profiles/{id}?format=speedscope    -> JSON para speedscope.app
+
+La consulta exige el mismo token (cabecera o parámetro). Sin
+PROFILING_TOKEN no se instala el middleware ni la ruta: coste cero.
+Las peticiones sin la cabecera solo pagan la comprobación del token.
+"""
+import asyncio
+import hmac
+import os
+import re
+import uuid
+from urllib.parse import parse_qs
+from fastapi import HTTPException
+from fastapi.responses import Response
+from starlette.datastructures import MutableHeaders
+
+# Ruta de consulta de perfiles (no se perfila a sí misma)
+PROFILES_PATH = "/debug/profiles"
+# Formato de los IDs de perfil (uuid4 en hexadecimal)
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def is_authorized(token: str, provided: str | None) -> bool:
+    """
+    Compara el token recibido con PROFILING_TOKEN en tiempo constante.
+
+    Args:
+        token: Token configurado
+        provided: Token recibido (cabecera o query)
+
+    Returns:
+        bool: True si coinciden
+    """
+    return provided is not None and hmac.compare_digest(token.encode(), provided.encode())
+
+
+def provided_token(scope) -> str | None:
+    """
+    Token de la cabecera X-Profile o, si no está, del parámetro ?profile.
+
+    Args:
+        scope: Scope ASGI de la petición
+
+    Returns:
+        str | None: Token recibido
+    """
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.decode("latin-1")
+    if b"profile=" in scope["query_string"]:
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+        return values[0] if values else None
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que perfila las peticiones autorizadas con pyinstrument.
+
+    El profiler se usa en modo asíncrono: solo muestrea el contexto de la
+    petición perfilada, no las demás peticiones que comparten el event loop.
+    """
+
+    def __init__(self, app, token: str, directory: str, max_profiles: int):
+        """
+        Args:
+            app: Aplicación ASGI siguiente
+            token: Token que autoriza a perfilar (PROFILING_TOKEN)
+            directory: Directorio donde se guardan los perfiles
+            max_profiles: Perfiles que se conservan (se borran los más antiguos)
+
+        Raises:
+            ImportError: Si pyinstrument no está instalado
+        """
+        from pyinstrument import Profiler
+
+        self.app = app
+        self.token = token
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._profiler_class = Profiler
+        os.makedirs(directory, exist_ok=True)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["path"].startswith(PROFILES_PATH)
+                or not is_authorized(self.token, provided_token(scope))):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        profiler = self._profiler_class(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            session = profiler.stop()
+            await asyncio.to_thread(self._save, profile_id, session)
+            print(f"✅ Perfil {profile_id}: {scope['method']} {scope['path']} ({session.duration * 1000:.0f} ms)")
+
+    def _save(self, profile_id: str, session) -> None:
+        """Guarda la sesión y borra los perfiles más antiguos por encima del máximo."""
+        session.save(os.path.join(self.directory, f"{profile_id}.json"))
+        files = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in files[:-self.max_profiles]:
+            os.remove(entry.path)
+
+
+def render_profile(directory: str, profile_id: str, output_format: str = "html") -> Response:
+    """
+    Devuelve un perfil guardado en HTML o en JSON de speedscope.
+
+    Args:
+        directory: Directorio de perfiles (PROFILING_DIR)
+        profile_id: ID devuelto en la cabecera X-Profile-Id
+        output_format: "html" o "speedscope"
+
+    Returns:
+        Response: Perfil renderizado
+
+    Raises:
+        HTTPException: 400 si el formato no es válido, 404 si el perfil no existe
+    """
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+    from pyinstrument.session import Session
+
+    renderers = {"html": (HTMLRenderer, "text/html"), "speedscope": (SpeedscopeRenderer, "application/json")}
+    if output_format not in renderers:
+        raise HTTPException(status_code=400, detail="Formato no válido: html o speedscope")
+
+    path = os.path.join(directory, f"{profile_id}.json")
+    if not _PROFILE_ID.match(profile_id) or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+
+    renderer, media_type = renderers[output_format]
+    return Response(content=renderer().render(Session.load(path)), media_type=media_type)
@@ -0,0 +1,191 @@
+"""
+Contabilidad de operaciones por petición.
+
+Cuenta los comandos de MongoDB y las llamadas a servicios externos que
+hace cada petición, y el tiempo que pasa en cada uno. Los datos se guardan
+en un ContextVar: Motor copia el contexto al ejecutar cada operación en su
+pool de hilos, así que los listeners del driver ven la petición que lanzó
+el comando.
+
+- En desarrollo se devuelven en la cabecera Server-Timing (visible en la
+  pestaña de red del navegador).
+- Las rutas pueden declarar un presupuesto con operation_budget(). Si una
+  petición lo supera se avisa por consola y, con REQUEST_BUDGET_ENFORCE
+  (modo test), la petición falla con BudgetExceededError. Así un N+1 nuevo
+  rompe los tests en lugar de aparecer en las gráficas de latencia.
+
+Sin el middleware (producción sin REQUEST_BUDGET_ENFORCE) no se cuenta nada.
+"""
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from fastapi import Depends
+from starlette.datastructures import MutableHeaders
+
+_current: ContextVar["RequestStats | None"] = ContextVar("request_stats", default=None)
+
+
+class BudgetExceededError(RuntimeError):
+    """Una petición ha hecho más operaciones de las declaradas en su presupuesto."""
+
+
+class RequestStats:
+    """
+    Operaciones de una petición.
+
+    Los comandos de MongoDB se anotan desde los hilos del driver (varios a
+    la vez si la petición usa asyncio.gather), de ahí el bloqueo.
+    """
+
+    def __init__(self):
+        """Inicializa los contadores a cero y sin presupuesto."""
+        self.mongo_ops = 0
+        self.mongo_ms = 0.0
+        self.upstream_calls = 0
+        self.upstream_ms = 0.0
+        self.commands: Counter[str] = Counter()
+        self.budget: tuple[int | None, int | None] | None = None
+        self._lock = threading.Lock()
+
+    def add_mongo(self, collection: str, command: str, duration_ms: float) -> None:
+        """Anota un comando de MongoDB."""
+        with self._lock:
+            self.mongo_ops += 1
+            self.mongo_ms += duration_ms
+            self.commands[f"{collection}.{command}"] += 1
+
+    def add_upstream(self, service: str, duration_ms: float) -> None:
+        """Anota una llamada a un servicio externo."""
+        with self._lock:
+            self.upstream_calls += 1
+            self.upstream_ms += duration_ms
+            self.commands[service] += 1
+
+    def exceeded(self) -> list[str]:
+        """
+        Límites del presupuesto superados.
+
+        Returns:
+            list: Descripción de cada límite superado (vacía si se cumple o no hay presupuesto)
+        """
+        if self.budget is None:
+            return []
+        mongo, upstream = self.budget
+        problems = []
+        if mongo is not None and self.mongo_ops > mongo:
+            problems.append(f"{self.mongo_ops} operaciones de MongoDB (máximo {mongo})")
+        if upstream is not None and self.upstream_calls > upstream:
+            problems.append(f"{self.upstream_calls} llamadas externas (máximo {upstream})")
+        return problems
+
+    def server_timing(self, total_ms: float) -> str:
+        """Valor de la cabecera Server-Timing."""
+        return (
+            f'mongo;dur={self.mongo_ms:.1f};desc="{self.mongo_ops} ops", '
+            f'upstream;dur={self.upstream_ms:.1f};desc="{self.upstream_calls} llamadas", '
+            f"total;dur={total_ms:.1f}"
+        )
+
+
+def record_mongo_command(collection: str, command: str, duration_ms: float) -> None:
+    """
+    Anota un comando de MongoDB en la petición actual (si se está contando).
+
+    Args:
+        collection: Colección del comando
+        command: Nombre del comando (find, update...)
+        duration_ms: Duración en milisegundos
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.add_mongo(collection, command, duration_ms)
+
+
+def record_upstream_call(service: str, duration_ms: float) -> None:
+    """
+    Anota una llamada a un servicio externo en la petición actual (si se está contando).
+
+    Args:
+        service: Nombre del servicio (locationiq, cloudinary, google_certs)
+        duration_ms: Duración en milisegundos
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.add_upstream(service, duration_ms)
+
+
+def operation_budget(mongo: int | None = None, upstream: int | None = None):
+    """
+    Declara el presupuesto de operaciones de una ruta.
+
+    Uso:
+        @router.get("/{review_id}", dependencies=[operation_budget(mongo=2)])
+
+    Args:
+        mongo: Máximo de comandos de MongoDB (None = sin límite)
+        upstream: Máximo de llamadas a servicios externos, incluida la
+            verificación del token (None = sin límite)
+
+    Returns:
+        Dependencia de FastAPI
+    """
+    async def declare_budget():
+        stats = _current.get()
+        if stats is not None:
+            stats.budget = (mongo, upstream)
+    return Depends(declare_budget)
+
+
+class RequestStatsMiddleware:
+    """
+    Middleware ASGI que cuenta las operaciones de cada petición, añade la
+    cabecera Server-Timing y comprueba el presupuesto de la ruta.
+
+    La comprobación se hace al empezar la respuesta: en ese momento el
+    endpoint ya ha terminado (salvo en respuestas en streaming).
+    """
+
+    def __init__(self, app, server_timing: bool = False, enforce_budgets: bool = False):
+        """
+        Args:
+            app: Aplicación ASGI siguiente
+            server_timing: Añadir la cabecera Server-Timing
+            enforce_budgets: Lanzar BudgetExceededError si se supera el presupuesto
+        """
+        self.app = app
+        self.server_timing = server_timing
+        self.enforce_budgets = enforce_budgets
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                self._check_budget(scope, stats)
+                if self.server_timing:
+                    total_ms = (time.perf_counter() - start) * 1000
+                    MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(total_ms))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+
+    def _check_budget(self, scope, stats: RequestStats) -> None:
+        """Avisa (o falla en modo test) si la petición ha superado su presupuesto."""
+        problems = stats.exceeded()
+        if not problems:
+            return
+        detail = ", ".join(f"{name} x{count}" for name, count in stats.commands.most_common())
+        message = f"{scope['method']} {scope['path']} supera su presupuesto: {'; '.join(problems)} [{detail}]"
+        if self.enforce_budgets:
+            raise BudgetExceededError(message)
+        print(f"⚠️ {message}")
@@ -0,0 +1,76 @@
+"""
+Utilidades de normalización para búsquedas indexadas.
+
+Los campos de búsqueda se guardan normalizados (minúsculas y sin acentos)
+para poder consultarlos con rangos sobre un índice normal, sin expresiones
+regulares y sin interpretar la entrada del usuario como patrón.
+"""
+import unicodedata
+
+NGRAM_SIZE = 3
+
+# Mayor code point válido: cualquier cadena que empiece por el prefijo
+# es menor que prefijo + MAX_CHAR en la comparación binaria de MongoDB.
+_MAX_CHAR = "\U0010ffff"
+
+
+def normalize_text(value: str) -> str:
+    """
+    Normaliza un texto para búsqueda: sin acentos, en minúsculas y con
+    los espacios colapsados.
+
+    Args:
+        value: Texto original
+
+    Returns:
+        str: Texto normalizado ("Málaga  Centro" -> "malaga centro")
+    """
+    decomposed = unicodedata.normalize("NFKD", value)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.casefold().split())
+
+
+def ngrams(value: str, size: int = NGRAM_SIZE) -> list[str]:
+    """
+    Calcula los n-gramas (sin repetir) de un texto ya normalizado.
+
+    Args:
+        value: Texto normalizado
+        size: Longitud de cada n-grama
+
+    Returns:
+        list[str]: N-gramas en orden de aparición
+    """
+    if len(value) < size:
+        return []
+    return list(dict.fromkeys(value[i:i + size] for i in range(len(value) - size + 1)))
+
+
+def prefix_range(prefix: str) -> dict:
+    """
+    Construye un filtro de rango equivalente a "empieza por prefix".
+
+    A diferencia de un $regex, el rango usa directamente los límites del
+    índice y el prefijo se trata siempre como texto literal.
+
+    Args:
+        prefix: Prefijo ya normalizado
+
+    Returns:
+        dict: Filtro {"$gte": ..., "$lt": ...}
+    """
+    return {"$gte": prefix, "$lt": prefix + _MAX_CHAR}
+
+
+def search_fields(name: str) -> dict:
+    """
+    Calcula los campos de búsqueda derivados de un nombre.
+
+    Args:
+        name: Nombre original
+
+    Returns:
+        dict: Campos name_search y name_ngrams listos para guardar
+    """
+    normalized = normalize_text(name)
+    return {"name_search": normalized, "name_ngrams": ngrams(normalized)}
@@ -0,0 +1,126 @@
+"""
+Contadores de versión y ETags para GET condicionales.
+
+Cada escritura incrementa el contador de las colecciones/usuarios afectados
+(colección "versions", un documento por clave). Las lecturas calculan el
+ETag a partir del contador, sin leer ni serializar los documentos, y
+responden 304 si el cliente ya tiene esa versión.
+
+Sin base de datos (REPOSITORY_BACKEND=memory) los contadores se guardan
+en el propio proceso.
+"""
+import hashlib
+from fastapi import Request, Response
+from pymongo import UpdateOne
+
+VERSIONS_COLLECTION = "versions"
+# Contadores del modo sin MongoDB (db=None)
+_local_versions: dict[str, int] = {}
+
+
+def reviews_key() -> str:
+    """Clave de versión de todas las reseñas (listado y detalle)."""
+    return "reviews"
+
+
+def user_reviews_key(user_email: str) -> str:
+    """Clave de versión de las reseñas de un usuario."""
+    return f"reviews:user:{user_email}"
+
+
+def user_markers_key(user_email: str) -> str:
+    """Clave de versión de los marcadores de un usuario."""
+    return f"markers:user:{user_email}"
+
+
+async def bump_versions(db, *keys: str) -> None:
+    """
+    Incrementa los contadores de versión indicados (los crea si no existen).
+
+    Se llama después de cada escritura, de modo que una lectura que vea la
+    versión nueva ve también los datos nuevos.
+
+    Args:
+        db: Instancia de la base de datos MongoDB (None = contadores del proceso)
+        *keys: Claves de versión afectadas por la escritura
+    """
+    if db is None:
+        for key in keys:
+            _local_versions[key] = _local_versions.get(key, 0) + 1
+        return
+    await db[VERSIONS_COLLECTION].bulk_write(
+        [UpdateOne({"_id": key}, {"$inc": {"v": 1}}, upsert=True) for key in keys],
+        ordered=False
+    )
+
+
+async def get_etag(db, key: str) -> str:
+    """
+    Calcula el ETag (fuerte) de un recurso a partir de su contador de versión.
+
+    La clave se resume con un hash para no exponer emails en la cabecera.
+
+    Args:
+        db: Instancia de la base de datos MongoDB (None = contadores del proceso)
+        key: Clave de versión del recurso
+
+    Returns:
+        str: ETag entre comillas, por ejemplo "\"3f2a9c1b-42\""
+    """
+    if db is None:
+        version = _local_versions.get(key, 0)
+    else:
+        document = await db[VERSIONS_COLLECTION].find_one({"_id": key})
+        version = document["v"] if document else 0
+    scope = hashlib.sha1(key.encode()).hexdigest()[:8]
+    return f'"{scope}-{version}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Indica si la cabecera If-None-Match del cliente coincide con el ETag.
+
+    Args:
+        request: Request entrante
+        etag: ETag actual del recurso
+
+    Returns:
+        bool: True si se puede responder 304
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Respuesta 304 sin cuerpo para un recurso que el cliente ya tiene.
+
+    Args:
+        etag: ETag actual del recurso
+
+    Returns:
+        Response: Respuesta 304 con las cabeceras de caché
+    """
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def cache_headers(etag: str) -> dict:
+    """
+    Cabeceras de caché para respuestas con ETag.
+
+    "no-cache" obliga al navegador a revalidar siempre, pero le permite
+    reutilizar su copia cuando el servidor responde 304.
+
+    Args:
+        etag: ETag actual del recurso
+
+    Returns:
+        dict: Cabeceras ETag, Cache-Control y Vary
+    """
+    return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Authorization"}
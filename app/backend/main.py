@@ -2,25 +2,68 @@
 Aplicación principal - API REST con FastAPI
 Puerto: 8000
 """
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from pymongo.errors import PyMongoError
 from fastapi.middleware.cors import CORSMiddleware
 from api.v1.router import api_router
 from core.config import settings
-from core.database import connect_to_mongo, close_mongo_connection
+from core.database import connect_to_mongo, close_mongo_connection, get_database, ping_mongo
+from core.http import close_http_client, warm_up_http_client
+from core.metrics import MetricsMiddleware, render_metrics
+from core.monitoring import pool_stats
+from core.request_stats import RequestStatsMiddleware
+from core.profiling import PROFILES_PATH, ProfilingMiddleware, is_authorized, provided_token, render_profile
+from services import geocoding
+from services.auth import preload_google_certs
+from services.images import preload_uploader
+from core.cache_backend import close_cache_backend
+from core.indexes import ensure_indexes
+from repositories.factory import uses_memory_backend
+from services.visit_service import visit_buffer
+from services.review_cache import review_cache
+from services.review_changes import review_changes
+from services.review_stream import review_hub
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Gestor del ciclo de vida de la aplicación.
     
-    Startup: Conecta a MongoDB
-    Shutdown: Desconecta de MongoDB
+    Startup: Conecta a MongoDB (ping + pool precalentado), crea los índices,
+             arranca el buffer de visitas y el change stream de reseñas (caché de
+             respuestas y feed SSE), importa google-auth y Cloudinary en hilos
+             aparte, precarga los certificados de Google y abre las conexiones
+             HTTP salientes. Con REPOSITORY_BACKEND=memory no se
+             conecta a MongoDB y los eventos de reseñas los publica el repositorio
+    Shutdown: Guarda las visitas pendientes, cierra los clientes SSE y el change
+              stream, cierra el cliente HTTP y la caché compartida y desconecta de MongoDB
     """
     # Startup
-    await connect_to_mongo()
+    if uses_memory_backend():
+        # Repositorios en memoria: sin MongoDB ni change stream
+        print("✅ Repositorios en memoria (REPOSITORY_BACKEND=memory)")
+        await visit_buffer.start()
+        review_changes.start_local(listeners=[review_cache, review_hub])
+    else:
+        await connect_to_mongo()
+        await ensure_indexes(get_database())
+        await visit_buffer.start()
+        await review_changes.start(get_database(), listeners=[review_cache, review_hub])
+    await asyncio.gather(
+        preload_google_certs(),
+        preload_uploader(),
+        warm_up_http_client([geocoding.BASE_URL])
+    )
     yield
     # Shutdown
+    await visit_buffer.stop()
+    review_hub.close()
+    await review_changes.stop()
+    await close_http_client()
+    await close_cache_backend()
     await close_mongo_connection()
 
 app = FastAPI(
@@ -45,6 +88,42 @@ app.add_middleware(
 # Incluir routers de la API
 app.include_router(api_router, prefix="/v1")
 
+# Métricas por plantilla de ruta (recibe la lista de rutas de la app,
+# que incluye también las que se declaran más abajo)
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
+# Operaciones por petición: cabecera Server-Timing en desarrollo y
+# presupuestos por ruta (avisos en desarrollo, errores con REQUEST_BUDGET_ENFORCE)
+if settings.environment == "development" or settings.request_budget_enforce:
+    app.add_middleware(
+        RequestStatsMiddleware,
+        server_timing=settings.environment == "development",
+        enforce_budgets=settings.request_budget_enforce
+    )
+
+# Perfilado bajo demanda (solo con PROFILING_TOKEN)
+if settings.profiling_token:
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=settings.profiling_token,
+        directory=settings.profiling_dir,
+        max_profiles=settings.profiling_max_profiles
+    )
+
+    @app.get(PROFILES_PATH + "/{profile_id}", include_in_schema=False)
+    async def get_profile(profile_id: str, request: Request, format: str = "html"):
+        """
+        Perfil de una petición (ID de la cabecera X-Profile-Id) en HTML o JSON de speedscope.
+        
+        Requiere el token de perfilado en la cabecera X-Profile o en ?profile.
+        
+        Returns:
+            Response: Perfil renderizado
+        """
+        if not is_authorized(settings.profiling_token, provided_token(request.scope)):
+            return JSONResponse(status_code=404, content={"detail": "Not Found"})
+        return await asyncio.to_thread(render_profile, settings.profiling_dir, profile_id, format)
+
 @app.get("/")
 async def root():
     """
@@ -74,3 +153,65 @@ async def health_check():
         "port": settings.service_port
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas en formato Prometheus (latencias HTTP, MongoDB y servicios externos).
+    
+    Returns:
+        Response: Métricas en formato de texto de Prometheus
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/health/live")
+async def liveness_check():
+    """
+    Sonda de vida: el proceso responde.
+    
+    No consulta dependencias, para que un fallo de MongoDB no provoque
+    reinicios del contenedor.
+    
+    Returns:
+        dict: Estado del proceso
+    """
+    return {"status": "alive", "service": settings.service_name}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Sonda de disponibilidad: el servicio puede atender peticiones.
+    
+    Hace un ping a MongoDB (con HEALTH_CHECK_TIMEOUT_SECONDS de límite) y
+    devuelve su latencia, las estadísticas del pool de conexiones y el
+    estado de los componentes en segundo plano.
+    
+    Returns:
+        JSONResponse: 200 si MongoDB responde (o no se usa), 503 si no
+    """
+    if uses_memory_backend():
+        mongo = {"status": "disabled"}
+    else:
+        try:
+            latency = await ping_mongo(timeout=settings.health_check_timeout_seconds)
+            mongo = {"status": "up", "latency_ms": round(latency, 1)}
+        except (PyMongoError, asyncio.TimeoutError) as e:
+            # Solo el tipo de error: el mensaje del driver incluye la topología
+            mongo = {"status": "down", "error": type(e).__name__}
+    
+    ready = mongo["status"] in ("up", "disabled")
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "service": settings.service_name,
+            "checks": {
+                "mongo": mongo,
+                "change_stream": {"status": "up" if review_changes.watching else "down"},
+                "visit_buffer": {"pending": visit_buffer.pending, "dropped": visit_buffer.dropped},
+                "review_stream": {"subscribers": review_hub.subscribers, "evicted": review_hub.evicted},
+            },
+            "mongo_pool": pool_stats.snapshot(),
+        }
+    )
+
@@ -42,4 +42,5 @@ class Review(BaseModel):
     
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Fecha de creación")
+    updated_at: datetime = Field(default_factory=datetime.utcnow, description="Fecha de la última modificación")
     token_expires_at: datetime = Field(default_factory=datetime.utcnow, description="Caducidad del token")
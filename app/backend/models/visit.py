@@ -25,3 +25,30 @@ class Visit(BaseModel):
     visited_email: str  # A quién visitan
     visitor_token: str  # Token OAuth del visitante (Requisito examen)
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class VisitSummary(BaseModel):
+    """
+    Visitas agregadas de un visitante a un usuario durante un día (UTC).
+    """
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_schema_extra={
+            "example": {
+                "visitor_email": "visitante@gmail.com",
+                "visited_email": "anfitrion@gmail.com",
+                "day": "2024-03-20T00:00:00",
+                "count": 3,
+                "first_seen": "2024-03-20T10:00:00",
+                "last_seen": "2024-03-20T18:30:00"
+            }
+        }
+    )
+
+    id: str | None = Field(default=None, alias="_id")
+    visitor_email: str  # Quién visita
+    visited_email: str  # A quién visitan
+    day: datetime  # Día de las visitas (00:00 UTC)
+    count: int  # Número de visitas ese día
+    first_seen: datetime
+    last_seen: datetime
@@ -4,8 +4,12 @@ Repository para operaciones de base de datos con Examples.
 Implementa el patrón Repository para encapsular la lógica de acceso a datos.
 Plantilla genérica para adaptar según las entidades del examen.
 """
+import re
 from datetime import datetime
 from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from core.search import NGRAM_SIZE, normalize_text, ngrams, prefix_range, search_fields
 from models.example import ExampleModel
 
 class ExampleRepository:
@@ -36,6 +40,7 @@ class ExampleRepository:
         """
         example_data["created_at"] = datetime.utcnow()
         example_data["updated_at"] = datetime.utcnow()
+        example_data.update(search_fields(example_data["name"]))
         
         result = await self.collection.insert_one(example_data)
         example_data["_id"] = result.inserted_id
@@ -96,11 +101,13 @@ class ExampleRepository:
             return await self.find_by_id(example_id)
         
         update_data["updated_at"] = datetime.utcnow()
+        if "name" in update_data:
+            update_data.update(search_fields(update_data["name"]))
         
         result = await self.collection.find_one_and_update(
             {"_id": ObjectId(example_id)},
             {"$set": update_data},
-            return_document=True
+            return_document=ReturnDocument.AFTER
         )
         
         if result:
@@ -123,24 +130,139 @@ class ExampleRepository:
         result = await self.collection.delete_one({"_id": ObjectId(example_id)})
         return result.deleted_count > 0
     
+    async def bulk_write(self, creates: list[dict], updates: list[tuple[str, dict]], deletes: list[str]) -> list[dict]:
+        """
+        Crea, actualiza y elimina varios examples en un único bulk_write sin orden.
+        
+        Antes de escribir, una sola lectura (`_id: {$in: ...}`) indica qué
+        examples referenciados existen: los que no, se informan como
+        "not_found" sin enviarlos. Los errores de cada operación se asignan a
+        su elemento por el índice de writeErrors. El estado "not_found" es
+        aproximado: un example borrado por otro cliente entre la lectura y
+        la escritura se informa como "updated"/"deleted".
+        
+        Args:
+            creates: Datos de los examples a crear
+            updates: Pares (ID, campos a actualizar)
+            deletes: IDs de los examples a eliminar
+            
+        Returns:
+            list[dict]: Un resultado por operación (operation, index, id, status, error)
+        """
+        now = datetime.utcnow()
+        referenced = [
+            ObjectId(example_id)
+            for example_id in [example_id for example_id, _ in updates] + deletes
+            if ObjectId.is_valid(example_id)
+        ]
+        existing = set()
+        if referenced:
+            cursor = self.collection.find({"_id": {"$in": referenced}}, {"_id": 1})
+            existing = {document["_id"] async for document in cursor}
+        
+        results = []
+        operations = []  # (operación de pymongo, resultado del elemento)
+        for index, example_data in enumerate(creates):
+            example_id = ObjectId()
+            document = {**example_data, "_id": example_id, "created_at": now, "updated_at": now}
+            document.update(search_fields(document["name"]))
+            result = {"operation": "create", "index": index, "id": str(example_id), "status": "created"}
+            results.append(result)
+            operations.append((InsertOne(document), result))
+        
+        for index, (example_id, update_data) in enumerate(updates):
+            result = self._reference_result("update", index, example_id, existing, "updated")
+            results.append(result)
+            if result["status"] != "updated":
+                continue
+            update_data = {k: v for k, v in update_data.items() if v is not None}
+            update_data["updated_at"] = now
+            if "name" in update_data:
+                update_data.update(search_fields(update_data["name"]))
+            operations.append((UpdateOne({"_id": ObjectId(example_id)}, {"$set": update_data}), result))
+        
+        for index, example_id in enumerate(deletes):
+            result = self._reference_result("delete", index, example_id, existing, "deleted")
+            results.append(result)
+            if result["status"] == "deleted":
+                operations.append((DeleteOne({"_id": ObjectId(example_id)}), result))
+        
+        if operations:
+            await self._write_all(operations)
+        return results
+    
+    async def _write_all(self, operations: list[tuple]) -> None:
+        """
+        Envía las operaciones en un único bulk_write sin orden y marca las fallidas.
+        
+        Args:
+            operations: Pares (operación de pymongo, resultado del elemento)
+        """
+        try:
+            await self.collection.bulk_write([operation for operation, _ in operations], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                result = operations[write_error["index"]][1]
+                result["status"] = "error"
+                result["error"] = write_error.get("errmsg", "Error de escritura")
+        except PyMongoError as e:
+            # Sin detalle por operación: no se sabe cuáles se aplicaron
+            for _, result in operations:
+                result["status"] = "error"
+                result["error"] = str(e)
+    
+    @staticmethod
+    def _reference_result(operation: str, index: int, example_id: str, existing: set, ok_status: str) -> dict:
+        """
+        Resultado de una operación sobre un example existente.
+        
+        Args:
+            operation: "update" o "delete"
+            index: Posición en su lista de la petición
+            example_id: ID recibido
+            existing: IDs que existían al leer
+            ok_status: Estado si el example existe
+        
+        Returns:
+            dict: Resultado con status ok_status, "not_found" o "invalid_id"
+        """
+        if not ObjectId.is_valid(example_id):
+            status = "invalid_id"
+        else:
+            status = ok_status if ObjectId(example_id) in existing else "not_found"
+        return {"operation": operation, "index": index, "id": example_id, "status": status}
+    
     # BÚSQUEDA PARAMETRIZADA 1: Por nombre
-    async def find_by_name(self, name: str) -> list[ExampleModel]:
+    async def find_by_name(self, name: str, substring: bool = False, limit: int = 100) -> list[ExampleModel]:
         """
-        Busca examples por nombre (búsqueda parcial).
+        Busca examples por nombre sin distinguir mayúsculas ni acentos.
+        
+        Por defecto busca por prefijo con un rango sobre el índice de
+        "name_search". Con substring=True busca el texto en cualquier posición:
+        el índice de trigramas "name_ngrams" acota los candidatos y un $regex
+        con el término escapado descarta los falsos positivos en el servidor,
+        de modo que el límite se aplica en MongoDB. La entrada nunca se
+        interpreta como regex.
         
         Args:
             name: Nombre a buscar
+            substring: Si True, busca coincidencias en cualquier posición
+            limit: Número máximo de resultados
             
         Returns:
-            list[ExampleModel]: Examples que coinciden
+            list[ExampleModel]: Examples que coinciden, ordenados por nombre
         """
-        examples = []
-        cursor = self.collection.find({
-            "name": {"$regex": name, "$options": "i"}
-        })
+        term = normalize_text(name)
+        if not term:
+            return []
         
-        async for example_data in cursor:
-            examples.append(ExampleModel(**example_data))
+        grams = ngrams(term)
+        if not substring or len(term) < NGRAM_SIZE:
+            # Los términos más cortos que un trigrama solo se pueden buscar por prefijo
+            query = {"name_search": prefix_range(term)}
+            cursor = self.collection.find(query).sort("name_search", 1).limit(limit)
+            return [ExampleModel(**example_data) async for example_data in cursor]
         
-        return examples
-
+        query = {"name_ngrams": {"$all": grams}, "name_search": {"$regex": re.escape(term)}}
+        cursor = self.collection.find(query).sort("name_search", 1).limit(limit)
+        return [ExampleModel(**example_data) async for example_data in cursor]
@@ -0,0 +1,113 @@
+"""
+Selección del backend de los repositorios (REPOSITORY_BACKEND).
+
+- "mongo": un repositorio de MongoDB por petición sobre la conexión global
+  (por defecto).
+- "memory": repositorios en memoria compartidos por todo el proceso
+  (repositories/memory.py). No necesita MongoDB: pensado para tests y
+  benchmarks en un solo worker.
+
+Uso:
+    repo = review_repository(db)   # db = Depends(get_database)
+"""
+from core.config import settings
+from repositories.example_repository import ExampleRepository
+from repositories.marker_repository import MarkerRepository
+from repositories.memory import (
+    MemoryExampleRepository, MemoryMarkerRepository, MemoryReviewRepository,
+    MemoryUserRepository, MemoryVisitRepository
+)
+from repositories.protocols import (
+    ExampleRepositoryProtocol, MarkerRepositoryProtocol, ReviewRepositoryProtocol,
+    UserRepositoryProtocol, VisitRepositoryProtocol
+)
+from repositories.review_repository import ReviewRepository
+from repositories.user_repository import UserRepository
+from repositories.visit_repository import VisitRepository
+from services.review_changes import review_changes
+
+
+class MemoryRepositories:
+    """Instancias de los repositorios en memoria (una por entidad y proceso)."""
+
+    def __init__(self):
+        """Crea los repositorios vacíos. Las escrituras de reseñas se publican en review_changes."""
+        self.reviews = MemoryReviewRepository(on_change=review_changes.publish)
+        self.examples = MemoryExampleRepository()
+        self.markers = MemoryMarkerRepository()
+        self.visits = MemoryVisitRepository()
+        self.users = MemoryUserRepository()
+
+
+# Instancia global de los repositorios en memoria (solo se usa con REPOSITORY_BACKEND=memory)
+memory_repositories = MemoryRepositories()
+
+
+def uses_memory_backend() -> bool:
+    """Indica si los repositorios trabajan en memoria (sin MongoDB)."""
+    return settings.repository_backend == "memory"
+
+
+def review_repository(db) -> ReviewRepositoryProtocol:
+    """
+    Repositorio de reseñas del backend configurado.
+
+    Args:
+        db: Instancia de la base de datos MongoDB (se ignora en memoria)
+
+    Returns:
+        ReviewRepositoryProtocol: Repositorio de reseñas
+    """
+    return memory_repositories.reviews if uses_memory_backend() else ReviewRepository(db)
+
+
+def example_repository(db) -> ExampleRepositoryProtocol:
+    """
+    Repositorio de examples del backend configurado.
+
+    Args:
+        db: Instancia de la base de datos MongoDB (se ignora en memoria)
+
+    Returns:
+        ExampleRepositoryProtocol: Repositorio de examples
+    """
+    return memory_repositories.examples if uses_memory_backend() else ExampleRepository(db)
+
+
+def marker_repository(db) -> MarkerRepositoryProtocol:
+    """
+    Repositorio de marcadores del backend configurado.
+
+    Args:
+        db: Instancia de la base de datos MongoDB (se ignora en memoria)
+
+    Returns:
+        MarkerRepositoryProtocol: Repositorio de marcadores
+    """
+    return memory_repositories.markers if uses_memory_backend() else MarkerRepository(db)
+
+
+def visit_repository(db) -> VisitRepositoryProtocol:
+    """
+    Repositorio de visitas del backend configurado.
+
+    Args:
+        db: Instancia de la base de datos MongoDB (se ignora en memoria)
+
+    Returns:
+        VisitRepositoryProtocol: Repositorio de visitas
+    """
+    return memory_repositories.visits if uses_memory_backend() else VisitRepository(db)
+
+
+def user_repository(db) -> UserRepositoryProtocol:
+    """
+    Repositorio de usuarios del backend configurado.
+
+    Args:
+        db: Instancia de la base de datos MongoDB (se ignora en memoria)
+
+    Returns:
+        UserRepositoryProtocol: Repositorio de usuarios
+    """
+    return memory_repositories.users if uses_memory_backend() else UserRepository(db)
@@ -0,0 +1,55 @@
+"""
+Repositorio de Marcadores.
+Maneja las operaciones de base de datos de los marcadores del mapa.
+"""
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from core.versions import bump_versions, user_markers_key
+from models.marker import Marker
+
+
+class MarkerRepository:
+    """
+    Repositorio de marcadores en MongoDB (colección "markers").
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        """
+        Inicializa el repositorio con la conexión a la base de datos.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+        """
+        self.collection = db["markers"]
+
+    async def find_by_user(self, user_email: str) -> list[Marker]:
+        """
+        Obtiene los marcadores de un usuario.
+
+        Args:
+            user_email: Email del dueño del mapa
+
+        Returns:
+            list[Marker]: Marcadores del usuario (máximo 1000)
+        """
+        cursor = self.collection.find({"user_email": user_email}).limit(1000)
+        markers = await cursor.to_list(length=1000)
+
+        # Convert ObjectId to string
+        for marker in markers:
+            marker["_id"] = str(marker["_id"])
+        return [Marker(**marker) for marker in markers]
+
+    async def create(self, marker: Marker) -> Marker:
+        """
+        Guarda un marcador e incrementa la versión (ETag) de los marcadores del usuario.
+
+        Args:
+            marker: Marcador a insertar
+
+        Returns:
+            Marker: El marcador con su ID asignado
+        """
+        result = await self.collection.insert_one(marker.model_dump(by_alias=True, exclude={"id"}))
+        marker.id = str(result.inserted_id)
+        await bump_versions(self.collection.database, user_markers_key(marker.user_email))
+        return marker
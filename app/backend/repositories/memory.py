@@ -0,0 +1,487 @@
+"""
+Repositorios en memoria (REPOSITORY_BACKEND=memory).
+
+Implementan las mismas interfaces que los de MongoDB (repositories/protocols.py)
+con los datos en el propio proceso. Cada consulta usa un índice propio
+(diccionarios por clave y listas ordenadas con bisect) en lugar de recorrer
+todos los documentos, así que los tests y benchmarks van a velocidad de
+proceso sin perder el coste relativo de cada operación.
+
+Diferencias con MongoDB:
+- Los datos no se comparten entre workers ni sobreviven a un reinicio: por
+  eso core/config.py rechaza este backend en production y con más de un
+  worker (WEB_CONCURRENCY).
+- No hay índices TTL: las marcas de borrado y los eventos de visita no caducan.
+- La búsqueda de texto pondera establecimiento (10) y dirección (5) como el
+  índice "reviews_text_search", descarta las stopwords en español y reduce
+  cada palabra a su raíz con el stemmer Snowball español, el mismo algoritmo
+  que usa MongoDB. Requiere `snowballstemmer` (requirements-optional.txt);
+  sin él se busca por palabras completas. Las puntuaciones no coinciden
+  exactamente con textScore, pero sí el orden por peso de los campos.
+
+Todas las escrituras se aplican sin ceder el event loop (no hay await entre
+leer y escribir), así que son atómicas igual que las de MongoDB.
+"""
+import bisect
+import re
+from datetime import datetime, timedelta
+from functools import cache
+from typing import Callable
+from bson import ObjectId
+from core.search import NGRAM_SIZE, normalize_text, ngrams, search_fields
+from core.versions import bump_versions, reviews_key, user_markers_key, user_reviews_key
+from models.example import ExampleModel
+from models.marker import Marker
+from models.review import Review
+from repositories.visit_repository import group_visits
+
+# Palabras de la búsqueda de texto (sobre el texto ya normalizado)
+_WORD = re.compile(r"\w+")
+# Pesos de la búsqueda de texto (los del índice "reviews_text_search")
+_TEXT_WEIGHTS = {"establishment_name": 10, "address": 5}
+# Stopwords en español (sin acentos, como el texto normalizado) que la búsqueda ignora
+_STOPWORDS = frozenset("""
+    a al algo algun alguna algunas alguno algunos ante antes como con contra cual cuando de del desde donde
+    durante e el ella ellas ellos en entre era eran es esa esas ese eso esos esta estaba estado estan estar
+    estas este esto estos fue fueron ha habia han hasta hay la las le les lo los mas me mi mis mucho muchos
+    muy nada ni no nos nosotros o os otra otras otro otros para pero poco por porque que quien quienes se
+    ser si sin sobre son su sus tambien tanto te ti tiene tienen todo todos tu tus un una uno unos y ya yo
+""".split())
+
+
+@cache
+def _stemmer():
+    """Stemmer Snowball español, o None si `snowballstemmer` no está instalado."""
+    try:
+        import snowballstemmer
+    except ImportError:
+        print("⚠️ snowballstemmer no está instalado: la búsqueda en memoria no reduce las palabras a su raíz")
+        return None
+    return snowballstemmer.stemmer("spanish")
+
+
+def _object_id(value: str) -> ObjectId | None:
+    """ObjectId de un ID en texto, o None si no es válido."""
+    return ObjectId(value) if ObjectId.is_valid(value) else None
+
+
+def _matches(document: dict, conditions: dict | None) -> bool:
+    """Indica si el documento cumple las condiciones de igualdad."""
+    return all(document.get(field) == value for field, value in (conditions or {}).items())
+
+
+def _words(text: str) -> set[str]:
+    """
+    Términos de búsqueda de un texto.
+
+    Palabras normalizadas (sin acentos ni mayúsculas), sin stopwords y
+    reducidas a su raíz si hay stemmer.
+    """
+    words = [word for word in _WORD.findall(normalize_text(text)) if word not in _STOPWORDS]
+    stemmer = _stemmer()
+    return set(stemmer.stemWords(words) if stemmer is not None else words)
+
+
+class MemoryReviewRepository:
+    """
+    Reseñas en memoria.
+
+    Índices: por ID, por autor, por (updated_at, _id) para /changes y un
+    índice invertido de palabras para la búsqueda. Cada escritura se publica
+    con el formato del change stream (`on_change`), así que la caché de
+    respuestas y el feed SSE se invalidan igual que con MongoDB.
+    """
+
+    def __init__(self, on_change: Callable[[dict], None] | None = None):
+        """
+        Args:
+            on_change: Función que recibe cada evento de cambio
+        """
+        self._on_change = on_change
+        self._documents: dict[ObjectId, dict] = {}
+        self._by_user: dict[str, dict[ObjectId, None]] = {}
+        self._changes: list[tuple[datetime, ObjectId]] = []
+        self._words: dict[str, set[ObjectId]] = {}
+        self._events = 0
+
+    def _active(self, review_id: str) -> dict | None:
+        """Documento activo (no borrado) de un ID, o None."""
+        document = self._documents.get(_object_id(review_id))
+        if document is None or document.get("deleted_at") is not None:
+            return None
+        return document
+
+    @staticmethod
+    def _to_review(document: dict) -> Review:
+        """Convierte un documento en Review (con el ID en texto)."""
+        return Review(**{**document, "_id": str(document["_id"])})
+
+    def _index_words(self, document: dict, add: bool) -> None:
+        """Añade o quita el documento del índice de palabras."""
+        for field in _TEXT_WEIGHTS:
+            for word in _words(document.get(field, "")):
+                if add:
+                    self._words.setdefault(word, set()).add(document["_id"])
+                else:
+                    self._words.get(word, set()).discard(document["_id"])
+
+    def _write(self, document: dict, changes: dict, operation: str) -> None:
+        """Aplica `changes` a un documento, actualiza los índices y publica el evento."""
+        if operation == "update":
+            self._changes.pop(bisect.bisect_left(self._changes, (document["updated_at"], document["_id"])))
+            self._index_words(document, add=False)
+        document.update(changes)
+        bisect.insort(self._changes, (document["updated_at"], document["_id"]))
+        self._index_words(document, add=True)
+
+        self._events += 1
+        if self._on_change is not None:
+            self._on_change({
+                "_id": {"_data": f"{self._events:016x}"},
+                "operationType": operation,
+                "documentKey": {"_id": document["_id"]},
+                "fullDocument": dict(document),
+            })
+
+    async def create(self, review: Review) -> Review:
+        document = {"_id": ObjectId()}
+        self._documents[document["_id"]] = document
+        self._by_user.setdefault(review.user_email, {})[document["_id"]] = None
+        self._write(document, review.model_dump(by_alias=True, exclude={"id"}), "insert")
+        review.id = str(document["_id"])
+        await bump_versions(None, reviews_key(), user_reviews_key(review.user_email))
+        return review
+
+    async def get_all(self) -> list[Review]:
+        reviews = []
+        for document in self._documents.values():
+            if document.get("deleted_at") is None:
+                reviews.append(self._to_review(document))
+                if len(reviews) == 1000:
+                    break
+        return reviews
+
+    async def get_by_id(self, review_id: str) -> Review | None:
+        document = self._active(review_id)
+        return self._to_review(document) if document else None
+
+    async def get_many(self, review_ids: list[ObjectId]) -> dict[str, Review]:
+        found = {}
+        for review_id in review_ids:
+            document = self._active(str(review_id))
+            if document:
+                found[str(review_id)] = self._to_review(document)
+        return found
+
+    async def get_by_user(self, user_email: str) -> list[Review]:
+        reviews = []
+        for review_id in self._by_user.get(user_email, {}):
+            document = self._documents[review_id]
+            if document.get("deleted_at") is None:
+                reviews.append(self._to_review(document))
+                if len(reviews) == 1000:
+                    break
+        return reviews
+
+    async def search(self, query: str, skip: int = 0, limit: int = 20) -> list[Review]:
+        terms = _words(query)
+        candidates = set().union(*(self._words.get(term, set()) for term in terms))
+        scored = []
+        for review_id in candidates:
+            document = self._documents[review_id]
+            if document.get("deleted_at") is not None:
+                continue
+            score = sum(
+                weight * len(terms & _words(document.get(field, "")))
+                for field, weight in _TEXT_WEIGHTS.items()
+            )
+            scored.append((-score, review_id))
+        scored.sort()
+        return [self._to_review(self._documents[review_id]) for _, review_id in scored[skip:skip + limit]]
+
+    async def update(self, review_id: str, update_data: dict) -> Review | None:
+        document = self._active(review_id)
+        if document is None:
+            return None
+        self._write(document, {**update_data, "updated_at": datetime.utcnow()}, "update")
+        await bump_versions(None, reviews_key(), user_reviews_key(document["user_email"]))
+        return self._to_review(document)
+
+    async def delete(self, review_id: str) -> bool:
+        document = self._active(review_id)
+        if document is None:
+            return False
+        now = datetime.utcnow()
+        self._write(document, {"deleted_at": now, "updated_at": now}, "update")
+        await bump_versions(None, reviews_key(), user_reviews_key(document["user_email"]))
+        return True
+
+    async def exists(self, review_id: str) -> bool:
+        return self._active(review_id) is not None
+
+    async def get_by_author(self, review_id: str, user_email: str, expected: dict | None = None) -> Review | None:
+        document = self._active(review_id)
+        if document is None or document["user_email"] != user_email or not _matches(document, expected):
+            return None
+        return self._to_review(document)
+
+    async def update_by_author(
+        self, review_id: str, user_email: str, update_data: dict, expected: dict | None = None
+    ) -> Review | None:
+        document = self._active(review_id)
+        if document is None or document["user_email"] != user_email or not _matches(document, expected):
+            return None
+        return await self.update(review_id, update_data)
+
+    async def delete_by_author(self, review_id: str, user_email: str) -> bool:
+        document = self._active(review_id)
+        if document is None or document["user_email"] != user_email:
+            return False
+        return await self.delete(review_id)
+
+    async def changes(
+        self, since: tuple[datetime, ObjectId] | None, until: datetime, limit: int, include_deleted: bool = True
+    ) -> list[dict]:
+        start = bisect.bisect_right(self._changes, since) if since is not None else 0
+        documents = []
+        for updated_at, review_id in self._changes[start:]:
+            if updated_at >= until or len(documents) == limit:
+                break
+            document = self._documents[review_id]
+            if include_deleted or document.get("deleted_at") is None:
+                documents.append(dict(document))
+        return documents
+
+
+class MemoryExampleRepository:
+    """
+    Examples en memoria.
+
+    Índices: por ID, lista ordenada por name_search (búsqueda por prefijo)
+    y trigramas de name_search (búsqueda por subcadena).
+    """
+
+    def __init__(self):
+        self._documents: dict[ObjectId, dict] = {}
+        self._names: list[tuple[str, ObjectId]] = []
+        self._ngrams: dict[str, set[ObjectId]] = {}
+
+    def _index(self, document: dict, add: bool) -> None:
+        """Añade o quita el documento de los índices de nombre."""
+        entry = (document["name_search"], document["_id"])
+        if add:
+            bisect.insort(self._names, entry)
+        else:
+            self._names.pop(bisect.bisect_left(self._names, entry))
+        for gram in document["name_ngrams"]:
+            if add:
+                self._ngrams.setdefault(gram, set()).add(document["_id"])
+            else:
+                self._ngrams[gram].discard(document["_id"])
+
+    def _insert(self, example_data: dict, now: datetime) -> dict:
+        """Guarda un example nuevo con sus campos de búsqueda."""
+        document = {**example_data, "_id": ObjectId(), "created_at": now, "updated_at": now}
+        document.update(search_fields(document["name"]))
+        self._documents[document["_id"]] = document
+        self._index(document, add=True)
+        return document
+
+    def _update(self, document: dict, update_data: dict, now: datetime) -> None:
+        """Aplica los campos no nulos de `update_data` a un example."""
+        update_data = {k: v for k, v in update_data.items() if v is not None}
+        update_data["updated_at"] = now
+        if "name" in update_data:
+            update_data.update(search_fields(update_data["name"]))
+        self._index(document, add=False)
+        document.update(update_data)
+        self._index(document, add=True)
+
+    def _remove(self, example_id: ObjectId) -> None:
+        """Elimina un example y sus entradas de los índices."""
+        self._index(self._documents.pop(example_id), add=False)
+
+    async def create(self, example_data: dict) -> ExampleModel:
+        return ExampleModel(**self._insert(example_data, datetime.utcnow()))
+
+    async def find_by_id(self, example_id: str) -> ExampleModel | None:
+        document = self._documents.get(_object_id(example_id))
+        return ExampleModel(**document) if document else None
+
+    async def find_all(self) -> list[ExampleModel]:
+        return [ExampleModel(**document) for document in self._documents.values()]
+
+    async def update(self, example_id: str, update_data: dict) -> ExampleModel | None:
+        document = self._documents.get(_object_id(example_id))
+        if document is None:
+            return None
+        if any(value is not None for value in update_data.values()):
+            self._update(document, update_data, datetime.utcnow())
+        return ExampleModel(**document)
+
+    async def delete(self, example_id: str) -> bool:
+        example_id = _object_id(example_id)
+        if example_id not in self._documents:
+            return False
+        self._remove(example_id)
+        return True
+
+    async def bulk_write(self, creates: list[dict], updates: list[tuple[str, dict]], deletes: list[str]) -> list[dict]:
+        now = datetime.utcnow()
+        results = []
+        for index, example_data in enumerate(creates):
+            document = self._insert(example_data, now)
+            results.append({"operation": "create", "index": index, "id": str(document["_id"]), "status": "created"})
+
+        # El estado se resuelve al escribir: en memoria no hay escrituras entre la lectura y la escritura
+        for index, (example_id, update_data) in enumerate(updates):
+            result = self._reference_result("update", index, example_id)
+            results.append(result)
+            if result["status"] == "invalid_id":
+                continue
+            document = self._documents.get(ObjectId(example_id))
+            if document is None:
+                result["status"] = "not_found"
+            else:
+                self._update(document, update_data, now)
+                result["status"] = "updated"
+
+        for index, example_id in enumerate(deletes):
+            result = self._reference_result("delete", index, example_id)
+            results.append(result)
+            if result["status"] == "invalid_id":
+                continue
+            if ObjectId(example_id) in self._documents:
+                self._remove(ObjectId(example_id))
+                result["status"] = "deleted"
+            else:
+                result["status"] = "not_found"
+
+        return results
+
+    @staticmethod
+    def _reference_result(operation: str, index: int, example_id: str) -> dict:
+        """Resultado inicial de una operación sobre un example existente."""
+        status = "pending" if ObjectId.is_valid(example_id) else "invalid_id"
+        return {"operation": operation, "index": index, "id": example_id, "status": status}
+
+    async def find_by_name(self, name: str, substring: bool = False, limit: int = 100) -> list[ExampleModel]:
+        term = normalize_text(name)
+        if not term:
+            return []
+
+        if not substring or len(term) < NGRAM_SIZE:
+            examples = []
+            for name_search, example_id in self._names[bisect.bisect_left(self._names, (term,)):]:
+                if not name_search.startswith(term) or len(examples) == limit:
+                    break
+                examples.append(ExampleModel(**self._documents[example_id]))
+            return examples
+
+        # Se parte del trigrama menos frecuente y se descartan los falsos positivos
+        postings = sorted((self._ngrams.get(gram, set()) for gram in ngrams(term)), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        documents = sorted(
+            (self._documents[example_id] for example_id in candidates),
+            key=lambda document: (document["name_search"], document["_id"])
+        )
+        return [ExampleModel(**document) for document in documents if term in document["name_search"]][:limit]
+
+
+class MemoryMarkerRepository:
+    """Marcadores en memoria, indexados por usuario."""
+
+    def __init__(self):
+        self._by_user: dict[str, list[dict]] = {}
+
+    async def find_by_user(self, user_email: str) -> list[Marker]:
+        documents = self._by_user.get(user_email, [])[:1000]
+        return [Marker(**{**document, "_id": str(document["_id"])}) for document in documents]
+
+    async def create(self, marker: Marker) -> Marker:
+        document = {**marker.model_dump(by_alias=True, exclude={"id"}), "_id": ObjectId()}
+        self._by_user.setdefault(marker.user_email, []).append(document)
+        marker.id = str(document["_id"])
+        await bump_versions(None, user_markers_key(marker.user_email))
+        return marker
+
+
+class MemoryVisitRepository:
+    """
+    Visitas en memoria.
+
+    Los agregados se indexan por (visitante, visitado, día) para los
+    incrementos y, por usuario visitado, en dos listas ordenadas: por
+    (day, _id) para las estadísticas y por (last_seen, _id) para el
+    historial paginado.
+    """
+
+    def __init__(self):
+        self._rollups: dict[tuple[str, str, datetime], dict] = {}
+        self._history: dict[str, list[tuple[datetime, ObjectId, dict]]] = {}
+        self._recent: dict[str, list[tuple[datetime, ObjectId, dict]]] = {}
+        self.events: list[dict] = []
+
+    async def save(self, batch: list[dict], store_raw_events: bool) -> None:
+        for key, totals in group_visits(batch).items():
+            rollup = self._rollups.get(key)
+            if rollup is None:
+                visitor_email, visited_email, day = key
+                rollup = {"_id": ObjectId(), "visitor_email": visitor_email, "visited_email": visited_email,
+                          "day": day, **totals}
+                self._rollups[key] = rollup
+                bisect.insort(self._history.setdefault(visited_email, []), (day, rollup["_id"], rollup))
+                bisect.insort(self._recent.setdefault(visited_email, []), (rollup["last_seen"], rollup["_id"], rollup))
+            else:
+                rollup["count"] += totals["count"]
+                rollup["first_seen"] = min(rollup["first_seen"], totals["first_seen"])
+                if totals["last_seen"] > rollup["last_seen"]:
+                    # Se recoloca en el historial con su nueva última visita
+                    recent = self._recent[rollup["visited_email"]]
+                    del recent[bisect.bisect_left(recent, (rollup["last_seen"], rollup["_id"]))]
+                    rollup["last_seen"] = totals["last_seen"]
+                    bisect.insort(recent, (rollup["last_seen"], rollup["_id"], rollup))
+
+        if store_raw_events:
+            self.events.extend(batch)
+
+    async def find_page(
+        self, visited_email: str, before: tuple[datetime, ObjectId] | None, limit: int
+    ) -> list[dict]:
+        recent = self._recent.get(visited_email, [])
+        end = bisect.bisect_left(recent, before) if before is not None else len(recent)
+        return [dict(rollup) for _, _, rollup in reversed(recent[max(0, end - limit):end])]
+
+    async def stats(self, visited_email: str, since: datetime, granularity: str) -> tuple[dict, list[dict]]:
+        history = self._history.get(visited_email, [])
+        buckets: dict[datetime, list] = {}
+        visitors = set()
+        for day, _, rollup in history[bisect.bisect_left(history, (since,)):]:
+            period = day if granularity == "day" else day - timedelta(days=day.weekday())
+            bucket = buckets.setdefault(period, [0, set()])
+            bucket[0] += rollup["count"]
+            bucket[1].add(rollup["visitor_email"])
+            visitors.add(rollup["visitor_email"])
+
+        totals = {"visits": sum(visits for visits, _ in buckets.values()), "unique_visitors": len(visitors)}
+        return totals, [
+            {"period_start": period, "visits": visits, "unique_visitors": len(period_visitors)}
+            for period, (visits, period_visitors) in sorted(buckets.items())
+        ]
+
+
+class MemoryUserRepository:
+    """Usuarios en memoria, indexados por email."""
+
+    def __init__(self):
+        self._users: dict[str, dict] = {}
+
+    async def record_login(
+        self, email: str, name: str | None, picture: str | None, now: datetime, coalesce_before: datetime
+    ) -> dict:
+        user = self._users.setdefault(email, {"_id": ObjectId(), "email": email, "created_at": now})
+        user["name"] = name
+        user["picture"] = picture
+        if user.get("last_login") is None or user["last_login"] < coalesce_before:
+            user["last_login"] = now
+        return dict(user)
@@ -0,0 +1,124 @@
+"""
+Interfaces de los repositorios.
+
+Cada entidad tiene dos implementaciones con el mismo comportamiento:
+
+- MongoDB (repositories/*_repository.py): la de producción.
+- En memoria (repositories/memory.py): datos en el propio proceso, con
+  índices en diccionarios y listas ordenadas, para tests y benchmarks.
+
+El backend se elige con REPOSITORY_BACKEND (ver repositories/factory.py).
+Los endpoints y servicios solo dependen de estas interfaces.
+"""
+from datetime import datetime
+from typing import Protocol
+from bson import ObjectId
+from models.example import ExampleModel
+from models.marker import Marker
+from models.review import Review
+
+
+class ReviewRepositoryProtocol(Protocol):
+    """Reseñas (con borrado lógico y versiones para los ETags)."""
+
+    async def create(self, review: Review) -> Review:
+        """Crea una reseña y le asigna ID."""
+
+    async def get_all(self) -> list[Review]:
+        """Todas las reseñas activas (máximo 1000)."""
+
+    async def get_by_id(self, review_id: str) -> Review | None:
+        """Reseña activa por ID (None si no existe o el ID no es válido)."""
+
+    async def get_many(self, review_ids: list[ObjectId]) -> dict[str, Review]:
+        """Reseñas activas de una lista de IDs, indexadas por ID."""
+
+    async def get_by_user(self, user_email: str) -> list[Review]:
+        """Reseñas activas de un autor."""
+
+    async def search(self, query: str, skip: int = 0, limit: int = 20) -> list[Review]:
+        """Búsqueda de texto por establecimiento y dirección, por relevancia."""
+
+    async def update(self, review_id: str, update_data: dict) -> Review | None:
+        """Actualiza una reseña activa."""
+
+    async def delete(self, review_id: str) -> bool:
+        """Borrado lógico (tombstone) de una reseña."""
+
+    async def exists(self, review_id: str) -> bool:
+        """Indica si existe una reseña activa."""
+
+    async def get_by_author(self, review_id: str, user_email: str, expected: dict | None = None) -> Review | None:
+        """Reseña activa solo si es del autor y cumple `expected`."""
+
+    async def update_by_author(
+        self, review_id: str, user_email: str, update_data: dict, expected: dict | None = None
+    ) -> Review | None:
+        """Actualiza una reseña solo si es del autor y cumple `expected` (atómico)."""
+
+    async def delete_by_author(self, review_id: str, user_email: str) -> bool:
+        """Borrado lógico solo si la reseña es del autor."""
+
+    async def changes(
+        self, since: tuple[datetime, ObjectId] | None, until: datetime, limit: int, include_deleted: bool = True
+    ) -> list[dict]:
+        """Cambios ordenados por (updated_at, _id) posteriores a `since`."""
+
+
+class ExampleRepositoryProtocol(Protocol):
+    """Examples (plantilla CRUD con búsqueda por nombre)."""
+
+    async def create(self, example_data: dict) -> ExampleModel:
+        """Crea un example."""
+
+    async def find_by_id(self, example_id: str) -> ExampleModel | None:
+        """Example por ID."""
+
+    async def find_all(self) -> list[ExampleModel]:
+        """Todos los examples."""
+
+    async def update(self, example_id: str, update_data: dict) -> ExampleModel | None:
+        """Actualiza los campos no nulos de un example."""
+
+    async def delete(self, example_id: str) -> bool:
+        """Elimina un example."""
+
+    async def bulk_write(self, creates: list[dict], updates: list[tuple[str, dict]], deletes: list[str]) -> list[dict]:
+        """Crea, actualiza y elimina en bloque con un resultado por operación."""
+
+    async def find_by_name(self, name: str, substring: bool = False, limit: int = 100) -> list[ExampleModel]:
+        """Búsqueda por prefijo (o subcadena) del nombre normalizado."""
+
+
+class MarkerRepositoryProtocol(Protocol):
+    """Marcadores del mapa de cada usuario."""
+
+    async def find_by_user(self, user_email: str) -> list[Marker]:
+        """Marcadores de un usuario (máximo 1000)."""
+
+    async def create(self, marker: Marker) -> Marker:
+        """Crea un marcador y le asigna ID."""
+
+
+class VisitRepositoryProtocol(Protocol):
+    """Visitas agregadas por (visitante, visitado, día) y eventos completos."""
+
+    async def save(self, batch: list[dict], store_raw_events: bool) -> None:
+        """Suma un lote de visitas a los agregados y, si se indica, guarda los eventos."""
+
+    async def find_page(
+        self, visited_email: str, before: tuple[datetime, ObjectId] | None, limit: int
+    ) -> list[dict]:
+        """Agregados de un usuario ordenados por (last_seen, _id) descendente, anteriores a `before`."""
+
+    async def stats(self, visited_email: str, since: datetime, granularity: str) -> tuple[dict, list[dict]]:
+        """Totales y desglose por periodo (period_start, visits, unique_visitors) desde `since`."""
+
+
+class UserRepositoryProtocol(Protocol):
+    """Usuarios que han hecho login."""
+
+    async def record_login(
+        self, email: str, name: str | None, picture: str | None, now: datetime, coalesce_before: datetime
+    ) -> dict:
+        """Crea o actualiza el usuario; last_login solo cambia si es anterior a `coalesce_before`."""
@@ -5,6 +5,14 @@ Maneja todas las operaciones de base de datos para reseñas.
 from models.review import Review
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from core.database import public_read_preference
+from core.versions import bump_versions, reviews_key, user_reviews_key
+from datetime import datetime
+
+# Filtro de reseñas no borradas: los borrados dejan una marca (tombstone)
+# con deleted_at para que la sincronización incremental los vea
+ACTIVE = {"deleted_at": None}
 
 
 class ReviewRepository:
@@ -20,6 +28,15 @@ class ReviewRepository:
             db: Instancia de la base de datos MongoDB
         """
         self.collection = db["reviews"]
+        # Listados públicos: pueden leer de secundarios (MONGO_PUBLIC_READ_PREFERENCE)
+        self.public_collection = self.collection.with_options(read_preference=public_read_preference())
+
+    async def _bump_versions(self, user_email: str) -> None:
+        """
+        Incrementa las versiones (ETag) del listado general y de las reseñas del autor.
+        Se llama tras cada escritura.
+        """
+        await bump_versions(self.collection.database, reviews_key(), user_reviews_key(user_email))
 
     async def create(self, review: Review) -> Review:
         """
@@ -34,16 +51,21 @@ class ReviewRepository:
         review_dict = review.model_dump(by_alias=True, exclude={"id"})
         result = await self.collection.insert_one(review_dict)
         review.id = str(result.inserted_id)
+        await self._bump_versions(review.user_email)
         return review
 
     async def get_all(self) -> list[Review]:
         """
         Obtiene todas las reseñas de la base de datos.
         
+        Lee siempre del primario: el resultado se cachea tras cada
+        invalidación del change stream y un secundario retrasado dejaría
+        en la caché datos antiguos durante todo el TTL.
+        
         Returns:
             list[Review]: Lista de todas las reseñas
         """
-        cursor = self.collection.find({})
+        cursor = self.collection.find(ACTIVE).limit(1000)
         reviews = await cursor.to_list(length=1000)
         
         # CRÍTICO: Convertir ObjectId a string antes de crear modelos Pydantic
@@ -63,7 +85,7 @@ class ReviewRepository:
             Review | None: La reseña encontrada o None si no existe
         """
         try:
-            review = await self.collection.find_one({"_id": ObjectId(review_id)})
+            review = await self.collection.find_one({**ACTIVE, "_id": ObjectId(review_id)})
             if review:
                 review["_id"] = str(review["_id"])
                 return Review(**review)
@@ -71,6 +93,24 @@ class ReviewRepository:
         except Exception:
             return None
 
+    async def get_many(self, review_ids: list[ObjectId]) -> dict[str, Review]:
+        """
+        Obtiene varias reseñas por ID con una sola consulta ($in sobre _id).
+        
+        Args:
+            review_ids: IDs de las reseñas
+            
+        Returns:
+            dict[str, Review]: Reseñas encontradas indexadas por ID (sin orden)
+        """
+        cursor = self.collection.find({**ACTIVE, "_id": {"$in": review_ids}})
+        reviews = await cursor.to_list(length=len(review_ids))
+        
+        for review in reviews:
+            review["_id"] = str(review["_id"])
+        
+        return {review["_id"]: Review(**review) for review in reviews}
+
     async def get_by_user(self, user_email: str) -> list[Review]:
         """
         Obtiene todas las reseñas de un usuario específico.
@@ -81,7 +121,7 @@ class ReviewRepository:
         Returns:
             list[Review]: Lista de reseñas del usuario
         """
-        cursor = self.collection.find({"user_email": user_email})
+        cursor = self.collection.find({**ACTIVE, "user_email": user_email}).limit(1000)
         reviews = await cursor.to_list(length=1000)
         
         for review in reviews:
@@ -89,6 +129,39 @@ class ReviewRepository:
         
         return [Review(**review) for review in reviews]
 
+    async def search(self, query: str, skip: int = 0, limit: int = 20) -> list[Review]:
+        """
+        Busca reseñas por texto en el nombre del establecimiento y la dirección.
+        
+        Usa el índice de texto "reviews_text_search", que no distingue
+        mayúsculas ni acentos, y ordena los resultados por relevancia.
+        Es un listado público: usa MONGO_PUBLIC_READ_PREFERENCE.
+        
+        Args:
+            query: Texto a buscar
+            skip: Número de resultados a saltar (paginación)
+            limit: Número máximo de resultados a devolver
+            
+        Returns:
+            list[Review]: Reseñas que coinciden, de mayor a menor relevancia
+        """
+        cursor = (
+            self.public_collection.find(
+                {**ACTIVE, "$text": {"$search": query}},
+                {"score": {"$meta": "textScore"}}
+            )
+            .sort([("score", {"$meta": "textScore"}), ("_id", 1)])
+            .skip(skip)
+            .limit(limit)
+        )
+        reviews = await cursor.to_list(length=limit)
+        
+        for review in reviews:
+            review["_id"] = str(review["_id"])
+            review.pop("score", None)
+        
+        return [Review(**review) for review in reviews]
+
     async def update(self, review_id: str, update_data: dict) -> Review | None:
         """
         Actualiza una reseña existente.
@@ -100,31 +173,171 @@ class ReviewRepository:
         Returns:
             Review | None: La reseña actualizada o None si no existe
         """
-        try:
-            result = await self.collection.find_one_and_update(
-                {"_id": ObjectId(review_id)},
-                {"$set": update_data},
-                return_document=True
-            )
-            if result:
-                result["_id"] = str(result["_id"])
-                return Review(**result)
+        if not ObjectId.is_valid(review_id):
             return None
-        except Exception:
+        result = await self.collection.find_one_and_update(
+            {**ACTIVE, "_id": ObjectId(review_id)},
+            {"$set": {**update_data, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not result:
             return None
+        await self._bump_versions(result["user_email"])
+        result["_id"] = str(result["_id"])
+        return Review(**result)
 
     async def delete(self, review_id: str) -> bool:
         """
         Elimina una reseña de la base de datos.
         
+        Es un borrado lógico: se marca con deleted_at (tombstone) para que
+        /changes informe del borrado. Las marcas caducan por el índice TTL.
+        
         Args:
             review_id: ID de la reseña a eliminar
             
         Returns:
             bool: True si se eliminó correctamente, False si no
         """
+        if not ObjectId.is_valid(review_id):
+            return False
+        now = datetime.utcnow()
+        deleted = await self.collection.find_one_and_update(
+            {**ACTIVE, "_id": ObjectId(review_id)},
+            {"$set": {"deleted_at": now, "updated_at": now}},
+            projection={"user_email": 1}
+        )
+        if not deleted:
+            return False
+        await self._bump_versions(deleted["user_email"])
+        return True
+
+    async def exists(self, review_id: str) -> bool:
+        """
+        Comprueba si existe una reseña (solo lee el _id).
+        
+        Se usa tras un fallo de las operaciones filtradas por autor
+        para distinguir "no existe" (404) de "no es el autor" (403).
+        
+        Args:
+            review_id: ID de la reseña
+            
+        Returns:
+            bool: True si existe
+        """
         try:
-            result = await self.collection.delete_one({"_id": ObjectId(review_id)})
-            return result.deleted_count > 0
+            return await self.collection.find_one({**ACTIVE, "_id": ObjectId(review_id)}, {"_id": 1}) is not None
         except Exception:
             return False
+
+    async def get_by_author(self, review_id: str, user_email: str, expected: dict | None = None) -> Review | None:
+        """
+        Obtiene una reseña solo si pertenece al usuario indicado.
+        
+        Args:
+            review_id: ID de la reseña
+            user_email: Email del autor
+            expected: Condiciones adicionales que debe cumplir el documento
+            
+        Returns:
+            Review | None: La reseña, o None si no existe, es de otro autor o no cumple `expected`
+        """
+        try:
+            review = await self.collection.find_one(
+                {**(expected or {}), **ACTIVE, "_id": ObjectId(review_id), "user_email": user_email}
+            )
+            if review:
+                review["_id"] = str(review["_id"])
+                return Review(**review)
+            return None
+        except Exception:
+            return None
+
+    async def update_by_author(
+        self, review_id: str, user_email: str, update_data: dict, expected: dict | None = None
+    ) -> Review | None:
+        """
+        Actualiza una reseña solo si pertenece al usuario indicado.
+        
+        La comprobación de autoría va en el propio filtro, así que es una
+        única operación atómica: no hay hueco entre comprobar y escribir.
+        
+        Args:
+            review_id: ID de la reseña
+            user_email: Email del autor
+            update_data: Campos a actualizar
+            expected: Condiciones adicionales que debe cumplir el documento
+            
+        Returns:
+            Review | None: La reseña actualizada, o None si no existe, es de otro autor o no cumple `expected`
+        """
+        if not ObjectId.is_valid(review_id):
+            return None
+        result = await self.collection.find_one_and_update(
+            {**(expected or {}), **ACTIVE, "_id": ObjectId(review_id), "user_email": user_email},
+            {"$set": {**update_data, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not result:
+            return None
+        await self._bump_versions(user_email)
+        result["_id"] = str(result["_id"])
+        return Review(**result)
+
+    async def delete_by_author(self, review_id: str, user_email: str) -> bool:
+        """
+        Elimina una reseña solo si pertenece al usuario indicado.
+        
+        Args:
+            review_id: ID de la reseña
+            user_email: Email del autor
+            
+        Returns:
+            bool: True si se eliminó, False si no existe o es de otro autor
+        
+        Nota:
+            Es un borrado lógico, como en delete.
+        """
+        if not ObjectId.is_valid(review_id):
+            return False
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {**ACTIVE, "_id": ObjectId(review_id), "user_email": user_email},
+            {"$set": {"deleted_at": now, "updated_at": now}}
+        )
+        if result.modified_count == 0:
+            return False
+        await self._bump_versions(user_email)
+        return True
+
+    async def changes(
+        self, since: tuple[datetime, ObjectId] | None, until: datetime, limit: int, include_deleted: bool = True
+    ) -> list[dict]:
+        """
+        Obtiene los cambios (altas, modificaciones y borrados) en orden.
+        
+        Recorre el índice "reviews_changes" (updated_at, _id) a partir de la
+        posición `since`, así que el coste depende del número de cambios y
+        no del tamaño de la colección.
+        
+        Args:
+            since: Posición (updated_at, _id) del último cambio ya sincronizado
+            until: Solo cambios con updated_at anterior a esta fecha
+            limit: Número máximo de cambios
+            include_deleted: Incluir las marcas de borrado
+            
+        Returns:
+            list[dict]: Documentos (con deleted_at si es un borrado) ordenados por (updated_at, _id)
+        """
+        query = {"updated_at": {"$lt": until}}
+        if since is not None:
+            updated_at, last_id = since
+            query["$or"] = [
+                {"updated_at": {"$gt": updated_at}},
+                {"updated_at": updated_at, "_id": {"$gt": last_id}},
+            ]
+        if not include_deleted:
+            query.update(ACTIVE)
+        
+        cursor = self.collection.find(query).sort([("updated_at", 1), ("_id", 1)]).limit(limit)
+        return await cursor.to_list(length=limit)
@@ -0,0 +1,68 @@
+"""
+Repositorio de Usuarios.
+Maneja el alta y el último login de los usuarios.
+"""
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+class UserRepository:
+    """
+    Repositorio de usuarios en MongoDB (colección "users").
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        """
+        Inicializa el repositorio con la conexión a la base de datos.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+        """
+        self.collection = db["users"]
+
+    async def record_login(
+        self, email: str, name: str | None, picture: str | None, now: datetime, coalesce_before: datetime
+    ) -> dict:
+        """
+        Crea el usuario si no existe y actualiza sus datos de login.
+
+        Es una única operación atómica (find_one_and_update con upsert)
+        respaldada por el índice único de email, así que dos primeros logins
+        simultáneos no duplican el usuario.
+
+        Args:
+            email: Email del usuario
+            name: Nombre (de Google)
+            picture: Foto de perfil (de Google)
+            now: Fecha del login
+            coalesce_before: last_login solo se actualiza si es anterior a esta fecha
+
+        Returns:
+            dict: Documento del usuario tras la escritura
+        """
+        # Update con pipeline: permite condicionar last_login al valor guardado.
+        # $literal evita que un nombre que empiece por "$" se interprete como campo.
+        pipeline = [{"$set": {
+            "email": email,
+            "name": {"$literal": name},
+            "picture": {"$literal": picture}, # Actualizar foto por si cambió
+            "created_at": {"$ifNull": ["$created_at", now]},
+            # Un last_login inexistente (usuario nuevo) también es menor que la fecha
+            "last_login": {"$cond": [
+                {"$lt": ["$last_login", coalesce_before]},
+                now,
+                "$last_login"
+            ]}
+        }}]
+
+        try:
+            return await self.collection.find_one_and_update(
+                {"email": email}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Otro login concurrente insertó el usuario primero: ahora el upsert actualiza
+            return await self.collection.find_one_and_update(
+                {"email": email}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+            )
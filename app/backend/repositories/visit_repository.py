@@ -0,0 +1,165 @@
+"""
+Repositorio de Visitas.
+
+Cada visita incrementa un contador agregado por (visitante, visitado, día)
+en la colección "visit_rollups". Opcionalmente se guarda también el evento
+completo en "visits", que caduca por un índice TTL.
+"""
+from datetime import datetime
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+
+def day_start(timestamp: datetime) -> datetime:
+    """Trunca un datetime al inicio de su día (UTC)."""
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def group_visits(batch: list[dict]) -> dict[tuple[str, str, datetime], dict]:
+    """
+    Agrupa un lote de visitas por (visitante, visitado, día).
+
+    Args:
+        batch: Documentos de visita (visitor_email, visited_email, visitor_token, timestamp)
+
+    Returns:
+        dict: (visitante, visitado, día) -> {"count", "first_seen", "last_seen"}
+    """
+    rollups = {}
+    for visit in batch:
+        key = (visit["visitor_email"], visit["visited_email"], day_start(visit["timestamp"]))
+        current = rollups.get(key)
+        if current is None:
+            rollups[key] = {"count": 1, "first_seen": visit["timestamp"], "last_seen": visit["timestamp"]}
+        else:
+            current["count"] += 1
+            current["first_seen"] = min(current["first_seen"], visit["timestamp"])
+            current["last_seen"] = max(current["last_seen"], visit["timestamp"])
+    return rollups
+
+
+def rollup_operations(batch: list[dict]) -> list[UpdateOne]:
+    """
+    Upserts de visit_rollups para un lote de visitas.
+
+    Las visitas repetidas dentro del lote se agrupan en memoria, de modo que
+    cada (visitante, visitado, día) produce un único upsert con $inc.
+
+    Args:
+        batch: Documentos de visita (visitor_email, visited_email, visitor_token, timestamp)
+
+    Returns:
+        list[UpdateOne]: Operaciones para bulk_write
+    """
+    return [
+        UpdateOne(
+            {"visitor_email": visitor_email, "visited_email": visited_email, "day": day},
+            {
+                "$inc": {"count": totals["count"]},
+                "$min": {"first_seen": totals["first_seen"]},
+                "$max": {"last_seen": totals["last_seen"]}
+            },
+            upsert=True
+        )
+        for (visitor_email, visited_email, day), totals in group_visits(batch).items()
+    ]
+
+
+class VisitRepository:
+    """
+    Repositorio de visitas en MongoDB ("visit_rollups" y "visits").
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        """
+        Inicializa el repositorio con la conexión a la base de datos.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+        """
+        self.rollups = db["visit_rollups"]
+        self.events = db["visits"]
+
+    async def save(self, batch: list[dict], store_raw_events: bool) -> None:
+        """
+        Suma un lote de visitas a los contadores agregados.
+
+        Args:
+            batch: Documentos de visita
+            store_raw_events: Guardar también los eventos completos
+        """
+        await self.rollups.bulk_write(rollup_operations(batch), ordered=False)
+
+        if store_raw_events:
+            await self.events.insert_many(batch, ordered=False)
+
+    async def find_page(
+        self, visited_email: str, before: tuple[datetime, ObjectId] | None, limit: int
+    ) -> list[dict]:
+        """
+        Agregados de un usuario, de la visita más reciente a la más antigua.
+
+        Ordena por (last_seen, _id) recorriendo el índice "visit_rollups_recent"
+        a partir de `before`, sin skip ni ordenación en memoria. Un agregado
+        que recibe visitas nuevas sube al principio: si ya se había devuelto
+        no se repite y si no, aparece al recargar la primera página.
+
+        Args:
+            visited_email: Email del usuario visitado
+            before: Posición (last_seen, _id) del último elemento ya devuelto
+            limit: Número máximo de agregados
+
+        Returns:
+            list[dict]: Documentos de visit_rollups
+        """
+        query = {"visited_email": visited_email}
+        if before is not None:
+            last_seen, last_id = before
+            query["$or"] = [
+                {"last_seen": {"$lt": last_seen}},
+                {"last_seen": last_seen, "_id": {"$lt": last_id}},
+            ]
+
+        cursor = self.rollups.find(query).sort([("last_seen", -1), ("_id", -1)]).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def stats(self, visited_email: str, since: datetime, granularity: str) -> tuple[dict, list[dict]]:
+        """
+        Visitas totales y visitantes únicos, en total y por periodo.
+
+        La agregación se hace en MongoDB con un único $facet.
+
+        Args:
+            visited_email: Email del usuario visitado
+            since: Primer día incluido
+            granularity: "day" o "week" (semanas empezando en lunes)
+
+        Returns:
+            tuple: ({"visits", "unique_visitors"}, [{"period_start", "visits", "unique_visitors"}, ...])
+        """
+        period = "$day" if granularity == "day" else {
+            "$dateTrunc": {"date": "$day", "unit": "week", "startOfWeek": "monday"}
+        }
+        result = await self.rollups.aggregate([
+            {"$match": {"visited_email": visited_email, "day": {"$gte": since}}},
+            {"$facet": {
+                "buckets": [
+                    {"$group": {"_id": period, "visits": {"$sum": "$count"}, "visitors": {"$addToSet": "$visitor_email"}}},
+                    {"$project": {"visits": 1, "unique_visitors": {"$size": "$visitors"}}},
+                    {"$sort": {"_id": 1}},
+                ],
+                "totals": [
+                    {"$group": {"_id": None, "visits": {"$sum": "$count"}, "visitors": {"$addToSet": "$visitor_email"}}},
+                    {"$project": {"visits": 1, "unique_visitors": {"$size": "$visitors"}}},
+                ],
+            }},
+        ]).to_list(length=1)
+
+        facets = result[0] if result else {"buckets": [], "totals": []}
+        totals = facets["totals"][0] if facets["totals"] else {"visits": 0, "unique_visitors": 0}
+        buckets = [
+            {"period_start": b["_id"], "visits": b["visits"], "unique_visitors": b["unique_visitors"]}
+            for b in facets["buckets"]
+        ]
+        return {"visits": totals["visits"], "unique_visitors": totals["unique_visitors"]}, buckets
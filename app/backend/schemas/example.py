@@ -5,6 +5,7 @@ Define los modelos de entrada y salida de la API.
 Plantilla genérica para adaptar según las entidades del examen.
 """
 from datetime import datetime
+from typing import Literal
 from pydantic import BaseModel, ConfigDict, Field
 
 class ExampleCreate(BaseModel):
@@ -67,3 +68,60 @@ class ExampleResponse(BaseModel):
         }
     )
 
+
+class ExampleBulkUpdate(ExampleUpdate):
+    """
+    Schema de una actualización dentro de una operación en bloque.
+    
+    Igual que ExampleUpdate pero indicando el ID del example.
+    """
+    id: str = Field(..., description="ID del example a actualizar")
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "id": "507f1f77bcf86cd799439011",
+                "name": "Ejemplo actualizado"
+            }
+        }
+    )
+
+class ExampleBulkRequest(BaseModel):
+    """
+    Schema de una operación en bloque sobre examples.
+    
+    Todas las operaciones se envían en un único bulk_write sin orden. El
+    estado "not_found" sale de una lectura previa y es aproximado si otro
+    cliente borra el example a la vez.
+    """
+    creates: list[ExampleCreate] = Field(default_factory=list, max_length=1000, description="Examples a crear")
+    updates: list[ExampleBulkUpdate] = Field(default_factory=list, max_length=1000, description="Examples a actualizar")
+    deletes: list[str] = Field(default_factory=list, max_length=1000, description="IDs de examples a eliminar")
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "creates": [{"name": "Ejemplo 1", "description": "Descripción del ejemplo"}],
+                "updates": [{"id": "507f1f77bcf86cd799439011", "name": "Ejemplo actualizado"}],
+                "deletes": ["507f1f77bcf86cd799439012"]
+            }
+        }
+    )
+
+class ExampleBulkItemResult(BaseModel):
+    """
+    Resultado de una operación individual dentro de un bloque.
+    """
+    operation: Literal["create", "update", "delete"] = Field(..., description="Tipo de operación")
+    index: int = Field(..., description="Posición en la lista de su tipo (creates, updates o deletes)")
+    id: str | None = Field(None, description="ID del example afectado")
+    status: Literal["created", "updated", "deleted", "not_found", "invalid_id", "error"] = Field(
+        ..., description="Resultado de la operación"
+    )
+    error: str | None = Field(None, description="Detalle del error, si lo hubo")
+
+class ExampleBulkResponse(BaseModel):
+    """
+    Schema de respuesta de una operación en bloque.
+    """
+    results: list[ExampleBulkItemResult] = Field(default_factory=list, description="Resultado de cada operación")
@@ -2,7 +2,10 @@
 Esquemas de validación para Reseñas.
 Define los contratos de la API para requests y responses.
 """
+from datetime import datetime
+from typing import Literal
 from pydantic import BaseModel, Field, ConfigDict
+from models.review import Review
 
 
 class ReviewCreate(BaseModel):
@@ -41,3 +44,85 @@ class ReviewUpdate(BaseModel):
     establishment_name: str | None = Field(default=None, min_length=1, max_length=200)
     address: str | None = Field(default=None, min_length=1, max_length=500)
     rating: int | None = Field(default=None, ge=0, le=5)
+
+
+class ReviewSearchResponse(BaseModel):
+    """
+    Esquema de respuesta de la búsqueda de reseñas.
+    Los resultados vienen ordenados por relevancia.
+    """
+    items: list[Review] = Field(default_factory=list, description="Reseñas de la página actual")
+    page: int = Field(..., ge=1, description="Página actual (empieza en 1)")
+    page_size: int = Field(..., ge=1, description="Tamaño de página")
+    has_more: bool = Field(..., description="Indica si existen más resultados")
+
+
+class ReviewBatchRequest(BaseModel):
+    """
+    Esquema de la petición de varias reseñas por ID (POST /batch).
+    """
+    ids: list[str] = Field(..., min_length=1, max_length=500, description="IDs de las reseñas")
+
+
+class ReviewBatchResponse(BaseModel):
+    """
+    Reseñas pedidas por ID, en el orden solicitado.
+    """
+    items: list[Review] = Field(default_factory=list, description="Reseñas encontradas, en el orden pedido")
+    missing: list[str] = Field(default_factory=list, description="IDs válidos que no existen")
+    invalid: list[str] = Field(default_factory=list, description="IDs con formato inválido")
+
+
+class ReviewChange(BaseModel):
+    """
+    Cambio de una reseña para la sincronización incremental.
+    """
+    op: Literal["upsert", "delete"] = Field(..., description="Alta/modificación o borrado")
+    id: str = Field(..., description="ID de la reseña")
+    updated_at: datetime = Field(..., description="Fecha del cambio")
+    review: Review | None = Field(default=None, description="Reseña completa (solo en upsert)")
+
+
+class ReviewChangesResponse(BaseModel):
+    """
+    Página de cambios de /v1/reviews/changes, en orden de aplicación.
+    """
+    items: list[ReviewChange] = Field(default_factory=list, description="Cambios ordenados por (updated_at, id)")
+    next_token: str | None = Field(default=None, description="Token para pedir los cambios siguientes")
+    has_more: bool = Field(..., description="Indica si hay más cambios pendientes")
+
+
+class ReviewImportError(BaseModel):
+    """
+    Error de una fila concreta de una importación.
+    """
+    row: int = Field(..., description="Índice de la fila en el fichero (empieza en 0)")
+    error: str = Field(..., description="Motivo del error")
+
+
+class ReviewImportJob(BaseModel):
+    """
+    Estado de un trabajo de importación masiva de reseñas.
+    """
+    job_id: str = Field(..., description="ID del trabajo (para consultar o reanudar)")
+    status: Literal["running", "completed", "failed"] = Field(..., description="Estado del trabajo")
+    total: int = Field(..., description="Filas del fichero")
+    processed: int = Field(..., description="Filas válidas ya procesadas")
+    inserted: int = Field(..., description="Reseñas insertadas")
+    errors: list[ReviewImportError] = Field(default_factory=list, description="Errores por fila")
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_document(cls, job: dict) -> "ReviewImportJob":
+        """Construye la respuesta a partir del documento del trabajo, con sus errores en "errors"."""
+        return cls(
+            job_id=str(job["_id"]),
+            status=job["status"],
+            total=job["total"],
+            processed=job["next_row"],
+            inserted=job["inserted"],
+            errors=job["errors"],
+            created_at=job["created_at"],
+            updated_at=job["updated_at"]
+        )
@@ -0,0 +1,36 @@
+"""
+Esquemas de respuesta para Visitas.
+Define los contratos de la API para el historial paginado y las estadísticas.
+"""
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel, Field
+from models.visit import VisitSummary
+
+
+class VisitPage(BaseModel):
+    """
+    Página del historial de visitas recibidas.
+    """
+    items: list[VisitSummary] = Field(default_factory=list, description="Visitas agregadas por visitante y día")
+    next_cursor: str | None = Field(default=None, description="Cursor de la siguiente página (null si no hay más)")
+
+
+class VisitStatsBucket(BaseModel):
+    """
+    Visitas recibidas en un periodo (día o semana).
+    """
+    period_start: datetime = Field(..., description="Inicio del periodo (UTC)")
+    visits: int = Field(..., description="Número total de visitas")
+    unique_visitors: int = Field(..., description="Visitantes distintos")
+
+
+class VisitStats(BaseModel):
+    """
+    Estadísticas de visitas recibidas por un usuario.
+    """
+    granularity: Literal["day", "week"] = Field(..., description="Tamaño de cada periodo")
+    since: datetime = Field(..., description="Inicio del intervalo analizado (UTC)")
+    total_visits: int = Field(..., description="Visitas totales en el intervalo")
+    unique_visitors: int = Field(..., description="Visitantes distintos en el intervalo")
+    buckets: list[VisitStatsBucket] = Field(default_factory=list, description="Desglose por periodo")
@@ -0,0 +1,6 @@
+"""
+Herramientas de línea de comandos del backend.
+
+Se ejecutan desde app/backend como módulos, por ejemplo:
+    python -m scripts.import_reviews --help
+"""
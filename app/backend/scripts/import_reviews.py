@@ -0,0 +1,70 @@
+"""
+CLI de importación masiva de reseñas.
+
+Usa el mismo servicio que POST /v1/reviews/import, pero se ejecuta en
+primer plano y muestra el progreso. Un trabajo interrumpido se reanuda
+con --resume <job_id>.
+
+Uso (desde app/backend):
+    python -m scripts.import_reviews resenas.csv --author-email yo@ejemplo.com --author-name "Yo"
+    python -m scripts.import_reviews --resume 665f1c2e9b1e8a3d4c5b6a79
+"""
+import argparse
+import asyncio
+from fastapi import HTTPException
+from core.config import settings
+from core.database import connect_to_mongo, close_mongo_connection, get_database
+from core.http import close_http_client
+from services import review_import
+
+
+def _print_job(job: dict) -> None:
+    print(
+        f"Importación {job['_id']}: {job['status']} - "
+        f"{job['inserted']} insertadas, {len(job['errors'])} errores, {job['total']} filas"
+    )
+    for error in job["errors"]:
+        print(f"  fila {error['row']}: {error['error']}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", nargs="?", help="Fichero .csv o .ndjson")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Formato (por defecto según la extensión)")
+    parser.add_argument("--author-email", help="Email del autor de las reseñas")
+    parser.add_argument("--author-name", default="Usuario", help="Nombre del autor de las reseñas")
+    parser.add_argument("--resume", metavar="JOB_ID", help="Reanudar un trabajo existente")
+    args = parser.parse_args()
+
+    if not args.resume and not (args.file and args.author_email):
+        parser.error("indica un fichero y --author-email, o --resume JOB_ID")
+
+    await connect_to_mongo()
+    db = get_database()
+    try:
+        if args.resume:
+            job = await review_import.claim_job(db, args.resume)
+            if not job:
+                print("La importación no existe, ya terminó o la está procesando otro proceso")
+                return
+        else:
+            file_format = args.format or review_import.detect_format(args.file, None)
+            with open(args.file, "rb") as f:
+                try:
+                    rows = review_import.parse_rows(f.read(settings.review_import_max_bytes + 1), file_format)
+                except HTTPException as e:
+                    print(e.detail)
+                    return
+            author = {"email": args.author_email, "name": args.author_name, "token": "cli-import"}
+            job = await review_import.create_job(db, rows, author)
+            print(f"Trabajo creado: {job['_id']} (usa --resume {job['_id']} si se interrumpe)")
+
+        await review_import.run_job(db, job)
+        _print_job(await review_import.get_job(db, str(job["_id"])))
+    finally:
+        await close_http_client()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
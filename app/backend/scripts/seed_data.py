@@ -0,0 +1,343 @@
+"""
+Generador de datos sintéticos para pruebas de carga.
+
+Crea usuarios, reseñas, marcadores y visitas con distribuciones parecidas
+a las de producción:
+
+- Coordenadas alrededor de ciudades reales, con más peso en las más pobladas.
+- Popularidad en ley de potencias (Zipf): unos pocos establecimientos
+  acumulan muchas reseñas, unos pocos autores escriben mucho y unos pocos
+  usuarios reciben la mayor parte de las visitas.
+- Fechas repartidas en los últimos --days días, con más actividad por la tarde.
+
+Los documentos se insertan en lotes (insert_many) desde varios procesos.
+Cada lote usa un generador aleatorio derivado de (--seed, colección, nº de
+lote), y los _id se derivan de la fecha y la posición del documento: con
+la misma semilla y --end-date se obtienen exactamente los mismos datos,
+sea cual sea el número de procesos.
+
+Uso (desde app/backend):
+    python -m scripts.seed_data --uri mongodb://localhost:27017 --database reviews_seed --drop
+    python -m scripts.seed_data --users 200000 --reviews 5000000 --visits 20000000 --workers 8
+"""
+import argparse
+import bisect
+import calendar
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from models.marker import Marker
+from models.review import Review
+from models.user import User
+from models.visit import Visit
+from repositories.visit_repository import rollup_operations
+
+# Ciudad, latitud, longitud, peso (población en millones) y dispersión en km
+CITIES = [
+    ("Madrid", 40.4168, -3.7038, 6.7, 12.0),
+    ("Barcelona", 41.3874, 2.1686, 5.6, 9.0),
+    ("Valencia", 39.4699, -0.3763, 1.6, 6.0),
+    ("Sevilla", 37.3891, -5.9845, 1.5, 6.0),
+    ("Málaga", 36.7213, -4.4214, 1.0, 6.0),
+    ("Bilbao", 43.2630, -2.9350, 1.0, 5.0),
+    ("Zaragoza", 41.6488, -0.8891, 0.8, 5.0),
+    ("Alicante", 38.3452, -0.4810, 0.5, 5.0),
+    ("Palma", 39.5696, 2.6502, 0.5, 5.0),
+    ("Granada", 37.1773, -3.5986, 0.5, 4.0),
+    ("A Coruña", 43.3623, -8.4115, 0.4, 4.0),
+    ("Cádiz", 36.5271, -6.2886, 0.3, 4.0),
+]
+STREETS = ["Calle Mayor", "Gran Vía", "Calle Real", "Avenida de la Constitución", "Plaza Mayor", "Calle Larios",
+           "Paseo del Prado", "Calle Alcalá", "Avenida del Puerto", "Calle Sierpes", "Rambla", "Calle Nueva"]
+KINDS = ["Bar", "Restaurante", "Taberna", "Mesón", "Hotel", "Hostal", "Café", "Marisquería", "Asador", "Bodega"]
+NAMES = ["Lola", "Pepa", "El Puerto", "La Plaza", "El Jardín", "San Juan", "La Esquina", "El Faro", "Los Arcos",
+         "Santa Ana", "La Alameda", "El Patio", "La Bahía", "El Olivo", "La Fuente", "Triana"]
+FIRST_NAMES = ["Lucía", "Hugo", "Martina", "Mateo", "Sofía", "Martín", "María", "Pablo", "Julia", "Daniel",
+               "Paula", "Alejandro", "Valeria", "Leo", "Emma", "Manuel", "Carmen", "Javier", "Ana", "David"]
+LAST_NAMES = ["García", "Rodríguez", "González", "Fernández", "López", "Martínez", "Sánchez", "Pérez", "Gómez",
+              "Martín", "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Muñoz", "Álvarez", "Romero"]
+# Peso de cada hora del día (UTC) en la actividad
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 8, 8, 9, 10, 10, 9, 7, 4, 2]
+
+# Exponentes de Zipf: cuanto mayor, más concentrada la popularidad
+ESTABLISHMENT_EXPONENT = 1.1
+AUTHOR_EXPONENT = 1.0
+VISITED_EXPONENT = 1.3
+VISITOR_EXPONENT = 0.8
+
+# Primo para repartir los rangos de popularidad entre usuarios (ver _scatter)
+SCATTER_PRIME = 2654435761
+
+# Colección y byte de _id de cada tipo de documento
+COLLECTIONS = {"users": "users", "reviews": "reviews", "markers": "markers", "visits": "visits"}
+ID_PREFIX = {"users": 1, "reviews": 2, "markers": 3, "visits": 4}
+
+# Estado de cada proceso (se rellena en _init_worker)
+_worker = {}
+
+
+def _zipf_cumulative(size: int, exponent: float) -> list[float]:
+    """Pesos acumulados de una distribución de Zipf sobre `size` elementos."""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, size + 1)))
+
+
+def _pick(rng: random.Random, cumulative: list[float]) -> int:
+    """Índice aleatorio según unos pesos acumulados."""
+    return bisect.bisect(cumulative, rng.random() * cumulative[-1])
+
+
+def _object_id(kind: str, index: int, when: datetime) -> ObjectId:
+    """
+    ObjectId determinista: fecha del documento (como los de MongoDB) +
+    tipo + posición, de modo que nunca colisionan entre colecciones.
+    """
+    seconds = calendar.timegm(when.utctimetuple())
+    return ObjectId(seconds.to_bytes(4, "big") + bytes([ID_PREFIX[kind]]) + index.to_bytes(7, "big"))
+
+
+def _timestamp(rng: random.Random) -> datetime:
+    """Fecha en los últimos `days` días, con la distribución horaria de HOUR_WEIGHTS."""
+    day = _worker["end"] - timedelta(days=rng.randrange(_worker["days"]) + 1)
+    hour = rng.choices(range(24), weights=HOUR_WEIGHTS)[0]
+    return day + timedelta(hours=hour, seconds=rng.randrange(3600))
+
+
+def _around(rng: random.Random, city: tuple) -> tuple[float, float]:
+    """Punto aleatorio alrededor del centro de una ciudad (dispersión normal en km)."""
+    _, latitude, longitude, _, spread_km = city
+    north_km, east_km = rng.gauss(0, spread_km), rng.gauss(0, spread_km)
+    latitude += north_km / 111.0
+    longitude += east_km / (111.0 * math.cos(math.radians(latitude)))
+    return round(latitude, 6), round(longitude, 6)
+
+
+def _scatter(rank: int, salt: int) -> int:
+    """
+    Usuario que ocupa el puesto `rank` en una clasificación de popularidad.
+
+    Cada clasificación (autores, visitados, visitantes) usa una permutación
+    distinta, para que el usuario más visitado no sea también el autor más activo.
+    """
+    return (rank * SCATTER_PRIME + salt) % _worker["users"]
+
+
+def _email(index: int) -> str:
+    return f"user{index:07d}@seed.example.com"
+
+
+def _name(index: int) -> str:
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    return f"{first} {last}"
+
+
+def _establishment(index: int) -> dict:
+    """Establecimiento `index` (siempre el mismo para la misma semilla)."""
+    cached = _worker["establishments"].get(index)
+    if cached is not None:
+        return cached
+    rng = random.Random(f"{_worker['seed']}:establishment:{index}")
+    city = CITIES[_pick(rng, _worker["cities"])]
+    latitude, longitude = _around(rng, city)
+    establishment = {
+        "name": f"{rng.choice(KINDS)} {rng.choice(NAMES)}",
+        "address": f"{rng.choice(STREETS)} {rng.randint(1, 200)}, {city[0]}",
+        "latitude": latitude,
+        "longitude": longitude,
+        "quality": min(5.0, max(0.0, rng.gauss(3.6, 0.8))),
+    }
+    if len(_worker["establishments"]) < 200_000:
+        _worker["establishments"][index] = establishment
+    return establishment
+
+
+def _user(rng: random.Random, index: int) -> dict:
+    created_at = _timestamp(rng)
+    user = User(
+        email=_email(index),
+        name=_name(index),
+        picture=None,
+        created_at=created_at,
+        last_login=created_at + timedelta(hours=rng.randrange(24 * 7))
+    ).model_dump(by_alias=True, exclude={"id"})
+    user["_id"] = _object_id("users", index, created_at)
+    return user
+
+
+def _review(rng: random.Random, index: int) -> dict:
+    establishment = _establishment(_pick(rng, _worker["establishment_weights"]))
+    author = _scatter(_pick(rng, _worker["author_weights"]), 0)
+    created_at = _timestamp(rng)
+    review = Review(
+        establishment_name=establishment["name"],
+        address=establishment["address"],
+        latitude=establishment["latitude"],
+        longitude=establishment["longitude"],
+        rating=min(5, max(0, round(rng.gauss(establishment["quality"], 0.9)))),
+        images=[f"https://res.cloudinary.com/seed/image/upload/{index}-{n}.jpg" for n in range(rng.choice([0, 0, 0, 1, 2, 3]))],
+        user_email=_email(author),
+        user_name=_name(author),
+        token_used="seed",
+        created_at=created_at,
+        updated_at=created_at,
+        token_expires_at=created_at + timedelta(hours=1)
+    ).model_dump(by_alias=True, exclude={"id"})
+    review["_id"] = _object_id("reviews", index, created_at)
+    return review
+
+
+def _marker(rng: random.Random, index: int) -> dict:
+    establishment = _establishment(_pick(rng, _worker["establishment_weights"]))
+    created_at = _timestamp(rng)
+    marker = Marker(
+        user_email=_email(_scatter(_pick(rng, _worker["author_weights"]), 0)),
+        location_name=establishment["address"],
+        latitude=establishment["latitude"],
+        longitude=establishment["longitude"],
+        image_url=f"https://res.cloudinary.com/seed/image/upload/marker-{index}.jpg",
+        created_at=created_at
+    ).model_dump(by_alias=True, exclude={"id"})
+    marker["_id"] = _object_id("markers", index, created_at)
+    return marker
+
+
+def _visit(rng: random.Random, index: int) -> dict:
+    visited = _scatter(_pick(rng, _worker["visited_weights"]), 1)
+    visitor = _scatter(_pick(rng, _worker["visitor_weights"]), 2)
+    if visitor == visited:
+        visitor = (visitor + 1) % _worker["users"]  # Nunca auto-visitas
+    timestamp = _timestamp(rng)
+    visit = Visit(
+        visitor_email=_email(visitor),
+        visited_email=_email(visited),
+        visitor_token="seed",
+        timestamp=timestamp
+    ).model_dump(by_alias=True, exclude={"id"})
+    visit["_id"] = _object_id("visits", index, timestamp)
+    return visit
+
+
+GENERATORS = {"users": _user, "reviews": _review, "markers": _marker, "visits": _visit}
+
+
+def _init_worker(options: dict) -> None:
+    """Prepara cada proceso: cliente de MongoDB propio y pesos de las distribuciones."""
+    _worker.update(options)
+    _worker["client"] = MongoClient(options["uri"])
+    _worker["db"] = _worker["client"][options["database"]]
+    _worker["cities"] = list(itertools.accumulate(city[3] for city in CITIES))
+    _worker["establishment_weights"] = _zipf_cumulative(options["establishment_count"], ESTABLISHMENT_EXPONENT)
+    _worker["author_weights"] = _zipf_cumulative(options["users"], AUTHOR_EXPONENT)
+    _worker["visited_weights"] = _zipf_cumulative(options["users"], VISITED_EXPONENT)
+    _worker["visitor_weights"] = _zipf_cumulative(options["users"], VISITOR_EXPONENT)
+    _worker["establishments"] = {}
+
+
+def _insert_chunk(task: tuple[str, int, int, int]) -> tuple[str, int]:
+    """
+    Genera e inserta un lote.
+
+    Args:
+        task: (tipo, nº de lote, primera posición, tamaño)
+
+    Returns:
+        tuple: (tipo, documentos insertados)
+    """
+    kind, chunk, start, count = task
+    rng = random.Random(f"{_worker['seed']}:{kind}:{chunk}")
+    documents = [GENERATORS[kind](rng, start + offset) for offset in range(count)]
+    database = _worker["db"]
+    if kind == "visits":
+        database["visit_rollups"].bulk_write(rollup_operations(documents), ordered=False)
+        if _worker["store_raw_visits"]:
+            database["visits"].insert_many(documents, ordered=False)
+    else:
+        database[COLLECTIONS[kind]].insert_many(documents, ordered=False)
+    return kind, count
+
+
+def _tasks(kind: str, total: int, batch_size: int) -> list[tuple[str, int, int, int]]:
+    return [(kind, chunk, start, min(batch_size, total - start))
+            for chunk, start in enumerate(range(0, total, batch_size))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("SEED_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="reviews_seed")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--reviews", type=int, default=2_000_000)
+    parser.add_argument("--establishments", type=int, help="Establecimientos distintos (por defecto reseñas / 10)")
+    parser.add_argument("--markers", type=int, default=500_000)
+    parser.add_argument("--visits", type=int, default=5_000_000)
+    parser.add_argument("--days", type=int, default=28, help="Días hacia atrás de las fechas generadas")
+    parser.add_argument("--end-date", default=datetime.utcnow().strftime("%Y-%m-%d"),
+                        help="Fecha final (AAAA-MM-DD); fijarla para reproducir los mismos datos otro día")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--drop", action="store_true", help="Vaciar las colecciones antes de generar")
+    parser.add_argument("--skip-indexes", action="store_true", help="No crear los índices de la aplicación al terminar")
+    args = parser.parse_args()
+    if min(args.users, args.batch_size, args.workers, args.days) <= 0 or args.users < 2:
+        parser.error("--users (mínimo 2), --batch-size, --workers y --days deben ser positivos")
+
+    from core.config import settings
+    if args.database == settings.database_name:
+        parser.error(f"{args.database} es la base de datos de la aplicación (DATABASE_NAME): usa otra")
+
+    options = {
+        "uri": args.uri,
+        "database": args.database,
+        "seed": args.seed,
+        "users": args.users,
+        "days": args.days,
+        "end": datetime.strptime(args.end_date, "%Y-%m-%d"),
+        "establishment_count": args.establishments or max(1, args.reviews // 10),
+        "store_raw_visits": settings.visits_store_raw_events,
+    }
+
+    if args.drop:
+        client = MongoClient(args.uri)
+        for collection in ["users", "reviews", "markers", "visits", "visit_rollups", "versions"]:
+            client[args.database].drop_collection(collection)
+        client.close()
+
+    print(f"Generando en {args.database}: {args.users} usuarios, {args.reviews} reseñas, "
+          f"{args.markers} marcadores, {args.visits} visitas ({args.workers} procesos, semilla {args.seed})")
+    totals = {"users": args.users, "reviews": args.reviews, "markers": args.markers, "visits": args.visits}
+    with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(options,)) as pool:
+        for kind, total in totals.items():
+            if total <= 0:
+                continue
+            start = time.perf_counter()
+            done = 0
+            for _, count in pool.imap_unordered(_insert_chunk, _tasks(kind, total, args.batch_size)):
+                done += count
+                print(f"  {kind}: {done}/{total}", end="\r")
+            elapsed = time.perf_counter() - start
+            print(f"✅ {kind}: {total} documentos en {elapsed:.1f}s ({total / elapsed:.0f} docs/s)")
+
+    if not args.skip_indexes:
+        import asyncio
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from core.indexes import ensure_indexes
+
+        async def create_indexes():
+            client = AsyncIOMotorClient(args.uri)
+            await ensure_indexes(client[args.database])
+            client.close()
+
+        asyncio.run(create_indexes())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,116 @@
 """
 Servicio de Autenticación.
 Maneja la verificación de tokens de Google y la gestión de sesiones.
+
+Los tokens ya verificados y los logins recientes se guardan en la caché
+compartida (CACHE_BACKEND), de modo que todos los workers los aprovechan.
+
+google-auth (y requests) no se importan al arrancar sino en el startup, en
+un hilo aparte, junto con la precarga de los certificados. La verificación
+de cada token también se ejecuta en un hilo: nada de google-auth bloquea
+el event loop.
 """
-from google.oauth2 import id_token
-from google.auth.transport import requests
+import asyncio
+import hashlib
+import re
+import time
+from functools import cache
+from core.cache_backend import get_cache_backend
 from core.config import settings
+from core.metrics import upstream_timer, UPSTREAM_CACHE_HITS
 from fastapi import HTTPException, status
 from models.user import User
-from datetime import datetime
+from datetime import datetime, timedelta
+from repositories.factory import user_repository
+
+# Certificados con los que Google firma los ID tokens (los que usa verify_oauth2_token)
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+
+
+class _CachingRequest:
+    """
+    Transporte de google-auth que reutiliza la sesión HTTP y cachea las
+    respuestas GET (los certificados de Google) según su Cache-Control.
+    
+    Sin él, verify_oauth2_token descarga los certificados en cada
+    verificación, de forma bloqueante.
+    """
+    
+    def __init__(self):
+        """Inicializa el transporte (la sesión de requests se crea en el primer uso)."""
+        self._request = None
+        self._responses = {}  # url -> (caduca_en, respuesta)
+    
+    def transport(self):
+        """
+        Transporte de google-auth subyacente, creado (e importado) la primera vez.
+        
+        Returns:
+            google.auth.transport.requests.Request: Transporte con sesión reutilizable
+        """
+        if self._request is None:
+            from google.auth.transport import requests
+            self._request = requests.Request()
+        return self._request
+    
+    def __call__(self, url, method="GET", **kwargs):
+        if method == "GET":
+            cached = self._responses.get(url)
+            if cached is not None and cached[0] > time.monotonic():
+                UPSTREAM_CACHE_HITS.labels("google_certs").inc()
+                return cached[1]
+        
+        request = self.transport()
+        with upstream_timer("google_certs") as upstream:
+            response = request(url, method=method, **kwargs)
+            upstream["status"] = response.status
+        if method == "GET" and response.status == 200:
+            match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+            if match:
+                self._responses[url] = (time.monotonic() + int(match.group(1)), response)
+        return response
+
+
+_google_request = _CachingRequest()
+
+
+@cache
+def _id_token():
+    """
+    Importa google-auth y crea su transporte (una sola vez).
+    
+    Returns:
+        Módulo google.oauth2.id_token
+    """
+    from google.oauth2 import id_token
+    _google_request.transport()
+    return id_token
+
+
+def _verify_token(token: str) -> dict:
+    """Verifica firma, caducidad y audiencia de un ID token (bloqueante)."""
+    return _id_token().verify_oauth2_token(token, _google_request, settings.google_client_id)
+
+
+async def preload_google_certs() -> None:
+    """
+    Importa google-auth y descarga los certificados de Google antes de la
+    primera verificación, en un hilo aparte.
+    
+    Se llama en el startup; un fallo no impide arrancar. Sin GOOGLE_CLIENT_ID
+    solo se importa google-auth.
+    """
+    try:
+        await asyncio.to_thread(_id_token)
+        if settings.google_client_id:
+            await asyncio.to_thread(_google_request, GOOGLE_CERTS_URL)
+            print("✅ Certificados de Google precargados")
+    except Exception as e:
+        print(f"⚠️ No se pudieron precargar los certificados de Google: {str(e)}")
+
+# Espacios de nombres en la caché compartida
+TOKENS_NAMESPACE = "google-tokens"
+LOGINS_NAMESPACE = "recent-logins"
 
 async def verify_google_token(token: str) -> dict:
     """
@@ -21,20 +124,26 @@ async def verify_google_token(token: str) -> dict:
         
     Raises:
         HTTPException: Si el token es inválido.
+    
+    Nota:
+        El resultado se cachea hasta que caduca el token (campo exp), por
+        su hash para no guardar el token en claro.
     """
+    cache = get_cache_backend()
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    cached = await cache.get(TOKENS_NAMESPACE, cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        # Verificar el token con las librerías de Google
-        id_info = id_token.verify_oauth2_token(
-            token, 
-            requests.Request(), 
-            settings.google_client_id
-        )
+        # Verificar el token con las librerías de Google (en un hilo: puede descargar los certificados)
+        id_info = await asyncio.to_thread(_verify_token, token)
 
         # Verificar que el token sea para nuestra app (aunque verify_oauth2_token ya lo hace si pasamos client_id)
         if id_info['aud'] != settings.google_client_id:
             raise ValueError('Token no emitido para este cliente.')
 
-        return {
+        user_data = {
             "email": id_info.get("email"),
             "name": id_info.get("name"),
             "picture": id_info.get("picture"),
@@ -53,38 +162,39 @@ async def verify_google_token(token: str) -> dict:
             detail="Error verificando token de Google",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    expires_in = id_info.get("exp", 0) - time.time()
+    if expires_in > 0:
+        await cache.set(TOKENS_NAMESPACE, cache_key, user_data, expires_in)
+    return user_data
 
 async def get_or_create_user(user_data: dict, db) -> User:
     """
     Busca un usuario por email, si no existe lo crea.
     Actualiza la fecha de último login.
+    
+    Es una única operación atómica (find_one_and_update con upsert) respaldada
+    por el índice único de email, así que dos primeros logins simultáneos no
+    duplican el usuario. Las escrituras de last_login se agrupan: dentro de
+    LAST_LOGIN_COALESCE_SECONDS solo se actualiza si cambia el nombre o la foto.
     """
     email = user_data["email"]
-    user_collection = db["users"]
+    name = user_data.get("name")
+    picture = user_data.get("picture")
     
-    existing_user = await user_collection.find_one({"email": email})
+    # Usuarios que han hecho login recientemente (en cualquier worker).
+    # Mientras no caduque la entrada, un nuevo login no escribe en MongoDB.
+    cache = get_cache_backend()
+    recent = await cache.get(LOGINS_NAMESPACE, email)
+    if recent is not None and recent["name"] == name and recent["picture"] == picture:
+        return User(**recent)
     
-    if existing_user:
-        # Actualizar login
-        await user_collection.update_one(
-            {"email": email},
-            {"$set": {
-                "last_login": datetime.utcnow(),
-                "picture": user_data.get("picture"), # Actualizar foto por si cambió
-                "name": user_data.get("name")
-            }}
-        )
-        # Convert ObjectId to string
-        existing_user["_id"] = str(existing_user["_id"])
-        return User(**existing_user)
-    else:
-        # Crear nuevo
-        new_user = User(
-            email=email,
-            name=user_data.get("name"),
-            picture=user_data.get("picture"),
-            last_login=datetime.utcnow()
-        )
-        result = await user_collection.insert_one(new_user.model_dump(by_alias=True, exclude={"id"}))
-        new_user.id = str(result.inserted_id)
-        return new_user
+    now = datetime.utcnow()
+    coalesce_before = now - timedelta(seconds=settings.last_login_coalesce_seconds)
+    user = await user_repository(db).record_login(email, name, picture, now, coalesce_before)
+    
+    # Convert ObjectId to string
+    user["_id"] = str(user["_id"])
+    user = User(**user)
+    await cache.set(LOGINS_NAMESPACE, email, user.model_dump(mode="json", by_alias=True), settings.last_login_coalesce_seconds)
+    return user
@@ -5,8 +5,11 @@ Actúa como intermediario entre los endpoints y el repository,
 implementando la lógica de negocio.
 Plantilla genérica para adaptar según las entidades del examen.
 """
-from repositories.example_repository import ExampleRepository
-from schemas.example import ExampleCreate, ExampleUpdate, ExampleResponse
+from repositories.factory import example_repository
+from models.example import ExampleModel
+from schemas.example import (
+    ExampleCreate, ExampleUpdate, ExampleResponse, ExampleBulkRequest, ExampleBulkResponse, ExampleBulkItemResult
+)
 
 class ExampleService:
     """
@@ -22,21 +25,19 @@ class ExampleService:
         Args:
             database: Instancia de la base de datos MongoDB
         """
-        self.repository = ExampleRepository(database)
+        self.repository = example_repository(database)
     
-    async def create_example(self, example_data: ExampleCreate) -> ExampleResponse:
+    @staticmethod
+    def _to_response(example_model: ExampleModel) -> ExampleResponse:
         """
-        Crea un nuevo example en la base de datos.
+        Convierte el modelo de base de datos en el schema de respuesta.
         
         Args:
-            example_data: Schema con los datos del example a crear
+            example_model: Example leído de MongoDB
             
         Returns:
-            ExampleResponse: Example creado con su ID asignado
+            ExampleResponse: Example listo para devolver por la API
         """
-        example_dict = example_data.model_dump()
-        example_model = await self.repository.create(example_dict)
-        
         return ExampleResponse(
             id=str(example_model.id),
             name=example_model.name,
@@ -45,6 +46,21 @@ class ExampleService:
             updated_at=example_model.updated_at
         )
     
+    async def create_example(self, example_data: ExampleCreate) -> ExampleResponse:
+        """
+        Crea un nuevo example en la base de datos.
+        
+        Args:
+            example_data: Schema con los datos del example a crear
+            
+        Returns:
+            ExampleResponse: Example creado con su ID asignado
+        """
+        example_dict = example_data.model_dump()
+        example_model = await self.repository.create(example_dict)
+        
+        return self._to_response(example_model)
+    
     async def get_example_by_id(self, example_id: str) -> ExampleResponse | None:
         """
         Obtiene un example por su ID.
@@ -60,13 +76,7 @@ class ExampleService:
         if not example_model:
             return None
         
-        return ExampleResponse(
-            id=str(example_model.id),
-            name=example_model.name,
-            description=example_model.description,
-            created_at=example_model.created_at,
-            updated_at=example_model.updated_at
-        )
+        return self._to_response(example_model)
     
     async def get_all_examples(self) -> list[ExampleResponse]:
         """
@@ -77,16 +87,7 @@ class ExampleService:
         """
         examples = await self.repository.find_all()
         
-        return [
-            ExampleResponse(
-                id=str(example.id),
-                name=example.name,
-                description=example.description,
-                created_at=example.created_at,
-                updated_at=example.updated_at
-            )
-            for example in examples
-        ]
+        return [self._to_response(example) for example in examples]
     
     async def update_example(self, example_id: str, example_update: ExampleUpdate) -> ExampleResponse | None:
         """
@@ -105,13 +106,7 @@ class ExampleService:
         if not example_model:
             return None
         
-        return ExampleResponse(
-            id=str(example_model.id),
-            name=example_model.name,
-            description=example_model.description,
-            created_at=example_model.created_at,
-            updated_at=example_model.updated_at
-        )
+        return self._to_response(example_model)
     
     async def delete_example(self, example_id: str) -> bool:
         """
@@ -125,26 +120,35 @@ class ExampleService:
         """
         return await self.repository.delete(example_id)
     
-    async def search_by_name(self, name: str) -> list[ExampleResponse]:
+    async def search_by_name(self, name: str, substring: bool = False, limit: int = 100) -> list[ExampleResponse]:
         """
-        Busca examples por nombre (búsqueda parcial).
+        Busca examples por nombre (por prefijo o en cualquier posición).
         
         Args:
             name: Nombre a buscar
+            substring: Si True, busca el texto en cualquier posición del nombre
+            limit: Número máximo de resultados
             
         Returns:
             list[ExampleResponse]: Examples que coinciden
         """
-        examples = await self.repository.find_by_name(name)
-        
-        return [
-            ExampleResponse(
-                id=str(example.id),
-                name=example.name,
-                description=example.description,
-                created_at=example.created_at,
-                updated_at=example.updated_at
-            )
-            for example in examples
-        ]
+        examples = await self.repository.find_by_name(name, substring=substring, limit=limit)
+        
+        return [self._to_response(example) for example in examples]
 
+    async def bulk(self, request: ExampleBulkRequest) -> ExampleBulkResponse:
+        """
+        Aplica en bloque creaciones, actualizaciones y eliminaciones.
+        
+        Args:
+            request: Operaciones a aplicar
+            
+        Returns:
+            ExampleBulkResponse: Resultado de cada operación
+        """
+        results = await self.repository.bulk_write(
+            creates=[example.model_dump() for example in request.creates],
+            updates=[(update.id, update.model_dump(exclude={"id"}, exclude_unset=True)) for update in request.updates],
+            deletes=request.deletes
+        )
+        return ExampleBulkResponse(results=[ExampleBulkItemResult(**result) for result in results])
@@ -1,14 +1,49 @@
 """
 Servicio de Geocodificación.
 Utiliza LocationIQ API (OpenStreetMap data, mejor para cloud hosting).
+Las coordenadas se guardan en la caché compartida (CACHE_BACKEND), así que
+una dirección solo se consulta a LocationIQ una vez entre todos los workers.
 """
+import asyncio
+import time
 import httpx
 from fastapi import HTTPException
 import os
+from core.config import settings
+from core.cache_backend import get_cache_backend
+from core.http import get_http_client
+from core.metrics import upstream_timer, UPSTREAM_CACHE_HITS
+from core.search import normalize_text
 
 # LocationIQ API (usa LOCATIONIQ_TOKEN si existe, sino falla en producción)
 LOCATIONIQ_TOKEN = os.getenv("LOCATIONIQ_TOKEN")
 BASE_URL = "https://us1.locationiq.com/v1/search.php"
+# Espacio de nombres de las coordenadas en la caché compartida
+CACHE_NAMESPACE = "geocoding"
+
+
+class _RateLimiter:
+    """
+    Limita el número de peticiones por segundo espaciándolas de forma uniforme.
+    Compartido por todas las llamadas del proceso a LocationIQ.
+    """
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """Espera hasta que haya hueco para una nueva petición."""
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_rate_limiter = _RateLimiter(settings.geocoding_rate_limit_per_second)
 
 async def get_coordinates(query: str) -> tuple[float, float]:
     """
@@ -20,6 +55,23 @@ async def get_coordinates(query: str) -> tuple[float, float]:
     Returns:
         tuple[float, float]: (latitud, longitud)
         
+    Raises:
+        HTTPException: Si no se encuentra el lugar o falla la API
+    """
+    cache = get_cache_backend()
+    cached = await cache.get(CACHE_NAMESPACE, normalize_text(query))
+    if cached is not None:
+        UPSTREAM_CACHE_HITS.labels("locationiq").inc()
+        return tuple(cached)
+    
+    coordinates = await _fetch_coordinates(query)
+    await cache.set(CACHE_NAMESPACE, normalize_text(query), list(coordinates), settings.geocoding_cache_ttl_seconds)
+    return coordinates
+
+async def _fetch_coordinates(query: str) -> tuple[float, float]:
+    """
+    Consulta LocationIQ (sin caché).
+    
     Raises:
         HTTPException: Si no se encuentra el lugar o falla la API
     """
@@ -36,24 +88,72 @@ async def get_coordinates(query: str) -> tuple[float, float]:
         "key": LOCATIONIQ_TOKEN
     }
     
-    async with httpx.AsyncClient() as client:
-        try:
+    client = get_http_client()
+    await _rate_limiter.wait()
+    try:
+        with upstream_timer("locationiq") as upstream:
             response = await client.get(BASE_URL, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data:
-                raise HTTPException(status_code=404, detail=f"No se encontró el lugar: {query}")
-                
-            location = data[0]
-            return float(location["lat"]), float(location["lon"])
+            upstream["status"] = response.status_code
+        response.raise_for_status()
+        data = response.json()
+        
+        if not data:
+            raise HTTPException(status_code=404, detail=f"No se encontró el lugar: {query}")
             
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(status_code=500, detail="API Key de LocationIQ inválida")
-            raise HTTPException(status_code=503, detail="Error al conectar con servicio de geocoding")
-        except httpx.HTTPError:
-            raise HTTPException(status_code=503, detail="Error al conectar con servicio de geocoding")
+        location = data[0]
+        return float(location["lat"]), float(location["lon"])
+        
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            raise HTTPException(status_code=500, detail="API Key de LocationIQ inválida")
+        raise HTTPException(status_code=503, detail="Error al conectar con servicio de geocoding")
+    except httpx.HTTPError:
+        raise HTTPException(status_code=503, detail="Error al conectar con servicio de geocoding")
+
+async def geocode_many(queries: list[str]) -> dict[str, tuple[float, float] | HTTPException]:
+    """
+    Geocodifica varias direcciones a la vez, sin repetir las duplicadas.
+    
+    Primero se leen de la caché todas las direcciones en una sola operación;
+    las que faltan van en paralelo (hasta GEOCODING_CONCURRENCY a la vez),
+    respetan el límite de peticiones por segundo compartido con
+    get_coordinates y se guardan en la caché también en una sola operación.
+    
+    Args:
+        queries: Direcciones a geocodificar (puede haber repetidas)
+        
+    Returns:
+        dict: Dirección -> (latitud, longitud), o la HTTPException si falló
+    """
+    semaphore = asyncio.Semaphore(settings.geocoding_concurrency)
+    
+    async def geocode(query: str):
+        async with semaphore:
+            try:
+                return await _fetch_coordinates(query)
+            except HTTPException as e:
+                return e
+    
+    # Direcciones que solo difieren en mayúsculas, tildes o espacios comparten entrada
+    by_key = {}
+    for query in queries:
+        by_key.setdefault(normalize_text(query), query)
+    cache = get_cache_backend()
+    cached = await cache.get_many(CACHE_NAMESPACE, list(by_key))
+    
+    pending = [key for key in by_key if key not in cached]
+    UPSTREAM_CACHE_HITS.labels("locationiq").inc(len(cached))
+    fetched = await asyncio.gather(*(geocode(by_key[key]) for key in pending))
+    await cache.set_many(
+        CACHE_NAMESPACE,
+        {key: list(result) for key, result in zip(pending, fetched) if not isinstance(result, HTTPException)},
+        settings.geocoding_cache_ttl_seconds
+    )
+    
+    by_key_results = {key: tuple(coordinates) for key, coordinates in cached.items()}
+    by_key_results.update(zip(pending, fetched))
+    results = {query: by_key_results[normalize_text(query)] for query in queries}
+    return results
 
 async def search_locations(query: str, limit: int = 5) -> list[dict]:
     """
@@ -80,23 +180,26 @@ async def search_locations(query: str, limit: int = 5) -> list[dict]:
         "key": LOCATIONIQ_TOKEN
     }
     
-    async with httpx.AsyncClient() as client:
-        try:
+    client = get_http_client()
+    await _rate_limiter.wait()
+    try:
+        with upstream_timer("locationiq") as upstream:
             response = await client.get(BASE_URL, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Formatear resultados
-            results = []
-            for item in data:
-                results.append({
-                    "display_name": item.get("display_name", ""),
-                    "lat": float(item.get("lat", 0)),
-                    "lon": float(item.get("lon", 0)),
-                    "type": item.get("type", ""),
-                    "class": item.get("class", "")
-                })
-            return results
-            
-        except httpx.HTTPError:
-            return []
+            upstream["status"] = response.status_code
+        response.raise_for_status()
+        data = response.json()
+        
+        # Formatear resultados
+        results = []
+        for item in data:
+            results.append({
+                "display_name": item.get("display_name", ""),
+                "lat": float(item.get("lat", 0)),
+                "lon": float(item.get("lon", 0)),
+                "type": item.get("type", ""),
+                "class": item.get("class", "")
+            })
+        return results
+        
+    except httpx.HTTPError:
+        return []
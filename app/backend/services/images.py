@@ -1,18 +1,49 @@
 """
 Servicio de Imágenes con Cloudinary.
+
+El SDK de Cloudinary no se importa al arrancar sino en el startup, en un
+hilo aparte (preload_uploader). Las subidas también se ejecutan en un hilo:
+el SDK es síncrono y no debe bloquear el event loop.
 """
-import cloudinary
-import cloudinary.uploader
+import asyncio
+from functools import cache
 from fastapi import UploadFile, HTTPException
 from core.config import settings
+from core.metrics import upstream_timer
+
+
+@cache
+def _uploader():
+    """
+    Importa y configura Cloudinary (una sola vez).
+
+    Returns:
+        Módulo cloudinary.uploader listo para subir
+    """
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(
+        cloud_name=settings.cloud_name,
+        api_key=settings.cloudinary_api,
+        api_secret=settings.cloudinary_api_secret,
+        secure=True
+    )
+    return cloudinary.uploader
+
+
+async def preload_uploader() -> None:
+    """
+    Importa y configura Cloudinary en un hilo antes de la primera subida.
+    
+    Se llama en el startup; un fallo no impide arrancar.
+    """
+    try:
+        await asyncio.to_thread(_uploader)
+        print("✅ Cloudinary precargado")
+    except Exception as e:
+        print(f"⚠️ No se pudo precargar Cloudinary: {str(e)}")
 
-# Configuración global de Cloudinary
-cloudinary.config(
-    cloud_name=settings.cloud_name,
-    api_key=settings.cloudinary_api,
-    api_secret=settings.cloudinary_api_secret,
-    secure=True
-)
 
 async def upload_image(file: UploadFile) -> str:
     """
@@ -28,13 +59,17 @@ async def upload_image(file: UploadFile) -> str:
         HTTPException: Si falla la subida
     """
     try:
+        uploader = await asyncio.to_thread(_uploader)
         # Cloudinary uploader espera un archivo o stream.
         # file.file es un SpooledTemporaryFile que actúa como stream.
-        result = cloudinary.uploader.upload(
-            file.file,
-            folder="parcial_iweb_maps",
-            resource_type="image"
-        )
+        with upstream_timer("cloudinary") as upstream:
+            result = await asyncio.to_thread(
+                uploader.upload,
+                file.file,
+                folder="parcial_iweb_maps",
+                resource_type="image"
+            )
+            upstream["status"] = 200
         return result.get("secure_url")
         
     except Exception as e:
@@ -0,0 +1,124 @@
+"""
+Caché de respuestas de las lecturas públicas de reseñas.
+
+GET /v1/reviews/ y GET /v1/reviews/{id} guardan en memoria el JSON ya
+serializado junto con su ETag, de modo que un acierto no consulta MongoDB
+ni vuelve a validar los documentos.
+
+La coherencia entre workers se mantiene con el change stream de reseñas
+(services.review_changes): cualquier escritura (de este u otro worker)
+invalida el listado y el detalle afectado. Si el change stream no está
+disponible (MongoDB sin replica set) las entradas solo caducan por TTL,
+con un TTL más corto.
+"""
+from typing import Awaitable, Callable
+from core.cache import TTLCache
+from core.config import settings
+# Clave del listado completo
+ALL_REVIEWS = "all"
+
+
+class ReviewCache:
+    """
+    Caché de respuestas (ETag + cuerpo JSON) invalidada por change stream.
+    Es un oyente de ReviewChangeStream.
+
+    - Acotada en tamaño y con TTL (TTLCache).
+    - Cada invalidación incrementa una generación: una lectura que empezó
+      antes de una invalidación no guarda su resultado, así no se
+      reintroducen datos viejos en la caché.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, fallback_ttl_seconds: float):
+        """
+        Inicializa la caché (en modo solo TTL hasta que se abra el change stream).
+
+        Args:
+            max_size: Número máximo de respuestas en memoria
+            ttl_seconds: Segundos de vida con el change stream activo
+            fallback_ttl_seconds: Segundos de vida sin change stream
+        """
+        self._entries = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.fallback_ttl_seconds = fallback_ttl_seconds
+        self.watching = False
+        self._generation = 0
+
+    def peek(self, key: str) -> tuple[str, bytes] | None:
+        """
+        Devuelve la respuesta cacheada de `key` sin cargarla.
+
+        Args:
+            key: Clave de la respuesta (ALL_REVIEWS o el ID de la reseña)
+
+        Returns:
+            tuple | None: (etag, cuerpo JSON) o None si no está en la caché
+        """
+        return self._entries.get(key)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[tuple[str, bytes] | None]]) -> tuple[str, bytes] | None:
+        """
+        Devuelve la respuesta cacheada de `key` o la carga con `loader`.
+
+        Args:
+            key: Clave de la respuesta (ALL_REVIEWS o el ID de la reseña)
+            loader: Corrutina que devuelve (etag, cuerpo JSON) o None si no existe
+
+        Returns:
+            tuple | None: (etag, cuerpo JSON) o None si el recurso no existe
+        """
+        cached = self._entries.get(key)
+        if cached is not None:
+            return cached
+
+        generation = self._generation
+        loaded = await loader()
+        if loaded is not None and generation == self._generation:
+            ttl = self.ttl_seconds if self.watching else self.fallback_ttl_seconds
+            self._entries.set(key, loaded, ttl_seconds=ttl)
+        return loaded
+
+    def invalidate(self, review_id: str | None = None) -> None:
+        """
+        Invalida el listado y, si se indica, el detalle de una reseña.
+
+        Args:
+            review_id: ID de la reseña modificada
+        """
+        self._generation += 1
+        self._entries.delete(ALL_REVIEWS)
+        if review_id is not None:
+            self._entries.delete(review_id)
+
+    def invalidate_all(self) -> None:
+        """Vacía la caché completa."""
+        self._generation += 1
+        self._entries.clear()
+
+    def on_open(self, resumed: bool) -> None:
+        """Change stream abierto: a partir de ahora se usa el TTL largo."""
+        # Pudo haber escrituras sin evento mientras no escuchábamos
+        self.invalidate_all()
+        self.watching = True
+
+    def on_change(self, change: dict) -> None:
+        """Invalida las entradas afectadas por un evento del change stream."""
+        operation = change.get("operationType")
+        if operation in ("insert", "update", "replace", "delete"):
+            self.invalidate(str(change["documentKey"]["_id"]))
+        else:
+            # drop, rename, invalidate...: no sabemos qué ha cambiado
+            self.invalidate_all()
+
+    def on_lost(self) -> None:
+        """Change stream caído: se vacía la caché y se pasa al TTL corto."""
+        self.watching = False
+        self.invalidate_all()
+
+
+# Instancia global de la caché de reseñas
+review_cache = ReviewCache(
+    max_size=settings.review_cache_max_entries,
+    ttl_seconds=settings.review_cache_ttl_seconds,
+    fallback_ttl_seconds=settings.review_cache_fallback_ttl_seconds
+)
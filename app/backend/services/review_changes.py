@@ -0,0 +1,149 @@
+"""
+Change stream de la colección de reseñas.
+
+Cada worker abre un único change stream sobre "reviews" y reparte los
+eventos entre sus oyentes (caché de respuestas, feed SSE...). Así el
+número de cursores en MongoDB no depende de cuántos componentes o
+clientes necesitan enterarse de los cambios.
+
+Con REPOSITORY_BACKEND=memory no hay change stream: el repositorio en
+memoria publica los eventos directamente (start_local + publish) con el
+mismo formato, así que la caché y el feed SSE funcionan igual.
+"""
+import asyncio
+from typing import Protocol
+from pymongo.errors import OperationFailure, PyMongoError
+
+# Códigos de error de MongoDB cuando no se admiten change streams (servidor sin replica set)
+CHANGE_STREAM_UNSUPPORTED = {40573, 40324}
+
+
+class ChangeListener(Protocol):
+    """Oyente de los eventos del change stream."""
+
+    def on_open(self, resumed: bool) -> None:
+        """
+        El stream se ha abierto.
+
+        Args:
+            resumed: True si se reanudó sin perder eventos; False si es un
+                stream nuevo y pudo haber cambios sin notificar
+        """
+
+    def on_change(self, change: dict) -> None:
+        """Nuevo evento del change stream."""
+
+    def on_lost(self) -> None:
+        """El stream se ha cortado o no está disponible."""
+
+
+class ReviewChangeStream:
+    """
+    Change stream compartido de la colección "reviews".
+
+    Si se corta, se reanuda con el último resume token; si no es posible,
+    se abre uno nuevo (los oyentes reciben on_open(resumed=False)). Si el
+    servidor no admite change streams, los oyentes quedan en on_lost.
+    """
+
+    def __init__(self):
+        """Inicializa el stream (sin abrirlo)."""
+        self.watching = False
+        self._listeners: list[ChangeListener] = []
+        self._task: asyncio.Task | None = None
+
+    async def start(self, db, listeners: list[ChangeListener]) -> None:
+        """
+        Arranca la tarea que escucha el change stream. Se llama en el startup.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+            listeners: Oyentes a los que se reparten los eventos
+        """
+        self._listeners = list(listeners)
+        self._task = asyncio.create_task(self._watch(db))
+
+    def start_local(self, listeners: list[ChangeListener]) -> None:
+        """
+        Activa el modo local (sin MongoDB): los eventos llegan por publish().
+
+        Args:
+            listeners: Oyentes a los que se reparten los eventos
+        """
+        self._listeners = list(listeners)
+        self.watching = True
+        for listener in self._listeners:
+            listener.on_open(False)
+        print("✅ Eventos de reseñas en memoria (sin change stream)")
+
+    def publish(self, change: dict) -> None:
+        """
+        Reparte un evento con el formato del change stream. Solo en modo local.
+
+        Args:
+            change: Evento (_id, operationType, documentKey, fullDocument)
+        """
+        if not self.watching or self._task is not None:
+            return
+        for listener in self._listeners:
+            listener.on_change(change)
+
+    async def stop(self) -> None:
+        """Detiene el change stream. Se llama en el shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._set_lost()
+
+    async def _watch(self, db) -> None:
+        """Bucle de lectura del change stream con reanudación y reintentos."""
+        resume_token = None
+        delay = 1.0
+        while True:
+            try:
+                async with db["reviews"].watch(
+                    full_document="updateLookup",
+                    resume_after=resume_token
+                ) as stream:
+                    resumed = resume_token is not None
+                    self.watching = True
+                    for listener in self._listeners:
+                        listener.on_open(resumed)
+                    if not resumed:
+                        print("✅ Change stream de reseñas activo")
+                    delay = 1.0
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        for listener in self._listeners:
+                            listener.on_change(change)
+                # El stream solo termina tras un evento "invalidate" (drop/rename):
+                # su token no sirve para reanudar, se abre uno nuevo
+                resume_token = None
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAM_UNSUPPORTED:
+                    print("⚠️ Change streams no disponibles: sin invalidación de caché ni feed en vivo")
+                    self._set_lost()
+                    return
+                print(f"⚠️ Change stream de reseñas interrumpido: {str(e)}")
+                resume_token = None
+            except PyMongoError as e:
+                print(f"⚠️ Change stream de reseñas interrumpido: {str(e)}")
+            self._set_lost()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def _set_lost(self) -> None:
+        """Marca el stream como caído y avisa a los oyentes."""
+        self.watching = False
+        for listener in self._listeners:
+            listener.on_lost()
+
+
+# Instancia global del change stream de reseñas
+review_changes = ReviewChangeStream()
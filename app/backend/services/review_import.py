@@ -0,0 +1,355 @@
+"""
+Servicio de Importación Masiva de Reseñas.
+
+Importa reseñas desde CSV o NDJSON en trabajos reanudables:
+- El fichero no puede superar REVIEW_IMPORT_MAX_BYTES ni REVIEW_IMPORT_MAX_ROWS.
+- Las filas se validan con ReviewCreate y se guardan por bloques en
+  "review_import_chunks" (un documento por bloque de filas o de errores),
+  de modo que ningún documento se acerca al límite de 16 MB de MongoDB.
+  El trabajo ("review_imports") solo guarda el progreso y los contadores.
+- Se procesan por bloques: las direcciones únicas del bloque se geocodifican
+  en paralelo (respetando el límite de LocationIQ) y las reseñas se insertan
+  con insert_many(ordered=False).
+- Tras cada bloque se guarda el progreso, de modo que un trabajo interrumpido
+  se puede reanudar por su ID sin duplicar reseñas ni errores.
+"""
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi import HTTPException
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from core.config import settings
+from core.versions import bump_versions, reviews_key, user_reviews_key
+from models.review import Review
+from schemas.review import ReviewCreate
+from services.geocoding import geocode_many
+
+# Código de error de clave duplicada: la fila ya se insertó en un intento anterior
+DUPLICATE_KEY = 11000
+# Un trabajo "running" sin progreso durante este tiempo se considera abandonado
+LEASE_SECONDS = 300
+# Bloques de filas y de errores de cada trabajo
+CHUNKS_COLLECTION = "review_import_chunks"
+
+
+def parse_rows(content: bytes, file_format: str) -> list[dict]:
+    """
+    Convierte el fichero subido en una lista de filas (diccionarios).
+
+    Args:
+        content: Contenido del fichero en UTF-8
+        file_format: "csv" (con cabecera) o "ndjson" (un objeto JSON por línea)
+
+    Returns:
+        list[dict]: Filas sin validar
+
+    Raises:
+        HTTPException: Si el fichero supera REVIEW_IMPORT_MAX_BYTES (413), no se
+            puede leer o supera el máximo de filas (400)
+    """
+    if len(content) > settings.review_import_max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El fichero supera el máximo de {settings.review_import_max_bytes} bytes"
+        )
+    try:
+        text = content.decode("utf-8-sig")
+        if file_format == "csv":
+            rows = list(csv.DictReader(io.StringIO(text)))
+        else:
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Fichero {file_format} inválido: {str(e)}")
+
+    if not rows:
+        raise HTTPException(status_code=400, detail="El fichero no contiene filas")
+    if len(rows) > settings.review_import_max_rows:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El fichero supera el máximo de {settings.review_import_max_rows} filas"
+        )
+    return rows
+
+
+async def read_upload(file) -> bytes:
+    """
+    Lee el fichero subido sin pasar de REVIEW_IMPORT_MAX_BYTES en memoria.
+
+    Args:
+        file: UploadFile recibido en el endpoint
+
+    Returns:
+        bytes: Contenido del fichero (un byte más del máximo si lo supera)
+    """
+    return await file.read(settings.review_import_max_bytes + 1)
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str:
+    """
+    Deduce el formato del fichero por su extensión o su content-type.
+
+    Returns:
+        str: "csv" o "ndjson"
+    """
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    return "ndjson"
+
+
+async def create_job(db, rows: list[dict], author: dict) -> dict:
+    """
+    Valida las filas y crea el trabajo de importación.
+
+    Las filas válidas se guardan en bloques de REVIEW_IMPORT_CHUNK_SIZE y
+    las inválidas como errores desde el principio (no se vuelven a procesar).
+    El trabajo se crea ya reclamado ("running"), listo para pasarlo a run_job.
+
+    Args:
+        db: Instancia de la base de datos MongoDB
+        rows: Filas leídas del fichero
+        author: Datos del autor (email, name, token)
+
+    Returns:
+        dict: Documento del trabajo creado, con sus errores de validación en "errors"
+    """
+    valid_rows = []
+    errors = []
+    for index, row in enumerate(rows):
+        try:
+            review = ReviewCreate(**row)
+            valid_rows.append({"row": index, **review.model_dump()})
+        except (ValidationError, TypeError) as e:
+            errors.append({"row": index, "error": _validation_message(e)})
+
+    now = datetime.utcnow()
+    job_id = ObjectId()
+    chunk_size = settings.review_import_chunk_size
+    row_chunks = [valid_rows[start:start + chunk_size] for start in range(0, len(valid_rows), chunk_size)]
+    error_chunks = [errors[start:start + chunk_size] for start in range(0, len(errors), chunk_size)]
+    # Los bloques de errores de validación van antes (seq negativo) que los del procesamiento
+    chunks = [_chunk(job_id, "rows", seq, items) for seq, items in enumerate(row_chunks)]
+    chunks += [_chunk(job_id, "errors", seq - len(error_chunks), items) for seq, items in enumerate(error_chunks)]
+    if chunks:
+        await db[CHUNKS_COLLECTION].insert_many(chunks, ordered=False)
+
+    job = {
+        "_id": job_id,
+        "status": "running",
+        "author": author,
+        "total": len(rows),
+        "chunks": len(row_chunks),
+        "next_chunk": 0,
+        "next_row": 0,
+        "inserted": 0,
+        "error_count": len(errors),
+        "lease_until": now + timedelta(seconds=LEASE_SECONDS),
+        "created_at": now,
+        "updated_at": now,
+    }
+    await db["review_imports"].insert_one(job)
+    return {**job, "errors": errors}
+
+
+def _chunk(job_id: ObjectId, kind: str, seq: int, items: list[dict]) -> dict:
+    """Documento de un bloque de filas ("rows") o de errores ("errors") de un trabajo."""
+    return {"job_id": job_id, "kind": kind, "seq": seq, "items": items}
+
+
+async def get_errors(db, job_id: ObjectId) -> list[dict]:
+    """
+    Errores por fila de un trabajo, ordenados por fila.
+
+    Args:
+        db: Instancia de la base de datos MongoDB
+        job_id: ID del trabajo
+
+    Returns:
+        list[dict]: Errores ({"row", "error"})
+    """
+    cursor = db[CHUNKS_COLLECTION].find({"job_id": job_id, "kind": "errors"}).sort("seq", 1)
+    errors = [error async for chunk in cursor for error in chunk["items"]]
+    return sorted(errors, key=lambda error: error["row"])
+
+
+async def get_job(db, job_id: str) -> dict | None:
+    """
+    Obtiene el progreso de un trabajo y sus errores.
+
+    Args:
+        db: Instancia de la base de datos MongoDB
+        job_id: ID del trabajo
+
+    Returns:
+        dict | None: Trabajo (con sus errores en "errors") o None si no existe
+    """
+    if not ObjectId.is_valid(job_id):
+        return None
+    job = await db["review_imports"].find_one({"_id": ObjectId(job_id)})
+    if job is None:
+        return None
+    return {**job, "errors": await get_errors(db, job["_id"])}
+
+
+async def claim_job(db, job_id: str, now: datetime | None = None) -> dict | None:
+    """
+    Marca un trabajo como "running" si nadie lo está procesando.
+
+    Es atómico, así que aunque varios workers (o la CLI) intenten reanudar
+    el mismo trabajo, solo uno lo procesa. Un trabajo "running" cuya
+    concesión (lease_until) ha caducado se considera abandonado.
+
+    Args:
+        db: Instancia de la base de datos MongoDB
+        job_id: ID del trabajo
+        now: Fecha de referencia (por defecto, la actual)
+
+    Returns:
+        dict | None: Trabajo reclamado, o None si no existe, ya terminó o está en curso
+    """
+    if not ObjectId.is_valid(job_id):
+        return None
+    now = now or datetime.utcnow()
+    return await db["review_imports"].find_one_and_update(
+        {
+            "_id": ObjectId(job_id),
+            "$or": [
+                {"status": "failed"},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ],
+        },
+        {"$set": {"status": "running", "lease_until": now + timedelta(seconds=LEASE_SECONDS), "updated_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def run_job(db, job: dict) -> None:
+    """
+    Procesa un trabajo ya reclamado desde el último bloque guardado.
+
+    Los errores de cada bloque se guardan con un upsert por (trabajo, bloque)
+    antes de avanzar el progreso, así que repetir un bloque tras una
+    interrupción no los duplica. Al terminar se borran los bloques de filas.
+
+    Args:
+        db: Instancia de la base de datos MongoDB
+        job: Documento del trabajo devuelto por create_job o claim_job
+    """
+    jobs = db["review_imports"]
+    chunks = db[CHUNKS_COLLECTION]
+    geocoded = {}  # Direcciones ya geocodificadas en este trabajo
+
+    try:
+        for seq in range(job["next_chunk"], job["chunks"]):
+            chunk = await chunks.find_one({"job_id": job["_id"], "kind": "rows", "seq": seq})
+            inserted, errors = await _import_chunk(db, job, chunk["items"], geocoded)
+            # Sustituye los errores de un intento anterior del mismo bloque
+            key = {"job_id": job["_id"], "kind": "errors", "seq": seq}
+            if errors:
+                await chunks.update_one(key, {"$set": {"items": errors}}, upsert=True)
+            else:
+                await chunks.delete_one(key)
+
+            now = datetime.utcnow()
+            await jobs.update_one({"_id": job["_id"]}, {
+                "$set": {"next_chunk": seq + 1, "lease_until": now + timedelta(seconds=LEASE_SECONDS), "updated_at": now},
+                "$inc": {"next_row": len(chunk["items"]), "inserted": inserted, "error_count": len(errors)},
+            })
+
+        await chunks.delete_many({"job_id": job["_id"], "kind": "rows"})
+        await jobs.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "completed", "lease_until": None, "updated_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        print(f"Error en la importación {job['_id']}: {str(e)}")
+        await jobs.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "failed", "lease_until": None, "updated_at": datetime.utcnow()}}
+        )
+
+
+async def _import_chunk(db, job: dict, chunk: list[dict], geocoded: dict) -> tuple[int, list[dict]]:
+    """
+    Geocodifica e inserta un bloque de filas.
+
+    Args:
+        db: Instancia de la base de datos MongoDB
+        job: Documento del trabajo
+        chunk: Filas del bloque
+        geocoded: Resultados de geocodificación de bloques anteriores (se amplía)
+
+    Returns:
+        tuple: (reseñas insertadas, errores por fila)
+    """
+    pending = [row["address"] for row in chunk if row["address"] not in geocoded]
+    geocoded.update(await geocode_many(pending))
+
+    author = job["author"]
+    now = datetime.utcnow()
+    documents = []
+    rows_by_position = []
+    errors = []
+    for row in chunk:
+        result = geocoded[row["address"]]
+        if isinstance(result, HTTPException):
+            errors.append({"row": row["row"], "error": result.detail})
+            continue
+        lat, lon = result
+        review = Review(
+            establishment_name=row["establishment_name"],
+            address=row["address"],
+            latitude=lat,
+            longitude=lon,
+            rating=row["rating"],
+            user_email=author["email"],
+            user_name=author.get("name") or "Usuario",
+            token_used=author["token"],
+            created_at=now,
+            updated_at=now,
+            token_expires_at=now + timedelta(hours=1)
+        )
+        document = review.model_dump(by_alias=True, exclude={"id"})
+        document["_id"] = _review_id(job["_id"], row["row"])
+        documents.append(document)
+        rows_by_position.append(row["row"])
+
+    if not documents:
+        return 0, errors
+
+    inserted = len(documents)
+    try:
+        await db["reviews"].insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            if write_error["code"] == DUPLICATE_KEY:
+                continue  # Insertada en un intento anterior: cuenta como importada
+            inserted -= 1
+            errors.append({"row": rows_by_position[write_error["index"]], "error": write_error.get("errmsg", "Error de escritura")})
+
+    await bump_versions(db, reviews_key(), user_reviews_key(author["email"]))
+    return inserted, errors
+
+
+def _review_id(job_id: ObjectId, row: int) -> ObjectId:
+    """
+    Genera un _id determinista para la reseña de una fila.
+
+    Si el trabajo se reanuda tras insertar un bloque pero antes de guardar el
+    progreso, reinsertar el bloque da "clave duplicada" en lugar de duplicar
+    reseñas. Los 4 primeros bytes son la fecha del trabajo, como en un ObjectId normal.
+    """
+    digest = hashlib.sha256(f"{job_id}:{row}".encode()).digest()
+    return ObjectId(job_id.binary[:4] + digest[:8])
+
+
+def _validation_message(error: Exception) -> str:
+    """Resume un error de validación en una línea legible."""
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+    return str(error)
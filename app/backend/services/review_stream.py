@@ -0,0 +1,237 @@
+"""
+Feed en vivo de reseñas por Server-Sent Events (SSE).
+
+Los eventos del change stream de reseñas (uno por worker) se serializan
+una sola vez y se reparten a todos los clientes conectados. Cada cliente
+solo ocupa una cola acotada en memoria, no un cursor de MongoDB.
+
+- Si un cliente no consume su cola a tiempo (cola llena) se le expulsa
+  con un evento "evicted"; el navegador se reconecta solo.
+- Al reconectar, la cabecera Last-Event-ID permite reenviar los eventos
+  perdidos si siguen en el histórico reciente. Si no, se envía un evento
+  "reset" y el cliente debe recargar el listado completo.
+
+Formato de los eventos:
+    event: review   data: {"op": "upsert", "id": "...", "review": {...}}
+    event: review   data: {"op": "delete", "id": "..."}
+    event: reset    data: {}
+    event: evicted  data: {}
+"""
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator
+from pydantic import ValidationError
+from core.config import settings
+from models.review import Review
+
+# Los navegadores esperan este tiempo antes de reconectar (ms)
+RETRY_MILLISECONDS = 3000
+
+
+def _format_event(event: str, data: str, event_id: str | None = None) -> bytes:
+    """Codifica un evento en el formato text/event-stream."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+RESET_EVENT = _format_event("reset", "{}")
+EVICTED_EVENT = _format_event("evicted", "{}")
+# Marca de fin de stream para un suscriptor (expulsado o cierre del servidor)
+_CLOSE = None
+
+
+class Subscriber:
+    """Cliente conectado al feed: una cola acotada de eventos ya codificados."""
+
+    def __init__(self, queue_size: int):
+        """
+        Args:
+            queue_size: Número máximo de eventos pendientes de enviar
+        """
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def push(self, payload: bytes) -> bool:
+        """
+        Encola un evento sin esperar.
+
+        Returns:
+            bool: False si la cola está llena (cliente lento)
+        """
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, final_event: bytes | None = None) -> None:
+        """
+        Cierra el suscriptor descartando lo pendiente.
+
+        Args:
+            final_event: Último evento a enviar antes de cerrar
+        """
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        if final_event is not None:
+            self.queue.put_nowait(final_event)
+        self.queue.put_nowait(_CLOSE)
+
+
+class ReviewEventHub:
+    """
+    Reparte los cambios de reseñas a los clientes SSE.
+    Es un oyente de ReviewChangeStream.
+    """
+
+    def __init__(self, queue_size: int, history_size: int, max_subscribers: int, heartbeat_seconds: float):
+        """
+        Args:
+            queue_size: Eventos pendientes por cliente antes de expulsarlo
+            history_size: Eventos recientes guardados para Last-Event-ID
+            max_subscribers: Número máximo de clientes conectados a este worker
+            heartbeat_seconds: Segundos entre comentarios de keep-alive
+        """
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat_seconds = heartbeat_seconds
+        self.evicted = 0
+        self._history: deque[tuple[str, bytes]] = deque(maxlen=history_size)
+        self._subscribers: set[Subscriber] = set()
+
+    @property
+    def subscribers(self) -> int:
+        """Número de clientes conectados a este worker."""
+        return len(self._subscribers)
+
+    def is_full(self) -> bool:
+        """Indica si se ha alcanzado el máximo de clientes."""
+        return len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(self, last_event_id: str | None = None) -> Subscriber:
+        """
+        Registra un cliente y le encola los eventos perdidos (si se conocen).
+
+        Args:
+            last_event_id: Valor de la cabecera Last-Event-ID
+
+        Returns:
+            Subscriber: Suscriptor registrado
+        """
+        subscriber = Subscriber(self.queue_size)
+        if last_event_id:
+            missed = self._events_after(last_event_id)
+            if missed is None or len(missed) > self.queue_size:
+                subscriber.push(RESET_EVENT)
+            else:
+                for payload in missed:
+                    subscriber.push(payload)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Elimina un cliente (desconexión o expulsión)."""
+        self._subscribers.discard(subscriber)
+
+    async def events(self, subscriber: Subscriber) -> AsyncIterator[bytes]:
+        """
+        Genera el cuerpo text/event-stream de un cliente hasta que se cierra.
+
+        Args:
+            subscriber: Suscriptor devuelto por subscribe
+        """
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n".encode()
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscriber.queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"  # Mantiene viva la conexión en proxies
+                    continue
+                if payload is _CLOSE:
+                    return
+                yield payload
+        finally:
+            self.unsubscribe(subscriber)
+
+    def close(self) -> None:
+        """Cierra todos los clientes. Se llama en el shutdown."""
+        for subscriber in list(self._subscribers):
+            subscriber.close()
+        self._subscribers.clear()
+
+    def on_open(self, resumed: bool) -> None:
+        """Change stream abierto; si no se reanudó, pudo haber cambios sin notificar."""
+        if not resumed:
+            self._history.clear()
+            self._broadcast(RESET_EVENT)
+
+    def on_change(self, change: dict) -> None:
+        """Serializa un cambio una sola vez y lo reparte a todos los clientes."""
+        event_id = change["_id"]["_data"]
+        operation = change.get("operationType")
+        review_id = str(change.get("documentKey", {}).get("_id"))
+
+        document = change.get("fullDocument")
+        if operation == "delete" or (document is not None and document.get("deleted_at") is not None):
+            # Borrado físico o marca de borrado (tombstone)
+            data = json.dumps({"op": "delete", "id": review_id})
+        elif operation in ("insert", "update", "replace"):
+            if document is None:
+                return  # Borrada antes de leerla: llegará su evento "delete"
+            document["_id"] = str(document["_id"])
+            try:
+                review = Review(**document).model_dump_json(by_alias=True)
+            except ValidationError as e:
+                print(f"⚠️ Reseña {review_id} no válida en el feed: {str(e)}")
+                return
+            data = f'{{"op": "upsert", "id": {json.dumps(review_id)}, "review": {review}}}'
+        else:
+            # drop, rename, invalidate...: los clientes deben recargar
+            self._history.clear()
+            self._broadcast(RESET_EVENT)
+            return
+
+        payload = _format_event("review", data, event_id)
+        self._history.append((event_id, payload))
+        self._broadcast(payload)
+
+    def on_lost(self) -> None:
+        """Change stream caído: los clientes siguen conectados a la espera."""
+
+    def _broadcast(self, payload: bytes) -> None:
+        """Encola un evento en todos los clientes, expulsando a los lentos."""
+        for subscriber in list(self._subscribers):
+            if not subscriber.push(payload):
+                self.evicted += 1
+                self.unsubscribe(subscriber)
+                subscriber.close(EVICTED_EVENT)
+
+    def _events_after(self, last_event_id: str) -> list[bytes] | None:
+        """
+        Eventos del histórico posteriores a `last_event_id`.
+
+        Returns:
+            list | None: Eventos a reenviar, o None si el ID ya no está en el histórico
+        """
+        for position, (event_id, _) in enumerate(self._history):
+            if event_id == last_event_id:
+                return [payload for _, payload in list(self._history)[position + 1:]]
+        return None
+
+
+# Instancia global del feed de reseñas
+review_hub = ReviewEventHub(
+    queue_size=settings.review_stream_queue_size,
+    history_size=settings.review_stream_history_size,
+    max_subscribers=settings.review_stream_max_subscribers,
+    heartbeat_seconds=settings.review_stream_heartbeat_seconds
+)
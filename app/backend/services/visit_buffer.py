@@ -0,0 +1,136 @@
+"""
+Buffer de escritura diferida (write-behind) para las visitas.
+
+Las visitas se encolan en memoria y una tarea en segundo plano las guarda
+por lotes cuando se llena un lote o pasa el intervalo de vaciado.
+Así la lectura de marcadores no espera a la escritura en MongoDB.
+"""
+import asyncio
+from typing import Awaitable, Callable
+from pymongo.errors import BulkWriteError, PyMongoError
+
+
+class VisitBuffer:
+    """
+    Cola acotada de visitas pendientes de guardar.
+
+    - Se vacía al alcanzar `batch_size` elementos o cada `flush_interval` segundos.
+    - Si la cola está llena, `add` espera como máximo `enqueue_timeout` segundos
+      a que el vaciado libere hueco (backpressure) y si no, descarta la visita.
+    - `stop` guarda todo lo pendiente antes de cerrar la conexión.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[list[dict]], Awaitable[None]],
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        enqueue_timeout: float
+    ):
+        """
+        Inicializa el buffer (sin arrancar la tarea de vaciado).
+
+        Args:
+            writer: Corrutina que guarda un lote de visitas en MongoDB
+            max_size: Número máximo de visitas en memoria
+            batch_size: Tamaño del lote que dispara un vaciado inmediato
+            flush_interval: Segundos máximos que una visita espera en memoria
+            enqueue_timeout: Segundos máximos que `add` espera con la cola llena
+        """
+        self.writer = writer
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.dropped = 0
+        self._queue: asyncio.Queue | None = None
+        self._flush_requested: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    async def start(self) -> None:
+        """Crea la cola y arranca la tarea de vaciado. Se llama en el startup."""
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._flush_requested = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene la tarea de vaciado y guarda las visitas pendientes. Se llama en el shutdown."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._flush_requested.set()
+        await self._task
+        self._task = None
+        await self._flush()
+
+    @property
+    def pending(self) -> int:
+        """Número de visitas en memoria pendientes de guardar."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def add(self, document: dict) -> bool:
+        """
+        Encola una visita para guardarla en diferido.
+
+        Args:
+            document: Documento de la visita listo para insertar
+
+        Returns:
+            bool: True si se encoló (o se guardó), False si se descartó por saturación
+        """
+        if self._task is None:
+            # Sin buffer activo (p. ej. scripts fuera de la app): escritura directa
+            await self.writer([document])
+            return True
+
+        try:
+            self._queue.put_nowait(document)
+        except asyncio.QueueFull:
+            self._flush_requested.set()
+            try:
+                await asyncio.wait_for(self._queue.put(document), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                print(f"⚠️ Buffer de visitas lleno, visita descartada (total descartadas: {self.dropped})")
+                return False
+
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_requested.set()
+        return True
+
+    async def _run(self) -> None:
+        """Bucle de vaciado: espera a un lote completo o al intervalo, lo que ocurra antes."""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self._flush()
+
+    async def _flush(self) -> None:
+        """Guarda en lotes todas las visitas encoladas en este momento."""
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write(batch)
+
+    async def _write(self, batch: list[dict]) -> None:
+        """
+        Guarda un lote con el writer configurado. Los errores (de MongoDB o
+        cualquier otro) se registran y no se propagan para no detener el
+        bucle de vaciado: el lote fallido se pierde, pero los siguientes se guardan.
+        """
+        try:
+            await self.writer(batch)
+        except BulkWriteError as e:
+            print(f"⚠️ Error guardando visitas: {len(e.details.get('writeErrors', []))} de {len(batch)} fallidas")
+        except PyMongoError as e:
+            print(f"⚠️ Error guardando lote de {len(batch)} visitas: {str(e)}")
+        except Exception as e:
+            print(f"❌ Error inesperado guardando lote de {len(batch)} visitas: {type(e).__name__}: {str(e)}")
+
@@ -1,14 +1,52 @@
 """
 Servicio de Gestión de Visitas.
+
+Cada visita incrementa un contador agregado por (visitante, visitado, día).
+Opcionalmente se guarda también el evento completo. El almacenamiento es
+el del repositorio de visitas (repositories/visit_repository.py).
 """
-from models.visit import Visit
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi import HTTPException
+from models.visit import Visit, VisitSummary
+from schemas.visit import VisitPage, VisitStats, VisitStatsBucket
+from core.cache import TTLCache
+from core.config import settings
+from core.cursor import encode_cursor, decode_cursor
 from core.database import get_database
-from typing import List
+from repositories.factory import visit_repository
+from repositories.visit_repository import day_start
+from services.visit_buffer import VisitBuffer
+
+
+async def save_visits(batch: list[dict]) -> None:
+    """
+    Guarda un lote de visitas: contadores agregados y, si está activado,
+    los eventos completos.
+
+    Args:
+        batch: Documentos de visita (visitor_email, visited_email, visitor_token, timestamp)
+    """
+    await visit_repository(get_database()).save(batch, store_raw_events=settings.visits_store_raw_events)
+
+
+# Instancia global del buffer de visitas
+visit_buffer = VisitBuffer(
+    writer=save_visits,
+    max_size=settings.visit_buffer_max_size,
+    batch_size=settings.visit_flush_batch_size,
+    flush_interval=settings.visit_flush_interval_seconds,
+    enqueue_timeout=settings.visit_enqueue_timeout_seconds
+)
+
 
 async def log_visit(visitor_email: str, visited_email: str, visitor_token: str) -> Visit:
     """
     Registra una nueva visita solo si el visitante no es el dueño del mapa.
-    
+
+    La visita se encola en el buffer de escritura diferida: no espera a
+    que se guarde en MongoDB.
+
     Args:
         visitor_email: Email de quien visita
         visited_email: Email del dueño del mapa
@@ -16,27 +54,99 @@ async def log_visit(visitor_email: str, visited_email: str, visitor_token: str)
     """
     if visitor_email == visited_email:
         return None # No registrar auto-visitas
-        
-    db = get_database()
-    
+
     visit = Visit(
         visitor_email=visitor_email,
         visited_email=visited_email,
         visitor_token=visitor_token
     )
-    
-    await db["visits"].insert_one(visit.model_dump(by_alias=True, exclude={"id"}))
+
+    await visit_buffer.add(visit.model_dump(by_alias=True, exclude={"id"}))
     return visit
 
-async def get_user_visits(user_email: str) -> List[Visit]:
+
+def _encode_cursor(visit: dict) -> str:
+    """Codifica la posición (last_seen, _id) de una visita como cursor opaco."""
+    return encode_cursor({"last_seen": visit["last_seen"].isoformat(), "id": str(visit["_id"])})
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
     """
-    Obtiene el historial de visitas recibidas por un usuario.
-    Ordenadas de más reciente a más antigua.
+    Decodifica un cursor generado por _encode_cursor.
+
+    Raises:
+        HTTPException: Si el cursor no es válido (400)
     """
-    db = get_database()
-    cursor = db["visits"].find({"visited_email": user_email}).sort("timestamp", -1)
-    visits = await cursor.to_list(length=100) # Limitar a 100 por seguridad
+    position = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(position["last_seen"]), ObjectId(position["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+async def get_user_visits(user_email: str, cursor: str | None = None, limit: int = 20) -> VisitPage:
+    """
+    Obtiene una página del historial de visitas recibidas por un usuario,
+    agregado por visitante y día. Ordenado por la última visita de cada
+    agregado (last_seen), de más reciente a más antigua.
+
+    La paginación es por cursor sobre (visited_email, last_seen, _id), que
+    coincide con el índice "visit_rollups_recent": cada página es un
+    recorrido del índice a partir de la anterior, sin skip ni ordenación
+    en memoria.
+
+    Args:
+        user_email: Email del usuario visitado
+        cursor: Cursor devuelto en la página anterior (None para la primera)
+        limit: Número máximo de elementos por página
+
+    Returns:
+        VisitPage: Visitas de la página y cursor de la siguiente
+    """
+    before = _decode_cursor(cursor) if cursor else None
+    visits = await visit_repository(get_database()).find_page(user_email, before, limit + 1)
+
+    next_cursor = _encode_cursor(visits[limit - 1]) if len(visits) > limit else None
+    visits = visits[:limit]
     # Convert ObjectId to string
     for visit in visits:
         visit["_id"] = str(visit["_id"])
-    return [Visit(**visit) for visit in visits]
+    return VisitPage(items=[VisitSummary(**visit) for visit in visits], next_cursor=next_cursor)
+
+
+# Caché de estadísticas por usuario: evita repetir la agregación en cada refresco
+_stats_cache = TTLCache(max_size=10000, ttl_seconds=settings.visit_stats_cache_ttl_seconds)
+
+
+async def get_visit_stats(user_email: str, granularity: str = "day", days: int = 30) -> VisitStats:
+    """
+    Calcula visitas totales y visitantes únicos por día o semana.
+
+    La agregación la hace el repositorio (en MongoDB, un $facet sobre
+    "visit_rollups") y el resultado se cachea por usuario durante
+    VISIT_STATS_CACHE_TTL_SECONDS.
+
+    Args:
+        user_email: Email del usuario visitado
+        granularity: "day" o "week" (semanas empezando en lunes)
+        days: Número de días hacia atrás a analizar
+
+    Returns:
+        VisitStats: Totales y desglose por periodo
+    """
+    cache_key = (user_email, granularity, days)
+    cached = _stats_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    since = day_start(datetime.utcnow()) - timedelta(days=days - 1)
+    totals, buckets = await visit_repository(get_database()).stats(user_email, since, granularity)
+    stats = VisitStats(
+        granularity=granularity,
+        since=since,
+        total_visits=totals["visits"],
+        unique_visitors=totals["unique_visitors"],
+        buckets=[VisitStatsBucket(**bucket) for bucket in buckets]
+    )
+    _stats_cache.set(cache_key, stats)
+    return stats
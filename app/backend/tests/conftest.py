@@ -0,0 +1,36 @@
+"""
+Configuración común de los tests.
+
+Las variables de entorno tienen prioridad sobre .env: se fijan antes de
+importar la aplicación para que los tests nunca usen la base de datos ni
+las cuentas reales.
+"""
+import os
+
+os.environ.update({
+    "MONGO_URI": "mongodb://localhost:27017",
+    "DATABASE_NAME": "reviews_tests",
+    "SERVICE_PORT": "8000",
+    "SERVICE_NAME": "reviews-tests",
+    "ENVIRONMENT": "development",
+    "CLOUD_NAME": "tests",
+    "CLOUDINARY_API": "tests",
+    "CLOUDINARY_API_SECRET": "tests",
+    "GOOGLE_CLIENT_ID": "tests.apps.googleusercontent.com",
+    "LOCATIONIQ_TOKEN": "tests",
+    "CACHE_BACKEND": "memory",
+    "REPOSITORY_BACKEND": "mongo",
+    # Modo test: superar el presupuesto de una ruta hace fallar la petición
+    "REQUEST_BUDGET_ENFORCE": "true",
+    "GEOCODING_RATE_LIMIT_PER_SECOND": "100000",
+})
+for name in ("PROFILING_TOKEN", "MONGO_SLOW_QUERY_MS", "WEB_CONCURRENCY"):
+    os.environ.pop(name, None)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    """Los tests async (marcados con @pytest.mark.anyio) se ejecutan sobre asyncio."""
+    return "asyncio"
@@ -0,0 +1,95 @@
+"""
+Tests de los backends de caché (core/cache_backend.py).
+
+Los mismos casos se ejecutan sobre el backend en memoria y sobre el de
+Redis con fakeredis (sin servidor).
+"""
+import anyio
+import fakeredis
+import pytest
+from core.cache_backend import CacheBackend, MemoryCacheBackend, RedisCacheBackend
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def backend(request):
+    """Backend vacío de cada tipo; se cierra al terminar el test."""
+    if request.param == "memory":
+        backend = MemoryCacheBackend()
+    else:
+        backend = RedisCacheBackend(client=fakeredis.FakeAsyncRedis())
+    yield backend
+    await backend.close()
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+async def test_get_and_set(backend):
+    assert await backend.get("geocoding", "madrid") is None
+
+    await backend.set("geocoding", "madrid", {"lat": 40.4, "lon": -3.7}, ttl_seconds=60)
+
+    assert await backend.get("geocoding", "madrid") == {"lat": 40.4, "lon": -3.7}
+
+
+async def test_get_many_returns_only_found_keys(backend):
+    await backend.set_many("geocoding", {"a": 1, "b": 2}, ttl_seconds=60)
+
+    assert await backend.get_many("geocoding", ["a", "b", "c"]) == {"a": 1, "b": 2}
+    assert await backend.get_many("geocoding", []) == {}
+
+
+async def test_namespaces_are_isolated(backend):
+    await backend.set("geocoding", "key", "geo", ttl_seconds=60)
+    await backend.set("tokens", "key", "token", ttl_seconds=60)
+
+    await backend.delete("tokens", "key")
+
+    assert await backend.get("geocoding", "key") == "geo"
+    assert await backend.get("tokens", "key") is None
+
+
+async def test_values_expire_after_ttl(backend):
+    await backend.set("tokens", "short", "value", ttl_seconds=0.05)
+    await backend.set("tokens", "long", "value", ttl_seconds=60)
+
+    await anyio.sleep(0.1)
+
+    assert await backend.get_many("tokens", ["short", "long"]) == {"long": "value"}
+
+
+async def test_basic_types_round_trip(backend):
+    value = {"text": "Málaga", "number": 3, "ratio": 2.5, "flag": True, "empty": None, "items": [1, "dos", [3]]}
+
+    await backend.set("reviews", "value", value, ttl_seconds=60)
+
+    assert await backend.get("reviews", "value") == value
+
+
+async def test_redis_stores_msgpack_under_prefix():
+    client = fakeredis.FakeAsyncRedis()
+    backend = RedisCacheBackend(client=client, prefix="tests")
+
+    await backend.set("geocoding", "madrid", {"lat": 40.4, "point": (1, 2)}, ttl_seconds=60)
+
+    assert await client.keys("*") == [b"tests:geocoding:madrid"]
+    assert 0 < await client.pttl("tests:geocoding:madrid") <= 60000
+    # msgpack devuelve las tuplas como listas
+    assert await backend.get("geocoding", "madrid") == {"lat": 40.4, "point": [1, 2]}
+    await backend.close()
+
+
+async def test_redis_unavailable_is_a_cache_miss():
+    server = fakeredis.FakeServer()
+    backend = RedisCacheBackend(client=fakeredis.FakeAsyncRedis(server=server))
+    server.connected = False
+
+    await backend.set("geocoding", "madrid", "value", ttl_seconds=60)
+    await backend.delete("geocoding", "madrid")
+
+    assert await backend.get("geocoding", "madrid") is None
+    await backend.close()
@@ -0,0 +1,34 @@
+"""
+Tests de la validación de la configuración (core/config.py).
+
+Parten del entorno de tests/conftest.py y sustituyen algunos valores.
+"""
+import pytest
+from core.config import Settings
+
+
+def test_memory_backend_in_a_single_worker():
+    settings = Settings(repository_backend="memory", environment="staging", web_concurrency=1)
+
+    assert settings.repository_backend == "memory"
+
+
+def test_memory_backend_is_rejected_in_production():
+    with pytest.raises(ValueError, match="REPOSITORY_BACKEND=memory no se puede usar en production"):
+        Settings(repository_backend="memory", environment="production")
+
+
+def test_memory_backend_is_rejected_with_several_workers(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+
+    with pytest.raises(ValueError, match="un solo worker"):
+        Settings(repository_backend="memory")
+
+    assert Settings(repository_backend="mongo").web_concurrency == 4
+
+
+@pytest.mark.parametrize("name", ["review_import_chunk_size", "review_import_max_rows"])
+@pytest.mark.parametrize("value", [0, -1])
+def test_review_import_sizes_must_be_positive(name, value):
+    with pytest.raises(ValueError, match="REVIEW_IMPORT_CHUNK_SIZE y REVIEW_IMPORT_MAX_ROWS"):
+        Settings(**{name: value})
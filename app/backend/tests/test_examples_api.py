@@ -0,0 +1,54 @@
+"""
+Tests del acceso a las rutas de examples (/v1/examples).
+
+La plantilla escribe en la base de datos real, así que ninguna ruta
+responde sin un token de Google.
+"""
+import httpx
+import pytest
+from fastapi.routing import APIRoute
+from mongomock_motor import AsyncMongoMockClient
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def database():
+    """Base de datos mongomock vacía conectada a la aplicación."""
+    from core.database import db
+
+    db.client = AsyncMongoMockClient()
+    db.db = db.client["reviews_tests"]
+    yield db.db
+    db.client = None
+    db.db = None
+
+
+def _example_routes() -> list[tuple[str, str]]:
+    from main import app
+
+    return [
+        (method, route.path.replace("{example_id}", "0123456789abcdef01234567"))
+        for route in app.routes if isinstance(route, APIRoute) and route.path.startswith("/v1/examples")
+        for method in route.methods
+    ]
+
+
+def test_examples_routes_are_mounted():
+    assert ("POST", "/v1/examples/bulk") in _example_routes()
+
+
+@pytest.mark.parametrize("method, path", _example_routes())
+async def test_examples_routes_require_authentication(database, method, path):
+    from main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://tests") as client:
+        response = await client.request(
+            method, path, params={"name": "a"}, json={"name": "Anónimo", "creates": [{"name": "Anónimo"}]},
+            headers={"Authorization": "Basic anonimo"}
+        )
+        missing = await client.request(method, path, params={"name": "a"}, json={"name": "Anónimo"})
+
+    assert response.status_code == 401
+    assert missing.status_code == 422
+    assert await database["examples"].count_documents({}) == 0
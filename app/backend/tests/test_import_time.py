@@ -0,0 +1,20 @@
+"""
+Test de los módulos diferidos (benchmarks/import_budget.json).
+
+`import main` no debe cargar los SDKs de lazy_modules: se importan en el
+startup, en un hilo aparte. A diferencia de los tiempos, no depende de la
+máquina.
+"""
+import json
+
+from benchmarks.import_time import BUDGET_PATH, _import_once
+
+
+def test_lazy_modules_are_not_imported_by_main():
+    with open(BUDGET_PATH, encoding="utf-8") as budget_file:
+        lazy_modules = json.load(budget_file)["lazy_modules"]
+
+    _, modules, _ = _import_once("main")
+
+    assert lazy_modules
+    assert modules.isdisjoint(lazy_modules)
@@ -0,0 +1,36 @@
+"""
+Tests de las estadísticas del pool de conexiones (core/monitoring.py).
+"""
+from types import SimpleNamespace
+from core.monitoring import PoolStats
+
+ADDRESS = ("localhost", 27017)
+
+
+def _event():
+    return SimpleNamespace(address=ADDRESS)
+
+
+def test_counts_connections_of_an_open_pool():
+    stats = PoolStats()
+    stats.pool_created(_event())
+    stats.connection_created(_event())
+    stats.connection_created(_event())
+    stats.connection_checked_out(_event())
+    stats.connection_closed(_event())
+
+    assert stats.snapshot()["localhost:27017"] == {
+        "open": 1, "in_use": 1, "created": 2, "closed": 1, "checkout_failures": 0, "cleared": 0,
+    }
+
+
+def test_events_after_pool_closed_are_ignored():
+    stats = PoolStats()
+    stats.pool_created(_event())
+    stats.connection_created(_event())
+    stats.pool_closed(_event())
+
+    stats.connection_closed(_event())
+    stats.connection_checked_in(_event())
+
+    assert stats.snapshot() == {}
@@ -0,0 +1,383 @@
+"""
+Tests de los repositorios (repositories/).
+
+Los mismos casos se ejecutan sobre los repositorios de MongoDB, con
+mongomock-motor (sin servidor), y sobre los repositorios en memoria
+(REPOSITORY_BACKEND=memory), de modo que los dos backends cumplen el
+mismo contrato (repositories/protocols.py).
+
+La búsqueda de texto solo se prueba en memoria: mongomock no implementa
+los índices de texto ($text).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import AutoReconnect
+
+from benchmarks.stubs import count_mongomock_commands
+from core import request_stats
+from core.request_stats import RequestStats
+from models.marker import Marker
+from models.review import Review
+from repositories.example_repository import ExampleRepository
+from repositories.marker_repository import MarkerRepository
+from repositories.memory import (
+    MemoryExampleRepository, MemoryMarkerRepository, MemoryReviewRepository,
+    MemoryUserRepository, MemoryVisitRepository
+)
+from repositories.review_repository import ReviewRepository
+from repositories.user_repository import UserRepository
+from repositories.visit_repository import VisitRepository
+
+pytestmark = pytest.mark.anyio
+
+AUTHOR = "autora@tests.example.com"
+OTHER = "otro@tests.example.com"
+# Lunes, sin microsegundos (MongoDB guarda las fechas con milisegundos)
+MONDAY = datetime(2024, 3, 4, 10, 0)
+
+
+class Repositories:
+    """Repositorios de un backend, vacíos."""
+
+    def __init__(self, backend: str):
+        if backend == "mongo":
+            database = AsyncMongoMockClient()["reviews_tests"]
+            self.reviews = ReviewRepository(database)
+            self.examples = ExampleRepository(database)
+            self.markers = MarkerRepository(database)
+            self.visits = VisitRepository(database)
+            self.users = UserRepository(database)
+        else:
+            self.reviews = MemoryReviewRepository()
+            self.examples = MemoryExampleRepository()
+            self.markers = MemoryMarkerRepository()
+            self.visits = MemoryVisitRepository()
+            self.users = MemoryUserRepository()
+
+
+@pytest.fixture(params=["mongo", "memory"])
+def repos(request) -> Repositories:
+    return Repositories(request.param)
+
+
+def _review(**fields) -> Review:
+    return Review(**{
+        "establishment_name": "Casa Lola", "address": "Calle Granada 46, Málaga", "latitude": 36.72,
+        "longitude": -4.42, "rating": 4, "user_email": AUTHOR, "user_name": "autora", "token_used": "tests",
+        **fields
+    })
+
+
+def _visit(visitor: str, visited: str, timestamp: datetime) -> dict:
+    return {"visitor_email": visitor, "visited_email": visited, "visitor_token": "tests", "timestamp": timestamp}
+
+
+# Reseñas
+
+async def test_create_and_get_review(repos):
+    review = await repos.reviews.create(_review())
+
+    found = await repos.reviews.get_by_id(review.id)
+
+    assert found.id == review.id
+    assert found.establishment_name == "Casa Lola"
+    assert await repos.reviews.exists(review.id)
+    assert await repos.reviews.get_by_id("no-es-un-id") is None
+    assert await repos.reviews.get_by_id(str(ObjectId())) is None
+
+
+async def test_get_many_skips_missing_and_deleted(repos):
+    first = await repos.reviews.create(_review())
+    deleted = await repos.reviews.create(_review())
+    await repos.reviews.delete(deleted.id)
+
+    found = await repos.reviews.get_many([ObjectId(first.id), ObjectId(deleted.id), ObjectId()])
+
+    assert list(found) == [first.id]
+
+
+async def test_get_by_user(repos):
+    own = [await repos.reviews.create(_review()) for _ in range(2)]
+    await repos.reviews.create(_review(user_email=OTHER))
+    await repos.reviews.delete(own[1].id)
+
+    reviews = await repos.reviews.get_by_user(AUTHOR)
+
+    assert [review.id for review in reviews] == [own[0].id]
+
+
+async def test_get_by_user_is_capped_at_1000(repos):
+    for _ in range(1001):
+        await repos.reviews.create(_review())
+
+    assert len(await repos.reviews.get_by_user(AUTHOR)) == 1000
+
+
+async def test_update_and_delete_review(repos):
+    review = await repos.reviews.create(_review(updated_at=MONDAY))
+
+    updated = await repos.reviews.update(review.id, {"rating": 1})
+    assert updated.rating == 1
+    assert updated.updated_at > MONDAY
+
+    assert await repos.reviews.delete(review.id)
+    assert not await repos.reviews.delete(review.id)
+    assert await repos.reviews.update(review.id, {"rating": 2}) is None
+    assert await repos.reviews.get_by_id(review.id) is None
+    assert not await repos.reviews.exists(review.id)
+
+
+async def test_invalid_ids_are_not_found(repos):
+    assert await repos.reviews.update("no-es-un-id", {"rating": 1}) is None
+    assert not await repos.reviews.delete("no-es-un-id")
+    assert await repos.reviews.update_by_author("no-es-un-id", AUTHOR, {"rating": 1}) is None
+    assert not await repos.reviews.delete_by_author("no-es-un-id", AUTHOR)
+
+
+async def test_writes_by_author(repos):
+    review = await repos.reviews.create(_review())
+
+    assert await repos.reviews.get_by_author(review.id, OTHER) is None
+    assert await repos.reviews.get_by_author(review.id, AUTHOR, expected={"rating": 5}) is None
+    assert (await repos.reviews.get_by_author(review.id, AUTHOR, expected={"rating": 4})).id == review.id
+
+    assert await repos.reviews.update_by_author(review.id, OTHER, {"rating": 1}) is None
+    assert await repos.reviews.update_by_author(review.id, AUTHOR, {"rating": 1}, expected={"rating": 5}) is None
+    assert (await repos.reviews.update_by_author(review.id, AUTHOR, {"rating": 1}, expected={"rating": 4})).rating == 1
+
+    assert not await repos.reviews.delete_by_author(review.id, OTHER)
+    assert await repos.reviews.delete_by_author(review.id, AUTHOR)
+
+
+async def test_changes_are_ordered_and_resumable(repos):
+    reviews = [await repos.reviews.create(_review(updated_at=MONDAY + timedelta(minutes=i))) for i in range(3)]
+    await repos.reviews.delete(reviews[0].id)
+    until = datetime.utcnow() + timedelta(seconds=1)
+
+    changes = await repos.reviews.changes(None, until, limit=10)
+    assert [str(change["_id"]) for change in changes] == [reviews[1].id, reviews[2].id, reviews[0].id]
+    assert changes[-1]["deleted_at"] is not None
+
+    first = changes[0]
+    rest = await repos.reviews.changes((first["updated_at"], first["_id"]), until, limit=10)
+    assert [str(change["_id"]) for change in rest] == [reviews[2].id, reviews[0].id]
+
+    active = await repos.reviews.changes(None, until, limit=10, include_deleted=False)
+    assert [str(change["_id"]) for change in active] == [reviews[1].id, reviews[2].id]
+    assert await repos.reviews.changes(None, MONDAY + timedelta(minutes=1), limit=10) == []
+
+
+# Búsqueda de texto (solo en memoria)
+
+async def test_memory_search_weights_name_over_address():
+    reviews = MemoryReviewRepository()
+    in_address = await reviews.create(_review(establishment_name="Bodega Sol", address="Plaza de la Merced, Málaga"))
+    in_name = await reviews.create(_review(establishment_name="La Merced", address="Calle Larios 1, Málaga"))
+    await reviews.create(_review(establishment_name="Casa Lola", address="Calle Granada 46"))
+
+    found = await reviews.search("merced")
+
+    assert [review.id for review in found] == [in_name.id, in_address.id]
+
+
+async def test_memory_search_ignores_stopwords_and_accents():
+    reviews = MemoryReviewRepository()
+    review = await reviews.create(_review(establishment_name="El Pimpi", address="Calle Granada 62, Málaga"))
+
+    assert [found.id for found in await reviews.search("MALAGA")] == [review.id]
+    assert await reviews.search("el de la") == []
+
+
+async def test_memory_search_matches_word_stems():
+    pytest.importorskip("snowballstemmer")
+    reviews = MemoryReviewRepository()
+    review = await reviews.create(_review(establishment_name="Restaurantes del Puerto"))
+
+    assert [found.id for found in await reviews.search("restaurante")] == [review.id]
+
+
+async def test_memory_search_skips_deleted_and_paginates():
+    reviews = MemoryReviewRepository()
+    created = [await reviews.create(_review(establishment_name=f"Bar Central {i}")) for i in range(3)]
+    await reviews.delete(created[0].id)
+
+    found = await reviews.search("central", skip=1, limit=5)
+
+    assert len(found) == 1
+    assert found[0].id in {created[1].id, created[2].id}
+
+
+# Examples
+
+async def test_find_examples_by_name(repos):
+    for name in ["Ángel", "Angélica", "Bangkok", "Zaragoza"]:
+        await repos.examples.create({"name": name, "description": "tests"})
+
+    prefix = await repos.examples.find_by_name("ANGEL")
+    substring = await repos.examples.find_by_name("ngel", substring=True)
+    short = await repos.examples.find_by_name("an", substring=True)
+
+    assert [example.name for example in prefix] == ["Ángel", "Angélica"]
+    assert [example.name for example in substring] == ["Ángel", "Angélica"]
+    # Con menos de tres letras se busca por prefijo
+    assert [example.name for example in short] == ["Ángel", "Angélica"]
+    assert await repos.examples.find_by_name("   ") == []
+
+
+async def test_renamed_example_is_found_by_its_new_name(repos):
+    example = await repos.examples.create({"name": "Primero", "description": "tests"})
+
+    await repos.examples.update(example.id, {"name": "Segundo", "description": None})
+
+    assert await repos.examples.find_by_name("prim") == []
+    assert [found.id for found in await repos.examples.find_by_name("egun", substring=True)] == [example.id]
+
+
+async def test_bulk_write_examples(repos):
+    existing = await repos.examples.create({"name": "Existente", "description": "tests"})
+    doomed = await repos.examples.create({"name": "Borrable", "description": "tests"})
+    missing = str(ObjectId())
+
+    results = await repos.examples.bulk_write(
+        creates=[{"name": "Nuevo", "description": "tests"}],
+        updates=[(existing.id, {"description": "cambiada"}), (missing, {"description": "x"}), ("malo", {})],
+        deletes=[doomed.id, missing],
+    )
+
+    assert [(r["operation"], r["index"], r["status"]) for r in results] == [
+        ("create", 0, "created"),
+        ("update", 0, "updated"), ("update", 1, "not_found"), ("update", 2, "invalid_id"),
+        ("delete", 0, "deleted"), ("delete", 1, "not_found"),
+    ]
+    assert (await repos.examples.find_by_id(existing.id)).description == "cambiada"
+    assert await repos.examples.find_by_id(doomed.id) is None
+    assert [example.name for example in await repos.examples.find_by_name("nuevo")] == ["Nuevo"]
+
+
+async def test_mongo_bulk_write_is_one_read_and_one_write():
+    database = AsyncMongoMockClient()["reviews_tests"]
+    examples = ExampleRepository(database)
+    existing = await examples.create({"name": "Existente", "description": "tests"})
+
+    stats = RequestStats()
+    token = request_stats._current.set(stats)
+    with count_mongomock_commands():
+        await examples.bulk_write(
+            creates=[{"name": f"Nuevo {i}", "description": "tests"} for i in range(20)],
+            updates=[(existing.id, {"description": "cambiada"})] + [(str(ObjectId()), {}) for _ in range(20)],
+            deletes=[str(ObjectId()) for _ in range(20)],
+        )
+    request_stats._current.reset(token)
+
+    assert dict(stats.commands) == {"examples.find": 1, "examples.bulkWrite": 1}
+
+
+async def test_mongo_bulk_write_maps_write_errors_to_items():
+    database = AsyncMongoMockClient()["reviews_tests"]
+    await database.examples.create_index("name", unique=True)
+    examples = ExampleRepository(database)
+    existing = await examples.create({"name": "Existente", "description": "tests"})
+
+    results = await examples.bulk_write(
+        creates=[{"name": "Existente", "description": "repetido"}, {"name": "Nuevo", "description": "tests"}],
+        updates=[(existing.id, {"description": "cambiada"})],
+        deletes=[],
+    )
+
+    assert [result["status"] for result in results] == ["error", "created", "updated"]
+    assert "duplicate key" in results[0]["error"].lower()
+
+
+async def test_mongo_bulk_write_marks_every_item_on_connection_errors(monkeypatch):
+    examples = ExampleRepository(AsyncMongoMockClient()["reviews_tests"])
+    existing = await examples.create({"name": "Existente", "description": "tests"})
+
+    async def unavailable(*args, **kwargs):
+        raise AutoReconnect("servidor no disponible")
+
+    monkeypatch.setattr(examples.collection, "bulk_write", unavailable)
+    results = await examples.bulk_write(
+        creates=[{"name": "Nuevo", "description": "tests"}], updates=[], deletes=[existing.id, "malo"]
+    )
+
+    assert [(result["status"], result.get("error")) for result in results] == [
+        ("error", "servidor no disponible"), ("error", "servidor no disponible"), ("invalid_id", None)
+    ]
+
+
+# Marcadores
+
+async def test_markers_by_user(repos):
+    marker = await repos.markers.create(Marker(
+        user_email=AUTHOR, location_name="Alcazaba", latitude=36.72, longitude=-4.41, image_url="https://tests"
+    ))
+    await repos.markers.create(Marker(
+        user_email=OTHER, location_name="Gibralfaro", latitude=36.72, longitude=-4.41, image_url="https://tests"
+    ))
+
+    markers = await repos.markers.find_by_user(AUTHOR)
+
+    assert [(found.id, found.location_name) for found in markers] == [(marker.id, "Alcazaba")]
+
+
+# Visitas
+
+async def test_visit_history_is_newest_first_and_paginated(repos):
+    await repos.visits.save([
+        _visit("a@tests", AUTHOR, MONDAY),
+        _visit("b@tests", AUTHOR, MONDAY + timedelta(hours=1)),
+        _visit("c@tests", AUTHOR, MONDAY + timedelta(days=1)),
+        _visit("a@tests", OTHER, MONDAY),
+    ], store_raw_events=False)
+    # Una visita nueva sube el agregado de "a" al principio
+    await repos.visits.save([_visit("a@tests", AUTHOR, MONDAY + timedelta(hours=2))], store_raw_events=False)
+
+    first = await repos.visits.find_page(AUTHOR, None, limit=2)
+    last = first[-1]
+    second = await repos.visits.find_page(AUTHOR, (last["last_seen"], last["_id"]), limit=2)
+
+    assert [(visit["visitor_email"], visit["count"]) for visit in first] == [("c@tests", 1), ("a@tests", 2)]
+    assert [visit["visitor_email"] for visit in second] == ["b@tests"]
+    assert first[1]["first_seen"] == MONDAY
+    assert first[1]["last_seen"] == MONDAY + timedelta(hours=2)
+
+
+async def test_visit_stats_by_day(repos):
+    await repos.visits.save([
+        _visit("a@tests", AUTHOR, MONDAY),
+        _visit("a@tests", AUTHOR, MONDAY + timedelta(hours=1)),
+        _visit("b@tests", AUTHOR, MONDAY + timedelta(days=1)),
+        _visit("b@tests", AUTHOR, MONDAY - timedelta(days=7)),
+    ], store_raw_events=False)
+
+    totals, buckets = await repos.visits.stats(AUTHOR, since=MONDAY.replace(hour=0), granularity="day")
+
+    assert totals == {"visits": 3, "unique_visitors": 2}
+    assert [(bucket["period_start"].day, bucket["visits"], bucket["unique_visitors"]) for bucket in buckets] == [
+        (4, 2, 1), (5, 1, 1)
+    ]
+
+
+# Usuarios
+
+async def test_record_login_coalesces_recent_logins(repos):
+    if isinstance(repos.users, UserRepository):
+        pytest.skip("mongomock no evalúa $cond sobre campos inexistentes en las actualizaciones con pipeline")
+    first = await repos.users.record_login(AUTHOR, "Autora", None, now=MONDAY, coalesce_before=MONDAY)
+    again = await repos.users.record_login(
+        AUTHOR, "Autora Nueva", "https://foto", now=MONDAY + timedelta(minutes=1), coalesce_before=MONDAY
+    )
+    later = await repos.users.record_login(
+        AUTHOR, "Autora Nueva", "https://foto", now=MONDAY + timedelta(hours=1),
+        coalesce_before=MONDAY + timedelta(minutes=30)
+    )
+
+    assert first["last_login"] == MONDAY
+    assert (again["_id"], again["name"], again["picture"], again["last_login"]) == (
+        first["_id"], "Autora Nueva", "https://foto", MONDAY
+    )
+    assert later["last_login"] == MONDAY + timedelta(hours=1)
+    assert later["created_at"] == MONDAY
@@ -0,0 +1,290 @@
+"""
+Tests de los presupuestos de operaciones por ruta (core/request_stats.py).
+
+La aplicación se ejecuta con REQUEST_BUDGET_ENFORCE (tests/conftest.py)
+sobre mongomock-motor, con sus operaciones contadas como comandos de
+MongoDB, y con LocationIQ, Cloudinary y los certificados de Google
+simulados (benchmarks/stubs.py). Cada petición se hace con las cachés
+vacías, que es el caso con más operaciones: si una ruta supera su
+presupuesto, la petición lanza BudgetExceededError y el test falla.
+"""
+import re
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from mongomock_motor import AsyncMongoMockClient
+
+from benchmarks.stubs import StubUpstreams, count_mongomock_commands
+from core.request_stats import BudgetExceededError, RequestStatsMiddleware, operation_budget
+
+pytestmark = pytest.mark.anyio
+
+AUTHOR = "autora@tests.example.com"
+OTHER = "otro@tests.example.com"
+# PNG de 1x1 píxel para las subidas de imágenes
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082"
+)
+# Rutas con presupuesto; cada una tiene al menos un test en este módulo
+BUDGETED_ROUTES = {
+    "GET /v1/reviews/by-ids",
+    "POST /v1/reviews/batch",
+    "GET /v1/reviews/mine",
+    "GET /v1/reviews/{review_id}",
+    "POST /v1/reviews/",
+    "PUT /v1/reviews/{review_id}",
+    "DELETE /v1/reviews/{review_id}",
+}
+
+
+@pytest.fixture(scope="module")
+def stubs():
+    """Servicios externos simulados, con la aplicación apuntando a ellos."""
+    stubs = StubUpstreams(key_bits=1024)
+    stubs.start()
+    stubs.redirect_app()
+    yield stubs
+    stubs.stop()
+
+
+@pytest.fixture
+async def database():
+    """Base de datos mongomock vacía conectada a la aplicación."""
+    from core.database import db
+
+    db.client = AsyncMongoMockClient()
+    db.db = db.client["reviews_tests"]
+    yield db.db
+    db.client = None
+    db.db = None
+
+
+@pytest.fixture
+async def client(stubs, database):
+    """Cliente HTTP de la aplicación, con las operaciones de mongomock contadas."""
+    from core.cache_backend import close_cache_backend
+    from core.http import close_http_client
+    from main import app
+
+    with count_mongomock_commands():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://tests") as client:
+            yield client
+    await close_http_client()
+    await close_cache_backend()
+
+
+@pytest.fixture
+def tokens(stubs):
+    """ID token de Google (firmado por los stubs) de cada usuario de prueba."""
+    from core.config import settings
+
+    return {email: stubs.issue_token(email, email.split("@")[0], audience=settings.google_client_id)
+            for email in (AUTHOR, OTHER)}
+
+
+def _auth(tokens: dict, email: str = AUTHOR) -> dict:
+    return {"Authorization": f"Bearer {tokens[email]}"}
+
+
+async def _cold_caches() -> None:
+    """Vacía las cachés de respuestas, tokens, certificados y geocodificación."""
+    from core.cache_backend import close_cache_backend
+    from services import auth
+    from services.review_cache import review_cache
+
+    review_cache.invalidate_all()
+    auth._google_request._responses.clear()
+    await close_cache_backend()
+
+
+async def _seed_review(database, address: str = "Calle Larios 1, Málaga") -> str:
+    """Crea una reseña de AUTHOR directamente en el repositorio y devuelve su ID."""
+    from models.review import Review
+    from repositories.review_repository import ReviewRepository
+
+    review = await ReviewRepository(database).create(Review(
+        establishment_name="Casa Lola", address=address, latitude=36.72, longitude=-4.42,
+        rating=4, user_email=AUTHOR, user_name="autora", token_used="tests"
+    ))
+    return review.id
+
+
+def _operations(response: httpx.Response) -> tuple[int, int]:
+    """Comandos de MongoDB y llamadas externas de la petición (cabecera Server-Timing)."""
+    timing = response.headers["Server-Timing"]
+    mongo = re.search(r'mongo;[^,]*desc="(\d+) ops"', timing)
+    upstream = re.search(r'upstream;[^,]*desc="(\d+) llamadas"', timing)
+    return int(mongo.group(1)), int(upstream.group(1))
+
+
+def test_every_budgeted_route_is_tested():
+    from main import app
+
+    budgeted = {
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        if any(dependency.dependency.__name__ == "declare_budget" for dependency in route.dependencies)
+        for method in route.methods
+    }
+    assert budgeted == BUDGETED_ROUTES
+
+
+async def test_get_reviews_by_ids(client, database):
+    review_ids = [await _seed_review(database) for _ in range(3)]
+    await _cold_caches()
+
+    response = await client.get("/v1/reviews/by-ids", params={"ids": ",".join(review_ids + ["x"])})
+
+    assert response.status_code == 200
+    assert [review["_id"] for review in response.json()["items"]] == review_ids
+    assert _operations(response) == (1, 0)
+
+
+async def test_get_reviews_batch(client, database):
+    review_ids = [await _seed_review(database) for _ in range(3)]
+    await _cold_caches()
+
+    response = await client.post("/v1/reviews/batch", json={"ids": review_ids})
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 3
+
+
+async def test_get_my_reviews(client, database, tokens):
+    await _seed_review(database)
+    await _cold_caches()
+
+    response = await client.get("/v1/reviews/mine", headers=_auth(tokens))
+
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert _operations(response)[1] == 1  # Certificados de Google
+
+
+async def test_get_review_detail(client, database):
+    review_id = await _seed_review(database)
+    await _cold_caches()
+
+    response = await client.get(f"/v1/reviews/{review_id}")
+
+    assert response.status_code == 200
+    assert _operations(response) == (2, 0)
+
+
+async def test_get_review_detail_not_modified_skips_the_review(client, database):
+    review_id = await _seed_review(database)
+    etag = (await client.get(f"/v1/reviews/{review_id}")).headers["ETag"]
+    await _cold_caches()
+
+    response = await client.get(f"/v1/reviews/{review_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert _operations(response) == (1, 0)  # Solo la versión
+
+
+async def test_get_all_reviews_not_modified_skips_the_list(client, database):
+    await _seed_review(database)
+    etag = (await client.get("/v1/reviews/")).headers["ETag"]
+    await _cold_caches()
+
+    response = await client.get("/v1/reviews/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert _operations(response) == (1, 0)
+
+
+async def test_create_review(client, tokens):
+    await _cold_caches()
+
+    response = await client.post(
+        "/v1/reviews/",
+        headers=_auth(tokens),
+        data={"establishment_name": "Bodega Sol", "address": "Calle Granada 7, Málaga", "rating": "5"},
+        files=[("images", ("foto.png", PNG, "image/png"))],
+    )
+
+    assert response.status_code == 200
+    assert response.json()["images"]
+
+
+async def test_update_review_without_address_change(client, database, tokens):
+    review_id = await _seed_review(database)
+    await _cold_caches()
+
+    response = await client.put(f"/v1/reviews/{review_id}", headers=_auth(tokens), data={"rating": "2"})
+
+    assert response.status_code == 200
+    assert response.json()["rating"] == 2
+
+
+async def test_update_review_with_address_change(client, database, tokens):
+    review_id = await _seed_review(database)
+    await _cold_caches()
+
+    response = await client.put(
+        f"/v1/reviews/{review_id}", headers=_auth(tokens),
+        data={"rating": "3", "address": "Paseo del Parque 1, Málaga"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["address"] == "Paseo del Parque 1, Málaga"
+    # Escritura fallida + lectura + escritura + versiones; token + geocodificación
+    assert _operations(response) == (4, 2)
+
+
+async def test_update_review_of_other_author(client, database, tokens):
+    review_id = await _seed_review(database)
+    await _cold_caches()
+
+    response = await client.put(
+        f"/v1/reviews/{review_id}", headers=_auth(tokens, OTHER),
+        data={"address": "Gran Vía 7, Madrid"}
+    )
+
+    assert response.status_code == 403
+
+
+async def test_delete_review(client, database, tokens):
+    review_id = await _seed_review(database)
+    await _cold_caches()
+
+    response = await client.delete(f"/v1/reviews/{review_id}", headers=_auth(tokens))
+
+    assert response.status_code == 200
+    assert _operations(response) == (2, 1)
+
+
+def _n_plus_one_app(enforce_budgets: bool) -> FastAPI:
+    """Aplicación mínima con una ruta que hace una consulta más de las presupuestadas."""
+    app = FastAPI()
+    collection = AsyncMongoMockClient()["tests"]["items"]
+
+    @app.get("/items", dependencies=[operation_budget(mongo=1)])
+    async def items():
+        await collection.find_one({"kind": "list"})
+        await collection.find_one({"kind": "detail"})
+        return {}
+
+    app.add_middleware(RequestStatsMiddleware, enforce_budgets=enforce_budgets)
+    return app
+
+
+async def test_budget_overrun_fails_the_request():
+    transport = httpx.ASGITransport(app=_n_plus_one_app(enforce_budgets=True))
+    with count_mongomock_commands():
+        async with httpx.AsyncClient(transport=transport, base_url="http://tests") as client:
+            with pytest.raises(BudgetExceededError, match="2 operaciones de MongoDB"):
+                await client.get("/items")
+
+
+async def test_budget_overrun_only_warns_without_enforcement(capsys):
+    transport = httpx.ASGITransport(app=_n_plus_one_app(enforce_budgets=False))
+    with count_mongomock_commands():
+        async with httpx.AsyncClient(transport=transport, base_url="http://tests") as client:
+            response = await client.get("/items")
+
+    assert response.status_code == 200
+    assert "supera su presupuesto" in capsys.readouterr().out
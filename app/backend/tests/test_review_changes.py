@@ -0,0 +1,96 @@
+"""
+Tests de la sincronización incremental (GET /v1/reviews/changes).
+"""
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from core.config import settings
+from core.cursor import decode_cursor, encode_cursor
+from models.review import Review
+from repositories.review_repository import ReviewRepository
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def database(monkeypatch):
+    """Base de datos mongomock vacía conectada a la aplicación, sin margen de asentamiento."""
+    from core.database import db
+
+    monkeypatch.setattr(settings, "review_changes_settle_seconds", 0)
+    db.client = AsyncMongoMockClient()
+    db.db = db.client["reviews_tests"]
+    yield db.db
+    db.client = None
+    db.db = None
+
+
+@pytest.fixture
+async def client(database):
+    from main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://tests") as client:
+        yield client
+
+
+async def _seed_review(database, updated_at: datetime) -> str:
+    review = await ReviewRepository(database).create(Review(
+        establishment_name="Casa Lola", address="Calle Larios 1, Málaga", latitude=36.72, longitude=-4.42,
+        rating=4, user_email="autora@tests.example.com", user_name="autora", token_used="tests",
+        updated_at=updated_at
+    ))
+    return review.id
+
+
+def _days_ago(days: int) -> datetime:
+    return datetime.utcnow().replace(microsecond=0) - timedelta(days=days)
+
+
+async def test_quiet_dataset_keeps_the_token_valid(client, database):
+    review_id = await _seed_review(database, _days_ago(settings.review_tombstone_retention_days + 5))
+
+    first = (await client.get("/v1/reviews/changes")).json()
+    assert [item["id"] for item in first["items"]] == [review_id]
+
+    # El último cambio es más antiguo que la retención, pero el cliente sincronizó ahora
+    response = await client.get("/v1/reviews/changes", params={"since": first["next_token"]})
+
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+    token = decode_cursor(response.json()["next_token"])
+    assert token["id"] == review_id
+    assert datetime.fromisoformat(token["s"]) > _days_ago(1)
+
+
+async def test_empty_dataset_returns_a_token(client, database):
+    first = (await client.get("/v1/reviews/changes")).json()
+    review_id = await _seed_review(database, datetime.utcnow() - timedelta(seconds=1))
+
+    response = await client.get("/v1/reviews/changes", params={"since": first["next_token"]})
+
+    assert [item["id"] for item in response.json()["items"]] == [review_id]
+
+
+async def test_stale_sync_needs_a_full_resync(client, database):
+    stale = _days_ago(settings.review_tombstone_retention_days + 1)
+    review_id = await _seed_review(database, stale)
+    token = encode_cursor({"t": stale.isoformat(), "id": review_id, "s": stale.isoformat()})
+
+    response = await client.get("/v1/reviews/changes", params={"since": token})
+
+    assert response.status_code == 410
+
+
+async def test_partial_page_only_syncs_up_to_the_last_item(client, database):
+    old = _days_ago(3)
+    first_id = await _seed_review(database, old)
+    await _seed_review(database, _days_ago(1))
+
+    response = (await client.get("/v1/reviews/changes", params={"limit": 1})).json()
+
+    assert response["has_more"]
+    token = decode_cursor(response["next_token"])
+    assert (token["id"], token["s"]) == (first_id, old.isoformat())
@@ -0,0 +1,147 @@
+"""
+Tests de la importación masiva de reseñas (services/review_import.py).
+
+Los trabajos se guardan en mongomock-motor y la geocodificación se
+sustituye por una función local, así que no hay red ni servidor.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from core.config import settings
+from services import review_import
+
+pytestmark = pytest.mark.anyio
+
+AUTHOR = {"email": "autora@tests.example.com", "name": "autora", "token": "tests"}
+UNKNOWN_ADDRESS = "Calle Inexistente 0"
+
+
+@pytest.fixture
+def database():
+    return AsyncMongoMockClient()["reviews_tests"]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    """Bloques de 2 filas y geocodificación local (UNKNOWN_ADDRESS no existe)."""
+    async def geocode_many(addresses):
+        return {
+            address: HTTPException(status_code=404, detail="Dirección no encontrada")
+            if address == UNKNOWN_ADDRESS else (36.72, -4.42)
+            for address in addresses
+        }
+
+    monkeypatch.setattr(settings, "review_import_chunk_size", 2)
+    monkeypatch.setattr(review_import, "geocode_many", geocode_many)
+
+
+def _rows(count: int) -> list[dict]:
+    return [{"establishment_name": f"Bar {i}", "address": f"Calle Larios {i}, Málaga", "rating": 4} for i in range(count)]
+
+
+# parse_rows
+
+def test_parse_csv_with_bom():
+    content = "﻿establishment_name,address,rating\nCasa Lola,\"Calle Granada 46, Málaga\",4\n".encode()
+
+    assert review_import.parse_rows(content, "csv") == [
+        {"establishment_name": "Casa Lola", "address": "Calle Granada 46, Málaga", "rating": "4"}
+    ]
+
+
+def test_parse_ndjson_skips_blank_lines():
+    content = b'{"establishment_name": "A", "address": "B", "rating": 1}\n\n{"establishment_name": "C", "address": "D", "rating": 2}\n'
+
+    assert [row["establishment_name"] for row in review_import.parse_rows(content, "ndjson")] == ["A", "C"]
+
+
+@pytest.mark.parametrize("content, file_format, detail", [
+    (b"", "ndjson", "no contiene filas"),
+    (b"establishment_name,address,rating\n", "csv", "no contiene filas"),
+    (b"{no es json}\n", "ndjson", "ndjson inválido"),
+    (b"\xff\xfe", "csv", "csv inválido"),
+])
+def test_parse_rejects_invalid_files(content, file_format, detail):
+    with pytest.raises(HTTPException) as error:
+        review_import.parse_rows(content, file_format)
+
+    assert error.value.status_code == 400
+    assert detail in error.value.detail
+
+
+def test_parse_rejects_too_many_rows(monkeypatch):
+    monkeypatch.setattr(settings, "review_import_max_rows", 2)
+
+    with pytest.raises(HTTPException, match="máximo de 2 filas"):
+        review_import.parse_rows(b"{}\n{}\n{}\n", "ndjson")
+
+
+def test_parse_rejects_too_many_bytes(monkeypatch):
+    monkeypatch.setattr(settings, "review_import_max_bytes", 10)
+
+    with pytest.raises(HTTPException) as error:
+        review_import.parse_rows(b'{"rating": 1}\n', "ndjson")
+
+    assert error.value.status_code == 413
+
+
+# Trabajos
+
+async def test_job_keeps_rows_and_errors_out_of_the_job_document(database):
+    rows = _rows(3) + [{"establishment_name": "", "address": "x", "rating": 9}]
+
+    job = await review_import.create_job(database, rows, AUTHOR)
+
+    stored = await database["review_imports"].find_one({"_id": job["_id"]})
+    assert "rows" not in stored and "errors" not in stored
+    assert (stored["total"], stored["chunks"], stored["error_count"]) == (4, 2, 1)
+    chunks = await database[review_import.CHUNKS_COLLECTION].find({"job_id": job["_id"]}).to_list(None)
+    assert sorted((chunk["kind"], len(chunk["items"])) for chunk in chunks) == [("errors", 1), ("rows", 1), ("rows", 2)]
+    assert [error["row"] for error in job["errors"]] == [3]
+
+
+async def test_run_job_imports_every_chunk(database):
+    rows = _rows(3) + [{"establishment_name": "Perdido", "address": UNKNOWN_ADDRESS, "rating": 3}]
+    job = await review_import.create_job(database, rows, AUTHOR)
+
+    await review_import.run_job(database, job)
+
+    finished = await review_import.get_job(database, str(job["_id"]))
+    assert (finished["status"], finished["next_row"], finished["inserted"], finished["error_count"]) == ("completed", 4, 3, 1)
+    assert finished["errors"] == [{"row": 3, "error": "Dirección no encontrada"}]
+    assert await database["reviews"].count_documents({}) == 3
+    # Los bloques de filas se borran al terminar; los errores se conservan
+    assert await database[review_import.CHUNKS_COLLECTION].count_documents({"kind": "rows"}) == 0
+
+
+async def test_resume_after_inserting_a_chunk_does_not_duplicate_reviews(database):
+    job = await review_import.create_job(database, _rows(5), AUTHOR)
+    # Interrupción: el primer bloque se insertó pero el progreso no llegó a guardarse
+    first = await database[review_import.CHUNKS_COLLECTION].find_one({"job_id": job["_id"], "kind": "rows", "seq": 0})
+    await review_import._import_chunk(database, job, first["items"], {})
+    await database["review_imports"].update_one({"_id": job["_id"]}, {"$set": {"status": "failed"}})
+
+    claimed = await review_import.claim_job(database, str(job["_id"]))
+    await review_import.run_job(database, claimed)
+
+    finished = await review_import.get_job(database, str(job["_id"]))
+    assert (finished["status"], finished["inserted"], finished["errors"]) == ("completed", 5, [])
+    assert await database["reviews"].count_documents({}) == 5
+
+
+async def test_claim_job_waits_for_the_lease_to_expire(database):
+    job = await review_import.create_job(database, _rows(1), AUTHOR)
+    job_id = str(job["_id"])
+    expired = job["lease_until"] + timedelta(seconds=1)
+
+    assert await review_import.claim_job(database, job_id) is None  # En curso
+    claimed = await review_import.claim_job(database, job_id, now=expired)
+    assert claimed["lease_until"] > expired + timedelta(seconds=review_import.LEASE_SECONDS - 1)
+    assert await review_import.claim_job(database, job_id, now=expired) is None  # Ya reclamado
+
+    await review_import.run_job(database, claimed)
+    assert await review_import.claim_job(database, job_id, now=datetime.utcnow() + timedelta(days=1)) is None
+    assert await review_import.claim_job(database, "no-es-un-id") is None
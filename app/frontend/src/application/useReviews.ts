@@ -16,6 +16,15 @@ interface CreateReviewData {
     images?: File[];
 }
 
+/**
+ * Evento del feed en vivo (/reviews/stream).
+ */
+interface ReviewStreamEvent {
+    op: 'upsert' | 'delete';
+    id: string;
+    review?: Review;
+}
+
 /**
  * Hook para operaciones CRUD de reseñas.
  * 
@@ -110,7 +119,8 @@ export const useReviews = () => {
                 },
             });
 
-            setReviews(prev => [...prev, response.data]);
+            // El feed en vivo puede haberla añadido ya
+            setReviews(prev => prev.some(r => r._id === response.data._id) ? prev : [...prev, response.data]);
             return response.data;
         } catch (err) {
             setError('Error creando reseña');
@@ -174,6 +184,33 @@ export const useReviews = () => {
         }
     }, []);
 
+    /**
+     * Mantiene la lista actualizada con el feed SSE en lugar de recargarla.
+     * Ante un evento "reset" (eventos perdidos) se recarga el listado completo.
+     * 
+     * @returns Función que cierra la suscripción
+     */
+    const subscribeToUpdates = useCallback(() => {
+        const source = new EventSource(`${api.defaults.baseURL}/reviews/stream`);
+
+        source.addEventListener('review', (event) => {
+            const change: ReviewStreamEvent = JSON.parse((event as MessageEvent).data);
+            if (change.op === 'delete') {
+                setReviews(prev => prev.filter(r => r._id !== change.id));
+            } else if (change.review) {
+                const review = change.review;
+                setReviews(prev => prev.some(r => r._id === change.id)
+                    ? prev.map(r => r._id === change.id ? review : r)
+                    : [...prev, review]);
+            }
+        });
+        source.addEventListener('reset', () => {
+            fetchAllReviews();
+        });
+
+        return () => source.close();
+    }, [fetchAllReviews]);
+
     return {
         reviews,
         selectedReview,
@@ -185,6 +222,7 @@ export const useReviews = () => {
         createReview,
         updateReview,
         deleteReview,
-        setSelectedReview
+        setSelectedReview,
+        subscribeToUpdates
     };
 };
@@ -1,16 +1,21 @@
 import { useState, useCallback } from 'react';
 import api from '../infrastructure/api/axiosConfig';
-import { Visit } from '../domain/types';
+import { Visit, VisitPage } from '../domain/types';
 
 export const useVisits = () => {
     const [visits, setVisits] = useState<Visit[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(false);
 
+    /**
+     * Carga la primera página del historial (las visitas más recientes).
+     */
     const fetchVisits = useCallback(async () => {
         setLoading(true);
         try {
-            const response = await api.get<Visit[]>('/social/visits');
-            setVisits(response.data);
+            const response = await api.get<VisitPage>('/social/visits');
+            setVisits(response.data.items);
+            setNextCursor(response.data.next_cursor);
         } catch (err) {
             console.error('Error cargando visitas', err);
         } finally {
@@ -18,9 +23,28 @@ export const useVisits = () => {
         }
     }, []);
 
+    /**
+     * Añade la página siguiente siguiendo el cursor de la anterior.
+     */
+    const loadMoreVisits = useCallback(async () => {
+        if (!nextCursor) return;
+        setLoading(true);
+        try {
+            const response = await api.get<VisitPage>('/social/visits', { params: { cursor: nextCursor } });
+            setVisits(prev => [...prev, ...response.data.items]);
+            setNextCursor(response.data.next_cursor);
+        } catch (err) {
+            console.error('Error cargando visitas', err);
+        } finally {
+            setLoading(false);
+        }
+    }, [nextCursor]);
+
     return {
         visits,
         loading,
-        fetchVisits
+        hasMoreVisits: nextCursor !== null,
+        fetchVisits,
+        loadMoreVisits
     };
 };
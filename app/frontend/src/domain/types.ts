@@ -27,8 +27,15 @@ export interface Visit {
     _id?: string;
     visitor_email: string;
     visited_email: string;
-    visitor_token: string;
-    timestamp: string;
+    day: string;
+    count: number;
+    first_seen: string;
+    last_seen: string;
+}
+
+export interface VisitPage {
+    items: Visit[];
+    next_cursor: string | null;
 }
 
 /**
@@ -46,6 +53,6 @@ export interface Review {
     user_name: string;
     token_used: string;
     created_at: string;
+    updated_at: string;
     token_expires_at: string;
 }
-
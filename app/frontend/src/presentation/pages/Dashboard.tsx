@@ -50,6 +50,7 @@ const Dashboard: React.FC = () => {
         reviews,
         loading,
         fetchAllReviews,
+        subscribeToUpdates,
         createReview,
         selectedReview,
         setSelectedReview
@@ -60,10 +61,11 @@ const Dashboard: React.FC = () => {
     const [mapCenter, setMapCenter] = useState<[number, number] | null>(null);
     const [activeTab, setActiveTab] = useState<'list' | 'map'>('list');
 
-    // Cargar reseñas al montar
+    // Cargar reseñas al montar y aplicar los cambios en vivo
     useEffect(() => {
         fetchAllReviews();
-    }, [fetchAllReviews]);
+        return subscribeToUpdates();
+    }, [fetchAllReviews, subscribeToUpdates]);
 
     /**
      * Maneja la búsqueda de ubicación.
@@ -85,7 +87,6 @@ const Dashboard: React.FC = () => {
     }) => {
         await createReview(data);
         setShowForm(false);
-        fetchAllReviews();
     };
 
     /**